@@ -1,145 +1,502 @@
-import tkinter as tk
-from tkinter import filedialog, messagebox, scrolledtext, ttk
-
-class MyLangTextEditor:
-    def __init__(self, master):
-        self.master = master
-        self.master.title("MyLang Text Editor - Visual Studio Style")
-        self.master.geometry("800x600")
-
-        self.create_menu()
-        self.create_editor_area()
-        self.create_status_bar()
-
-        # Track if file is modified
-        self.file_path = None
-        self.text_area.bind('<KeyRelease>', self.highlight_syntax)
-        self.text_area.bind("<<Modified>>", self.on_modified)
-
-        # Line numbers
-        self.text_area.bind("<KeyPress>", self.update_line_numbers)
-        self.text_area.bind("<Button-1>", self.update_line_numbers)
-        self.text_area.bind("<MouseWheel>", self.update_line_numbers)
-
-        self.create_tags()
-
-    def create_menu(self):
-        """Create a menu bar with file options."""
-        self.menu_bar = tk.Menu(self.master)
-        self.master.config(menu=self.menu_bar)
-
-        # File Menu
-        self.file_menu = tk.Menu(self.menu_bar, tearoff=0)
-        self.menu_bar.add_cascade(label="File", menu=self.file_menu)
-        self.file_menu.add_command(label="New", command=self.new_file)
-        self.file_menu.add_command(label="Open", command=self.open_file)
-        self.file_menu.add_command(label="Save", command=self.save_file)
-        self.file_menu.add_separator()
-        self.file_menu.add_command(label="Exit", command=self.master.quit)
-
-    def create_editor_area(self):
-        """Create the main text editor with line numbers."""
-        self.container = tk.Frame(self.master)
-        self.container.pack(fill=tk.BOTH, expand=1)
-
-        # Line numbers
-        self.line_numbers = tk.Text(self.container, width=4, padx=3, takefocus=0, bd=0, 
-                                    background="lightgray", state='disabled', wrap='none')
-        self.line_numbers.pack(side=tk.LEFT, fill=tk.Y)
-
-        # Text area with scrollbar
-        self.text_area = scrolledtext.ScrolledText(self.container, wrap=tk.WORD, undo=True)
-        self.text_area.pack(expand=1, fill=tk.BOTH, side=tk.RIGHT)
-
-    def create_status_bar(self):
-        """Create a status bar for the editor."""
-        self.status_bar = ttk.Label(self.master, text="Ln 1, Col 1  |  Unsaved", relief=tk.SUNKEN, anchor=tk.W)
-        self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
-
-    def update_line_numbers(self, event=None):
-        """Update the line numbers."""
-        line_count = self.text_area.index('end').split('.')[0]
-        self.line_numbers.config(state=tk.NORMAL)
-        self.line_numbers.delete('1.0', tk.END)
-        for i in range(1, int(line_count)):
-            self.line_numbers.insert(tk.END, f"{i}\n")
-        self.line_numbers.config(state=tk.DISABLED)
-
-    def update_status_bar(self):
-        """Update the status bar with current line and column."""
-        line, col = self.text_area.index(tk.INSERT).split('.')
-        self.status_bar.config(text=f"Ln {line}, Col {int(col) + 1}  |  {'Unsaved' if self.text_area.edit_modified() else 'Saved'}")
-
-    def on_modified(self, event=None):
-        """Callback for when text is modified."""
-        self.text_area.edit_modified(False)
-        self.update_status_bar()
-
-    def create_tags(self):
-        """Create tags for syntax highlighting."""
-        self.text_area.tag_configure("command", foreground="blue")
-        self.text_area.tag_configure("variable", foreground="green")
-        self.text_area.tag_configure("string", foreground="dark orange")
-
-    def highlight_syntax(self, event=None):
-        """Apply syntax highlighting."""
-        self.text_area.tag_remove("command", "1.0", "end")
-        self.text_area.tag_remove("variable", "1.0", "end")
-        self.text_area.tag_remove("string", "1.0", "end")
-
-        lines = self.text_area.get("1.0", "end-1c").splitlines()
-        for line_number, line in enumerate(lines):
-            words = line.split()
-            for word in words:
-                if word in ["p", "i", "new", "create_character", "attack", "add_item", "show_inventory", "narrate", "open", "import"]:
-                    self.apply_tag("command", line_number, word)
-                elif word.startswith("$"):
-                    self.apply_tag("variable", line_number, word)
-                elif word.startswith("\"") and word.endswith("\""):
-                    self.apply_tag("string", line_number, word)
-
-    def apply_tag(self, tag, line_number, word):
-        """Helper function to apply a specific tag to a word."""
-        start_index = f"{line_number + 1}.{self.text_area.get(f'{line_number + 1}.0', f'{line_number + 1}.end').index(word)}"
-        end_index = f"{line_number + 1}.{self.text_area.get(f'{line_number + 1}.0', f'{line_number + 1}.end').index(word) + len(word)}"
-        self.text_area.tag_add(tag, start_index, end_index)
-
-    def new_file(self):
-        """Clear the text area for a new file."""
-        self.text_area.delete(1.0, tk.END)
-        self.file_path = None
-        self.update_status_bar()
-
-    def open_file(self):
-        """Open and display a file in the text editor."""
-        file_path = filedialog.askopenfilename(defaultextension=".cla",
-                                                filetypes=[("CLA files", "*.cla"), ("All files", "*.*")])
-        if file_path:
-            try:
-                with open(file_path, "r") as file:
-                    self.text_area.delete(1.0, tk.END)
-                    self.text_area.insert(tk.END, file.read())
-                    self.highlight_syntax()  # Ensure syntax is highlighted after opening
-                    self.file_path = file_path
-                    self.update_status_bar()
-            except Exception as e:
-                messagebox.showerror("Error", f"Could not open file: {e}")
-
-    def save_file(self):
-        """Save the current content of the text area to a file."""
-        if not self.file_path:
-            self.file_path = filedialog.asksaveasfilename(defaultextension=".cla",
-                                                   filetypes=[("CLA files", "*.cla"), ("All files", "*.*")])
-        if self.file_path:
-            try:
-                with open(self.file_path, "w") as file:
-                    file.write(self.text_area.get(1.0, tk.END))
-                    self.text_area.edit_modified(False)
-                    self.update_status_bar()
-            except Exception as e:
-                messagebox.showerror("Error", f"Could not save file: {e}")
-
-if __name__ == "__main__":
-    root = tk.Tk()
-    editor = MyLangTextEditor(root)
-    root.mainloop()
+import os
+import mmap
+import queue
+import shutil
+import tempfile
+import threading
+import tkinter as tk
+from tkinter import filedialog, messagebox, scrolledtext, ttk
+import tkinter.font as tkfont
+
+from cla_syntax import analyze, tokenize_line
+
+# Highlighting runs this long after the last keystroke
+HIGHLIGHT_DELAY_MS = 50
+
+# Distinct line texts whose tokens are remembered
+TOKEN_CACHE_SIZE = 20000
+
+TOKEN_TAGS = ("command", "variable", "string", "comment")
+
+# Diagnostics are recomputed this long after the last edit
+ANALYSIS_DELAY_MS = 300
+
+# How often the main loop checks for a finished analysis
+ANALYSIS_POLL_MS = 30
+
+# Files are inserted this many characters per event-loop turn while loading
+LOAD_CHUNK_SIZE = 1 << 20
+
+# Files larger than this open as a read-only preview mapped with mmap
+PREVIEW_THRESHOLD = 64 << 20
+
+# Bytes of a previewed file added each time the view reaches its end
+PREVIEW_WINDOW = 1 << 20
+
+# Lines fetched from the text widget per write while saving
+SAVE_CHUNK_LINES = 5000
+
+# Bytes per read when a save copies over a hard-linked file
+SAVE_COPY_BUFFER = 1 << 20
+
+class BackgroundAnalyzer:
+    """Runs cla_syntax.analyze() on a worker thread so the main loop never waits.
+
+    Only the newest submitted text is analysed; results are collected with
+    poll() from the Tk thread.
+    """
+
+    def __init__(self):
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.cache = {}  # Per-line parse cache, only used by the worker
+        self.thread = threading.Thread(target=self.work, name="cla-analysis", daemon=True)
+        self.thread.start()
+
+    def submit(self, generation, text):
+        self.requests.put((generation, text))
+
+    def work(self):
+        while True:
+            request = self.requests.get()
+            # Skip snapshots that newer edits have already replaced
+            while True:
+                try:
+                    request = self.requests.get_nowait()
+                except queue.Empty:
+                    break
+            generation, text = request
+            self.results.put((generation, analyze(text.split("\n"), self.cache)))
+
+    def poll(self):
+        """The newest finished (generation, diagnostics), or None."""
+        result = None
+        while True:
+            try:
+                result = self.results.get_nowait()
+            except queue.Empty:
+                return result
+
+
+class MyLangTextEditor:
+    def __init__(self, master):
+        self.master = master
+        self.master.title("MyLang Text Editor - Visual Studio Style")
+        self.master.geometry("800x600")
+
+        self.create_menu()
+        self.create_editor_area()
+        self.create_status_bar()
+
+        # Track if file is modified
+        self.file_path = None
+        # Open in progress: (file, size, characters read), or None
+        self.loading = None
+        self.load_job = None
+        # Read-only view of a huge file: mmap and how far it has been shown
+        self.preview = None
+        self.preview_offset = 0
+        self.preview_job = None
+        self.status_note = None  # Shown in the status bar instead of Saved/Unsaved
+        # Incremental highlighting: lines touched since the last pass, and
+        # tokens per line text so unchanged or repeated lines are not re-lexed
+        self.dirty_range = None
+        self.highlight_job = None
+        self.token_cache = {}
+        self.text_area.bind('<KeyRelease>', self.schedule_highlight)
+        for event in ("<<Paste>>", "<<Cut>>", "<<Undo>>", "<<Redo>>"):
+            self.text_area.bind(event, self.schedule_highlight, add="+")
+        self.text_area.bind("<<Modified>>", self.on_modified)
+        self.text_area.bind("<KeyRelease>", self.update_status_bar, add="+")
+        self.text_area.bind("<ButtonRelease-1>", self.update_status_bar, add="+")
+
+        # Diagnostics: every edit bumps the generation, and results computed
+        # for an older generation are dropped
+        self.analyzer = BackgroundAnalyzer()
+        self.edit_generation = 0
+        self.analyzed_generation = 0
+        self.analysis_job = None
+        self.poll_job = None
+        self.diagnostics = {}  # line number -> first message on that line
+
+        # Line numbers: Tk calls yscrollcommand whenever the view or the
+        # amount of text changes, which covers typing, scrolling and resizing
+        self.gutter_state = None
+        self.gutter_job = None
+        self.text_area.configure(yscrollcommand=self.on_text_scroll)
+        self.text_area.bind("<Configure>", self.schedule_line_numbers, add="+")
+
+        self.create_tags()
+
+    def create_menu(self):
+        """Create a menu bar with file options."""
+        self.menu_bar = tk.Menu(self.master)
+        self.master.config(menu=self.menu_bar)
+
+        # File Menu
+        self.file_menu = tk.Menu(self.menu_bar, tearoff=0)
+        self.menu_bar.add_cascade(label="File", menu=self.file_menu)
+        self.file_menu.add_command(label="New", command=self.new_file)
+        self.file_menu.add_command(label="Open", command=self.open_file)
+        self.file_menu.add_command(label="Save", command=self.save_file)
+        self.file_menu.add_separator()
+        self.file_menu.add_command(label="Exit", command=self.master.quit)
+
+    def create_editor_area(self):
+        """Create the main text editor with line numbers."""
+        self.container = tk.Frame(self.master)
+        self.container.pack(fill=tk.BOTH, expand=1)
+
+        # Line numbers, drawn only for the lines on screen
+        self.line_numbers = tk.Canvas(self.container, width=40, takefocus=0, bd=0,
+                                      highlightthickness=0, background="lightgray")
+        self.line_numbers.pack(side=tk.LEFT, fill=tk.Y)
+
+        # Text area with scrollbar
+        self.text_area = scrolledtext.ScrolledText(self.container, wrap=tk.WORD, undo=True)
+        self.text_area.pack(expand=1, fill=tk.BOTH, side=tk.RIGHT)
+        self.gutter_font = tkfont.Font(font=self.text_area.cget("font"))
+
+    def create_status_bar(self):
+        """Create a status bar for the editor."""
+        self.status_bar = ttk.Label(self.master, text="Ln 1, Col 1  |  Unsaved", relief=tk.SUNKEN, anchor=tk.W)
+        self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+
+    def on_text_scroll(self, first, last):
+        self.text_area.vbar.set(first, last)
+        self.schedule_line_numbers()
+        if (self.preview is not None and self.preview_job is None and float(last) >= 1.0
+                and self.preview_offset < len(self.preview)):
+            self.preview_job = self.master.after_idle(self.show_preview_window)
+
+    def schedule_line_numbers(self, event=None):
+        """Redraw the gutter once the current batch of events is handled."""
+        if self.gutter_job is None:
+            self.gutter_job = self.master.after_idle(self.update_line_numbers)
+
+    def update_line_numbers(self, event=None):
+        """Draw numbers for the visible lines if the line count or view changed."""
+        self.gutter_job = None
+        line_count = int(self.text_area.index("end-1c").split(".")[0])
+        state = (line_count, self.text_area.yview(), self.text_area.winfo_height())
+        if state == self.gutter_state:
+            return
+        self.gutter_state = state
+
+        gutter = self.line_numbers
+        width = self.gutter_font.measure("0" * len(str(line_count))) + 8
+        if int(gutter.cget("width")) != width:
+            gutter.config(width=width)
+        gutter.delete("all")
+        index = self.text_area.index("@0,0")
+        if not index.endswith(".0"):
+            # The top row continues a wrapped line whose number is off screen
+            index = self.text_area.index(f"{index}+1line linestart")
+        line = int(index.split(".")[0])
+        while line <= line_count:
+            info = self.text_area.dlineinfo(index)
+            if info is None:
+                break
+            gutter.create_text(width - 4, info[1], anchor=tk.NE, text=str(line), font=self.gutter_font)
+            line += 1
+            index = f"{line}.0"
+
+    def update_status_bar(self, event=None):
+        """Update the status bar with current line and column."""
+        line, col = self.text_area.index(tk.INSERT).split('.')
+        note = self.status_note or ('Unsaved' if self.text_area.edit_modified() else 'Saved')
+        message = self.diagnostics.get(int(line))
+        note = f"{note}  |  {message}" if message else note
+        self.status_bar.config(text=f"Ln {line}, Col {int(col) + 1}  |  {note}")
+
+    def on_modified(self, event=None):
+        """Callback for when text is modified."""
+        self.text_area.edit_modified(False)
+        self.edit_generation += 1
+        self.schedule_analysis()
+        self.update_status_bar()
+
+    def schedule_analysis(self):
+        if self.analysis_job is not None:
+            self.master.after_cancel(self.analysis_job)
+        self.analysis_job = self.master.after(ANALYSIS_DELAY_MS, self.start_analysis)
+
+    def start_analysis(self):
+        """Hand a snapshot of the buffer to the analysis thread."""
+        self.analysis_job = None
+        if self.preview is not None or self.loading is not None:
+            return  # Previews are never analysed; a load reschedules when it inserts
+        self.analyzed_generation = self.edit_generation
+        self.analyzer.submit(self.edit_generation, self.text_area.get("1.0", "end-1c"))
+        if self.poll_job is None:
+            self.poll_job = self.master.after(ANALYSIS_POLL_MS, self.poll_analysis)
+
+    def poll_analysis(self):
+        self.poll_job = None
+        result = self.analyzer.poll()
+        if result is not None and result[0] == self.edit_generation:
+            self.show_diagnostics(result[1])
+        elif result is None or result[0] < self.analyzed_generation:
+            self.poll_job = self.master.after(ANALYSIS_POLL_MS, self.poll_analysis)
+
+    def show_diagnostics(self, diagnostics):
+        """Underline each diagnostic's range; the status bar shows its message."""
+        self.diagnostics = {}
+        indices = []
+        for line_number, start, end, message in diagnostics:
+            self.diagnostics.setdefault(line_number, message)
+            indices.append(f"{line_number}.{start}")
+            indices.append(f"{line_number}.{max(end, start + 1)}")
+        self.text_area.tag_remove("error", "1.0", tk.END)
+        if indices:
+            self.text_area.tag_add("error", *indices)
+        self.update_status_bar()
+
+    def create_tags(self):
+        """Create tags for syntax highlighting."""
+        # Later tags take priority, so $references inside strings stay green
+        self.text_area.tag_configure("string", foreground="dark orange")
+        self.text_area.tag_configure("comment", foreground="gray")
+        self.text_area.tag_configure("command", foreground="blue")
+        self.text_area.tag_configure("variable", foreground="green")
+        self.text_area.tag_configure("error", underline=True, foreground="red")
+
+    def highlight_syntax(self, event=None):
+        """Apply syntax highlighting to the whole buffer."""
+        self.cancel_highlight()
+        last_line = int(self.text_area.index("end-1c").split(".")[0])
+        self.highlight_lines(1, last_line)
+
+    def schedule_highlight(self, event=None):
+        """Mark the lines around the cursor dirty and highlight them once typing pauses."""
+        line = int(self.text_area.index(tk.INSERT).split(".")[0])
+        if self.dirty_range is None:
+            self.dirty_range = (line, line)
+        else:
+            self.dirty_range = (min(self.dirty_range[0], line), max(self.dirty_range[1], line))
+        if self.highlight_job is not None:
+            self.master.after_cancel(self.highlight_job)
+        self.highlight_job = self.master.after(HIGHLIGHT_DELAY_MS, self.flush_highlight)
+
+    def cancel_highlight(self):
+        if self.highlight_job is not None:
+            self.master.after_cancel(self.highlight_job)
+        self.highlight_job = None
+        self.dirty_range = None
+
+    def flush_highlight(self):
+        """Re-tokenize only the dirty lines, plus one line of context each side."""
+        self.highlight_job = None
+        if self.dirty_range is None:
+            return
+        # The cursor may have moved past a paste or deletion since it was marked
+        line = int(self.text_area.index(tk.INSERT).split(".")[0])
+        first = min(self.dirty_range[0], line) - 1
+        last = max(self.dirty_range[1], line) + 1
+        self.dirty_range = None
+        last_line = int(self.text_area.index("end-1c").split(".")[0])
+        self.highlight_lines(max(first, 1), min(last, last_line))
+
+    def highlight_lines(self, first, last):
+        """Re-tag lines first..last, adding each tag's ranges in a single call."""
+        text = self.text_area.get(f"{first}.0", f"{last}.end")
+        ranges = {tag: [] for tag in TOKEN_TAGS}
+        for line_number, line in enumerate(text.split("\n"), first):
+            for tag, start, end in self.line_tokens(line):
+                ranges[tag].append(f"{line_number}.{start}")
+                ranges[tag].append(f"{line_number}.{end}")
+        for tag, indices in ranges.items():
+            self.text_area.tag_remove(tag, f"{first}.0", f"{last}.end")
+            if indices:
+                self.text_area.tag_add(tag, *indices)
+
+    def line_tokens(self, line):
+        tokens = self.token_cache.get(line)
+        if tokens is None:
+            if len(self.token_cache) >= TOKEN_CACHE_SIZE:
+                self.token_cache.clear()
+            tokens = self.token_cache[line] = tokenize_line(line)
+        return tokens
+
+    def new_file(self):
+        """Clear the text area for a new file."""
+        self.reset_buffer()
+        self.file_path = None
+        self.update_status_bar()
+
+    def reset_buffer(self):
+        """Stop any load or preview in progress and empty the text area."""
+        if self.load_job is not None:
+            self.master.after_cancel(self.load_job)
+            self.load_job = None
+        if self.loading is not None:
+            self.loading[0].close()
+            self.loading = None
+        if self.preview_job is not None:
+            self.master.after_cancel(self.preview_job)
+            self.preview_job = None
+        if self.preview is not None:
+            self.preview.close()
+            self.preview = None
+        self.cancel_highlight()
+        self.status_note = None
+        self.diagnostics = {}
+        self.text_area.config(state=tk.NORMAL, undo=True)
+        self.text_area.delete(1.0, tk.END)
+        self.text_area.edit_reset()
+
+    def open_file(self):
+        """Open and display a file in the text editor."""
+        file_path = filedialog.askopenfilename(defaultextension=".cla",
+                                                filetypes=[("CLA files", "*.cla"), ("All files", "*.*")])
+        if file_path:
+            try:
+                size = os.path.getsize(file_path)
+                if size > PREVIEW_THRESHOLD:
+                    self.open_preview(file_path)
+                else:
+                    self.load_file(file_path, size)
+            except Exception as e:
+                self.reset_buffer()
+                messagebox.showerror("Error", f"Could not open file: {e}")
+
+    def load_file(self, file_path, size):
+        """Read the file in chunks between UI events, highlighting each as it lands."""
+        self.reset_buffer()
+        self.loading = (open(file_path, "r"), size, 0)
+        self.file_path = file_path
+        # Read-only while loading, and no undo history for the load itself
+        self.text_area.config(state=tk.DISABLED, undo=False)
+        self.load_chunk()
+
+    def load_chunk(self):
+        self.load_job = None
+        file, size, loaded = self.loading
+        try:
+            text = "".join(file.readlines(LOAD_CHUNK_SIZE))
+        except Exception as e:
+            self.reset_buffer()
+            self.file_path = None
+            messagebox.showerror("Error", f"Could not open file: {e}")
+            return
+        if not text:
+            file.close()
+            self.loading = None
+            self.status_note = None
+            self.text_area.config(state=tk.NORMAL, undo=True)
+            self.text_area.edit_reset()
+            self.text_area.edit_modified(False)
+            self.text_area.mark_set(tk.INSERT, "1.0")
+            self.update_status_bar()
+            return
+
+        self.append_text(text)
+        self.text_area.config(state=tk.DISABLED)
+        loaded += len(text)
+        self.loading = (file, size, loaded)
+        self.status_note = f"Loading {os.path.basename(self.file_path)}... {min(100, loaded * 100 // max(size, 1))}%"
+        self.update_status_bar()
+        self.load_job = self.master.after(1, self.load_chunk)
+
+    def append_text(self, text):
+        first = int(self.text_area.index("end-1c").split(".")[0])
+        self.text_area.config(state=tk.NORMAL)
+        self.text_area.insert(tk.END, text)
+        last = int(self.text_area.index("end-1c").split(".")[0])
+        self.highlight_lines(first, last)
+
+    def open_preview(self, file_path):
+        """Show a huge file read-only, mapping it and decoding only what is scrolled to."""
+        self.reset_buffer()
+        with open(file_path, "rb") as file:
+            self.preview = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.preview_offset = 0
+        self.file_path = file_path
+        self.text_area.config(undo=False)
+        self.show_preview_window()
+
+    def show_preview_window(self):
+        self.preview_job = None
+        preview = self.preview
+        if preview is None or self.preview_offset >= len(preview):
+            return
+        start = self.preview_offset
+        end = min(start + PREVIEW_WINDOW, len(preview))
+        if end < len(preview):
+            newline = preview.rfind(b"\n", start, end)
+            if newline >= start:
+                end = newline + 1  # Keep lines, and multi-byte characters, whole
+        self.preview_offset = end
+        self.append_text(preview[start:end].decode("utf-8", "replace"))
+        self.text_area.config(state=tk.DISABLED)
+        self.status_note = (f"Read-only preview, {end >> 20} of {len(preview) >> 20} MB shown"
+                            f"{'' if end == len(preview) else ' (scroll down for more)'}")
+        self.update_status_bar()
+
+    def save_file(self):
+        """Save the current content of the text area to a file."""
+        if self.preview is not None or self.loading is not None:
+            messagebox.showinfo("Save", "This file is still loading or open as a read-only preview.")
+            return
+        if not self.file_path:
+            self.file_path = filedialog.asksaveasfilename(defaultextension=".cla",
+                                                   filetypes=[("CLA files", "*.cla"), ("All files", "*.*")])
+        if self.file_path:
+            try:
+                self.write_file(self.file_path)
+                self.text_area.edit_modified(False)
+                self.update_status_bar()
+            except Exception as e:
+                messagebox.showerror("Error", f"Could not save file: {e}")
+
+    def write_file(self, file_path):
+        """Stream the buffer to a temporary file beside file_path, then swap it in.
+
+        The file is written exactly as shown; Tk's own trailing newline is
+        not added. A symlink is followed and its target saved; a file with
+        other hard links is copied over in place so they keep seeing it.
+        """
+        real_path = os.path.realpath(file_path)
+        directory = os.path.dirname(real_path)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as file:
+                last_line = int(self.text_area.index("end-1c").split(".")[0])
+                for first in range(1, last_line + 1, SAVE_CHUNK_LINES):
+                    end = first + SAVE_CHUNK_LINES
+                    file.write(self.text_area.get(f"{first}.0", f"{end}.0" if end <= last_line else "end-1c"))
+                file.flush()
+                os.fsync(file.fileno())
+            try:
+                st = os.stat(real_path)
+            except FileNotFoundError:
+                st = None
+            if st is not None and st.st_nlink > 1:
+                # Replacing would give this name a new inode and leave the other links behind
+                with open(temp_path, "rb") as source, open(real_path, "r+b") as target:
+                    target.truncate(0)
+                    shutil.copyfileobj(source, target, SAVE_COPY_BUFFER)
+                    target.flush()
+                    os.fsync(target.fileno())
+                os.unlink(temp_path)
+                return
+            # mkstemp creates the file 0600; keep the mode a plain open() would give
+            if st is not None:
+                mode = st.st_mode & 0o7777
+            else:
+                umask = os.umask(0)
+                os.umask(umask)
+                mode = 0o666 & ~umask
+            os.chmod(temp_path, mode)
+            os.replace(temp_path, real_path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+
+if __name__ == "__main__":
+    root = tk.Tk()
+    editor = MyLangTextEditor(root)
+    root.mainloop()
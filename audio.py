@@ -0,0 +1,281 @@
+import os
+import time
+import queue
+import threading
+from collections import OrderedDict, deque
+
+# Decoded sounds kept for replay, by their size in memory
+SOUND_CACHE_BYTES = 256 << 20
+
+# How often the worker checks whether the current track has ended
+POLL_SECONDS = 0.1
+
+
+class SoundCache:
+    """Decoded Sounds by path, least recently used dropped first.
+
+    An entry is reused while the file's mtime and size are unchanged. A
+    sound larger than max_bytes on its own is played but not kept.
+    """
+
+    def __init__(self, max_bytes=SOUND_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.sounds = OrderedDict()  # path -> (stamp, sound, size), oldest first
+        self.size = 0
+
+    def get(self, path, load):
+        """The Sound for path, decoded with load(path) -> (sound, size) on a miss."""
+        info = os.stat(path)
+        stamp = (info.st_mtime_ns, info.st_size)
+        entry = self.sounds.get(path)
+        if entry is not None:
+            if entry[0] == stamp:
+                self.sounds.move_to_end(path)
+                return entry[1]
+            self.discard(path)
+        sound, size = load(path)
+        if size <= self.max_bytes:
+            self.sounds[path] = (stamp, sound, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                self.discard(next(iter(self.sounds)))
+        return sound
+
+    def __contains__(self, path):
+        return path in self.sounds
+
+    def discard(self, path):
+        entry = self.sounds.pop(path, None)
+        if entry is not None:
+            self.size -= entry[2]
+
+
+class AudioPlayer:
+    """Plays music on a worker thread, so the console never waits for audio.
+
+    The console's calls only queue a command and return. The worker imports
+    pygame, decodes files into Sounds (cached, so replaying is instant),
+    starts the next playlist entry when a track ends, and decodes that entry
+    ahead of time while the current one plays. Errors are collected for the
+    console to show at its next prompt. With SDL_AUDIODRIVER=dummy it runs
+    without a sound card.
+    """
+
+    def __init__(self, cache_bytes=SOUND_CACHE_BYTES):
+        self.commands = queue.Queue()
+        self.playlist = deque()
+        self.cache = SoundCache(cache_bytes)
+        self.lock = threading.Lock()
+        self.thread = None
+        self.pygame = None
+        self.channel = None
+        self.current = None  # Path of the track playing or paused
+        self.starting = 0  # play commands the worker has not carried out yet
+        self.length = 0.0
+        self.started = 0.0  # time.monotonic() at which the track would have started, pauses excluded
+        self.paused_at = None
+        self.volume = 1.0
+        self.errors = []
+        self.handlers = {
+            "play": self.begin_track,
+            "next": self.next_track,
+            "advance": self.advance,
+            "pause": self.pause_track,
+            "resume": self.resume_track,
+            "stop": self.stop_track,
+            "volume": self.apply_volume,
+        }
+
+    # Called from the console thread; none of these wait for the worker
+
+    def play(self, path):
+        with self.lock:
+            self.starting += 1
+        self.send("play", path)
+
+    def enqueue(self, path):
+        with self.lock:
+            self.playlist.append(path)
+        self.send("advance")
+
+    def next(self):
+        self.send("next")
+
+    def pause(self):
+        self.send("pause")
+
+    def resume(self):
+        self.send("resume")
+
+    def stop(self):
+        with self.lock:
+            self.playlist.clear()
+        self.send("stop")
+
+    def set_volume(self, volume):
+        with self.lock:
+            self.volume = min(max(volume, 0.0), 1.0)
+        self.send("volume")
+
+    def status(self):
+        """(current path or None, paused, elapsed seconds, length, volume, queued paths)."""
+        with self.lock:
+            if self.current is None:
+                elapsed = 0.0
+            else:
+                elapsed = (self.paused_at or time.monotonic()) - self.started
+            return (self.current, self.paused_at is not None, min(elapsed, self.length), self.length,
+                    self.volume, list(self.playlist))
+
+    def active(self):
+        """True while a track plays or is paused, or one was asked for and is still being decoded."""
+        with self.lock:
+            return self.current is not None or self.starting > 0 or bool(self.playlist)
+
+    def take_errors(self):
+        with self.lock:
+            errors, self.errors = self.errors, []
+        return errors
+
+    def send(self, action, *args):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.work, name="audio", daemon=True)
+            self.thread.start()
+        self.commands.put((action, args))
+
+    def close(self):
+        if self.thread is not None:
+            self.commands.put(("quit", ()))
+            self.thread.join(1.0)
+
+    # Worker thread
+
+    def work(self):
+        try:
+            import pygame
+            pygame.mixer.init()
+            self.pygame = pygame
+        except Exception as e:
+            self.report(f"Error: {e}")
+        while True:
+            wait = POLL_SECONDS if self.current is not None and self.paused_at is None else None
+            try:
+                action, args = self.commands.get(timeout=wait)
+            except queue.Empty:
+                action, args = None, ()
+            if action == "quit":
+                break
+            if self.pygame is None:
+                if action == "play":
+                    self.finish_request()
+                continue
+            try:
+                if action is not None:
+                    self.handlers[action](*args)
+                if self.current is not None and self.paused_at is None and not self.channel.get_busy():
+                    self.next_track()
+                if self.commands.empty():
+                    self.preload()
+            except Exception as e:
+                self.report(f"Error: {e}")
+        if self.pygame is not None:
+            self.pygame.mixer.quit()
+
+    def report(self, message):
+        with self.lock:
+            self.errors.append(message)
+
+    def load(self, path):
+        sound = self.pygame.mixer.Sound(path)
+        frequency, size, channels = self.pygame.mixer.get_init()
+        return sound, int(sound.get_length() * frequency * channels * abs(size) // 8)
+
+    def begin_track(self, path):
+        try:
+            self.start_track(path)
+        finally:
+            self.finish_request()
+
+    def finish_request(self):
+        with self.lock:
+            self.starting -= 1
+
+    def start_track(self, path):
+        if self.channel is not None:
+            self.channel.stop()
+        try:
+            sound = self.cache.get(path, self.load)
+        except (OSError, self.pygame.error) as e:
+            self.report(f"Error: {path}: {e}")
+            with self.lock:
+                self.channel = None
+                self.current = None
+                self.paused_at = None
+            return
+        # Forced, so a channel is taken over rather than None returned when all are busy
+        channel = self.pygame.mixer.find_channel(True)
+        if channel is None:
+            self.report(f"Error: {path}: no audio channel is available.")
+            self.stop_track()
+            return
+        channel.play(sound)
+        channel.set_volume(self.volume)
+        with self.lock:
+            self.channel = channel
+            self.current = path
+            self.length = sound.get_length()
+            self.started = time.monotonic()
+            self.paused_at = None
+
+    def next_track(self):
+        # Entries that fail to decode are reported and skipped
+        while True:
+            with self.lock:
+                path = self.playlist.popleft() if self.playlist else None
+            if path is None:
+                self.stop_track()
+                return
+            self.start_track(path)
+            if self.current is not None:
+                return
+
+    def advance(self):
+        # Start the playlist when nothing is playing
+        if self.current is None:
+            self.next_track()
+
+    def pause_track(self):
+        if self.current is not None and self.paused_at is None:
+            self.channel.pause()
+            with self.lock:
+                self.paused_at = time.monotonic()
+
+    def resume_track(self):
+        if self.paused_at is not None:
+            self.channel.unpause()
+            with self.lock:
+                self.started += time.monotonic() - self.paused_at
+                self.paused_at = None
+
+    def stop_track(self):
+        if self.channel is not None:
+            self.channel.stop()
+        with self.lock:
+            self.channel = None
+            self.current = None
+            self.paused_at = None
+
+    def apply_volume(self):
+        if self.channel is not None:
+            self.channel.set_volume(self.volume)
+
+    def preload(self):
+        # Decode the next playlist entry while the current one plays
+        with self.lock:
+            path = self.playlist[0] if self.playlist else None
+        if path is None or path in self.cache:
+            return
+        try:
+            self.cache.get(path, self.load)
+        except (OSError, self.pygame.error):
+            pass  # Reported when its turn comes
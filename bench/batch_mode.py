@@ -0,0 +1,95 @@
+"""Batch mode against driving the interactive console with pexpect.
+
+    python bench/batch_mode.py [--commands 50000] [--repl-sample 2000]
+
+Writes a command file of echo and new lines and times python console.py
+--script on it with output to a pty and to /dev/null, and the REPL fed
+the same file through a pipe. The pexpect-driven REPL, one command per
+prompt, is timed on the first --repl-sample commands and extrapolated;
+it needs pexpect (pip install pexpect) and is skipped without it.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+import importlib.util
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONSOLE = os.path.join(ROOT, "console.py")
+
+
+def write_commands(path, count):
+    with open(path, 'w') as file:
+        for i in range(count):
+            file.write(f"echo line {i}\n" if i % 2 else f"new v{i} {i}\n")
+
+
+def console_args(*args):
+    return [sys.executable, CONSOLE, "--error-log", "", *args]
+
+
+def run_to_devnull(args, stdin=None):
+    start = time.perf_counter()
+    subprocess.run(args, stdin=stdin, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+    return time.perf_counter() - start
+
+
+def run_on_pty(args):
+    import pexpect
+    start = time.perf_counter()
+    child = pexpect.spawn(args[0], args[1:], encoding="utf-8", timeout=None)
+    child.expect(pexpect.EOF)
+    return time.perf_counter() - start
+
+
+def repl_on_pty(path, sample, cwd):
+    """Seconds for the first `sample` commands of path typed at the prompt."""
+    import pexpect
+    with open(path) as file:
+        commands = [next(file).rstrip("\n") for _ in range(sample)]
+    prompt = f"{cwd}> "
+    args = console_args()
+    child = pexpect.spawn(args[0], args[1:], cwd=cwd, encoding="utf-8", timeout=30)
+    child.delaybeforesend = None  # pexpect sleeps 50 ms before each send by default
+    child.expect_exact(prompt)
+    start = time.perf_counter()
+    for command in commands:
+        child.sendline(command)
+        child.expect_exact(prompt)
+    seconds = time.perf_counter() - start
+    child.sendline("exit")
+    child.expect(pexpect.EOF)
+    return seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--commands", type=int, default=50_000)
+    parser.add_argument("--repl-sample", type=int, default=2000, help="commands typed through pexpect")
+    args = parser.parse_args(argv)
+    have_pexpect = importlib.util.find_spec("pexpect") is not None
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "commands.txt")
+        write_commands(path, args.commands)
+        rows = [("--script, output to /dev/null", run_to_devnull(console_args("--script", path)))]
+        with open(path) as stdin:
+            rows.append(("REPL fed by a pipe, /dev/null", run_to_devnull(console_args(), stdin)))
+        if have_pexpect:
+            rows.append(("--script, output to a pty", run_on_pty(console_args("--script", path))))
+            sample = min(args.repl_sample, args.commands)
+            seconds = repl_on_pty(path, sample, directory)
+            rows.append((f"REPL via pexpect (x{args.commands / sample:.0f} of {sample})",
+                         seconds * args.commands / sample))
+
+    print(f"{args.commands:,} commands")
+    for label, seconds in rows:
+        print(f"  {label:<40}{seconds:9.2f} s{seconds / args.commands * 1e6:9.0f} us per command")
+    if not have_pexpect:
+        print("  pexpect is not installed; the pty timings were skipped")
+
+
+if __name__ == "__main__":
+    main()
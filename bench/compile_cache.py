@@ -0,0 +1,92 @@
+"""Cold and warm loading of a large .cla script through the .clac cache.
+
+    python bench/compile_cache.py [--lines 100000]
+
+Times load_script() with no cache (compile and write the .clac), with a
+valid cache, and after a touch that changed the mtime but not the
+source (hash check and re-stamp), then a full run_file() of each kind.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lang import MyLangInterpreter, cache_path, load_script  # noqa: E402
+from sinks import BufferedSink  # noqa: E402
+
+
+def write_script(path, lines):
+    with open(path, 'w') as file:
+        for i in range(lines // 2):
+            file.write(f"new v{i} {i}\n")
+            file.write(f"p line {i}: $v{i}\n")
+
+
+def best(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def touch(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def uncache(path):
+    try:
+        os.remove(cache_path(path))
+    except FileNotFoundError:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "big.cla")
+        write_script(path, args.lines)
+        devnull = open(os.devnull, 'w')
+
+        def cold():
+            uncache(path)
+            load_script(path)
+
+        def rehash():
+            touch(path)
+            load_script(path)
+
+        def run(prepare):
+            def function():
+                prepare()
+                interpreter = MyLangInterpreter(output=BufferedSink(devnull), trace=False)
+                interpreter.run_file(path)
+                interpreter.output.flush()
+            return function
+
+        load_script(path)
+        rows = [
+            ("load, cold (compile + write .clac)", best(cold, args.repeat)),
+            ("load, warm (.clac hit)", best(lambda: load_script(path), args.repeat)),
+            ("load, touched (hash check)", best(rehash, args.repeat)),
+            ("run_file, cold", best(run(lambda: uncache(path)), args.repeat)),
+            ("run_file, warm", best(run(lambda: None), args.repeat)),
+        ]
+        devnull.close()
+
+    print(f"{args.lines:,}-line script, best of {args.repeat}")
+    for label, seconds in rows:
+        print(f"  {label:<36}{seconds:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
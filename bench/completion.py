@@ -0,0 +1,88 @@
+"""Tab completion in a large directory: CompletionIndex against listdir + filter.
+
+    python bench/completion.py [--files 100000 --dirs 50] [--repeat 200]
+
+Builds big/ with --files files and --dirs subdirectories in a temporary
+directory and times the console's completer on path prefixes matching
+few, none and all of its entries, against listing the directory and
+filtering it on every Tab as a plain filename completer does. The first
+Tab, which builds the index, is timed separately, as are builtins and
+$variables. The tree's mtimes are set in the past so listings are kept.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from completion import Completer  # noqa: E402
+from console import WindowsLikeConsole  # noqa: E402
+
+
+def build_directory(path, files, dirs):
+    os.makedirs(path)
+    for i in range(files):
+        open(os.path.join(path, f"file_{i:06d}"), 'w').close()
+    for i in range(dirs):
+        os.mkdir(os.path.join(path, f"dir_{i:02d}"))
+    past = time.time() - 60
+    for name in os.listdir(path):
+        os.utime(os.path.join(path, name), (past, past))
+    os.utime(path, (past, past))
+
+
+def listdir_filter(text):
+    directory, prefix = os.path.split(text)
+    return [os.path.join(directory, name) for name in os.listdir(directory or os.curdir)
+            if name.startswith(prefix)]
+
+
+def best(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--dirs", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            build_directory("big", args.files, args.dirs)
+            console = WindowsLikeConsole(trace=False)
+            console.process_command("new total 1")
+            completer = Completer(console)
+            start = time.perf_counter()
+            completer.matches("dir ", "big/")
+            first = time.perf_counter() - start
+            print(f"{args.files + args.dirs:,} entries, best of {args.repeat}")
+            print(f"  {'first Tab, builds the index':<40}{first * 1e3:10.2f} ms")
+
+            # The last 100 files share their first four digits
+            for text in (f"big/file_{(args.files - 1) // 100:04d}", "big/dir_", "big/zzz", "big/file_"):
+                count = len(completer.matches("dir ", text))
+                indexed = best(lambda: completer.matches("dir ", text), args.repeat)
+                listed = best(lambda: listdir_filter(text), max(1, args.repeat // 20))
+                label = f"{text!r} ({count:,} matches)"
+                print(f"  {label:<40}{indexed * 1e3:10.3f} ms  vs{listed * 1e3:10.2f} ms")
+            for label, before, text in (("builtins", "", "d"), ("$variables", "p ", "$to")):
+                seconds = best(lambda: completer.matches(before, text), args.repeat)
+                print(f"  {label:<40}{seconds * 1e3:10.3f} ms")
+            console.close()
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
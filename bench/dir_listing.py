@@ -0,0 +1,87 @@
+"""dir on a synthetic tree: cold and warm stat cache, sorting and patterns.
+
+    python bench/dir_listing.py [--dirs 1000 --files 1000] [--tree PATH]
+
+Builds dirs x files empty files (1M by default) in a temporary
+directory, or in PATH, where an existing tree is reused, and times the
+console's dir against a bare os.listdir + print of every name. Output
+goes to /dev/null.
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from console import WindowsLikeConsole  # noqa: E402
+from dircache import RACY_WINDOW_NS  # noqa: E402
+
+
+def build_tree(root, dirs, files):
+    if os.path.isdir(os.path.join(root, f"d{dirs - 1:05d}")):
+        return  # Built by an earlier run
+    for d in range(dirs):
+        directory = os.path.join(root, f"d{d:05d}")
+        os.makedirs(directory, exist_ok=True)
+        for f in range(files):
+            with open(os.path.join(directory, f"f{f:06d}.txt"), 'wb') as file:
+                file.write(b"x" * (f % 97))
+
+
+def timed(function):
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        start = time.perf_counter()
+        function()
+        return time.perf_counter() - start
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+
+def listdir_print(root):
+    for directory in os.listdir(root):
+        for name in os.listdir(os.path.join(root, directory)):
+            print(name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--dirs", type=int, default=1000)
+    parser.add_argument("--files", type=int, default=1000, help="files per directory")
+    parser.add_argument("--tree", metavar="PATH", help="build the tree here and keep it")
+    args = parser.parse_args(argv)
+
+    root = args.tree or tempfile.mkdtemp(prefix="dir-bench-")
+    os.makedirs(root, exist_ok=True)
+    start = time.perf_counter()
+    build_tree(root, args.dirs, args.files)
+    print(f"{args.dirs * args.files:,} entries in {root} (ready in {time.perf_counter() - start:.1f} s)")
+    # Directories written less than RACY_WINDOW_NS ago are not cached
+    time.sleep(RACY_WINDOW_NS / 1e9 + 0.1)
+
+    cwd = os.getcwd()
+    os.chdir(root)
+    try:
+        console = WindowsLikeConsole()
+        rows = [
+            ("os.listdir + print, names only", timed(lambda: listdir_print(root))),
+            ("dir /s, cold cache", timed(lambda: console.process_command("dir /s"))),
+            ("dir /s, warm cache", timed(lambda: console.process_command("dir /s"))),
+            ("dir /s /o:-s, warm", timed(lambda: console.process_command("dir /s /o:-s"))),
+            ("dir *7.txt /s, warm", timed(lambda: console.process_command("dir *7.txt /s"))),
+        ]
+    finally:
+        os.chdir(cwd)
+        if args.tree is None:
+            shutil.rmtree(root)
+    for label, seconds in rows:
+        print(f"  {label:<34}{seconds:8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Editor keystroke latency against file size.
+
+    python bench/editor_keystroke.py [--lines 1000,20000,100000] [--keys 200]
+
+For each size, times tokenizing the whole buffer, as every keystroke used
+to, against the dirty-lines pass the editor now makes (the edited line
+and one line of context each side). With a Tk display it also opens the
+editor on the same text and times a typed character end to end
+(insert, highlight pass, idle redraws including the line-number gutter)
+and a one-line scroll; without a display that part is skipped.
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cla_syntax import tokenize_line  # noqa: E402
+
+SAMPLE = [
+    "# count down and report",
+    "new n 10",
+    "new name 'world'",
+    "while n > 0",
+    "    p hello $name, $n left",
+    "    add n -1",
+    "end",
+    "if n == 0",
+    "    p done",
+    "end",
+]
+
+
+def make_lines(count):
+    return [SAMPLE[i % len(SAMPLE)] + (f" # {i}" if i % 7 == 0 else "") for i in range(count)]
+
+
+def per_call(function, count):
+    start = time.perf_counter()
+    for i in range(count):
+        function(i)
+    return (time.perf_counter() - start) / count
+
+
+def lexing(lines, keys):
+    middle = len(lines) // 2
+
+    def full_pass(i):
+        for line in lines:
+            tokenize_line(line)
+
+    def dirty_pass(i):
+        # A different edit each time, so nothing comes from a token cache
+        for line in lines[middle - 1:middle + 2]:
+            tokenize_line(line + "x" * i)
+
+    return per_call(full_pass, max(1, keys // 20)), per_call(dirty_pass, keys)
+
+
+def open_editor():
+    """The editor in a new Tk window, or None without a display."""
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return None
+    from Text_Editor import MyLangTextEditor
+    return MyLangTextEditor(root)
+
+
+def typing(editor, lines, keys):
+    root, text = editor.master, editor.text_area
+    editor.reset_buffer()
+    text.insert("1.0", "\n".join(lines))
+    editor.highlight_syntax()
+    middle = len(lines) // 2
+    text.mark_set("insert", f"{middle}.end")
+    text.see("insert")
+    root.update()
+
+    def keystroke(i):
+        text.insert("insert", "x")
+        editor.schedule_highlight()
+        editor.flush_highlight()
+        root.update_idletasks()
+
+    def scroll(i):
+        text.yview_scroll(1 if i % 2 == 0 else -1, "units")
+        root.update_idletasks()
+
+    return per_call(keystroke, keys), per_call(scroll, keys)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--lines", default="1000,20000,100000", help="comma-separated file sizes in lines")
+    parser.add_argument("--keys", type=int, default=200, help="keystrokes timed per size")
+    args = parser.parse_args(argv)
+    sizes = [int(count) for count in args.lines.split(",")]
+
+    editor = open_editor()
+    try:
+        for size in sizes:
+            lines = make_lines(size)
+            full, dirty = lexing(lines, args.keys)
+            print(f"{size:,} lines")
+            print(f"  {'tokenize every line':<32}{full * 1e3:10.2f} ms")
+            print(f"  {'tokenize the dirty lines':<32}{dirty * 1e3:10.3f} ms")
+            if editor is not None:
+                keystroke, scroll = typing(editor, lines, args.keys)
+                print(f"  {'typed character in Tk':<32}{keystroke * 1e3:10.2f} ms")
+                print(f"  {'scroll one line in Tk':<32}{scroll * 1e3:10.2f} ms")
+    finally:
+        if editor is not None:
+            editor.master.destroy()
+    if editor is None:
+        print("No Tk display; the editor timings were skipped")
+
+
+if __name__ == "__main__":
+    main()
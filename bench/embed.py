@@ -0,0 +1,94 @@
+"""Embedding: cla_api.execute() against running python lang.py per call.
+
+    python bench/embed.py [--runs 20000] [--threads 8] [--subprocess-runs 20]
+
+The script reads one input, loops 20 times over a variable the caller
+injects and prints the result. Times execute() in a loop, --threads
+threads sharing one Engine (checking every result), and a python lang.py
+subprocess per run, which gets the variable as a first line instead and
+the input on stdin.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from cla_api import Engine  # noqa: E402
+
+SOURCE = """i name
+new n 20
+while n > 0
+add total 3
+add n -1
+end
+p $name $total
+"""
+
+EXPECTED = "61"
+
+
+def in_process(engine, runs):
+    start = time.perf_counter()
+    for i in range(runs):
+        engine.execute(SOURCE, inputs=[f"user{i}"], variables={"total": 1})
+    return time.perf_counter() - start
+
+
+def threaded(engine, runs, threads):
+    correct = []
+
+    def work(first):
+        count = 0
+        for i in range(first, first + runs // threads):
+            result = engine.execute(SOURCE, inputs=[f"user{i}"], variables={"total": 1})
+            count += result.ok and result.output.endswith(f"user{i} {EXPECTED}\n")
+        correct.append(count)
+
+    workers = [threading.Thread(target=work, args=(n * runs,)) for n in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start, sum(correct), runs // threads * threads
+
+
+def subprocesses(runs):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "embed.cla")
+        with open(path, 'w') as file:
+            file.write("new total 1\n" + SOURCE)
+        command = [sys.executable, os.path.join(ROOT, "lang.py"), "--quiet", path]
+        start = time.perf_counter()
+        for i in range(runs):
+            subprocess.run(command, input=f"user{i}\n", capture_output=True, text=True, check=True)
+        return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--runs", type=int, default=20_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--subprocess-runs", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    engine = Engine()
+    engine.execute(SOURCE, inputs=["warm up"], variables={"total": 1})
+    rows = [("in-process execute()", in_process(engine, args.runs), args.runs)]
+    seconds, correct, threaded_runs = threaded(engine, args.runs, args.threads)
+    rows.append((f"{args.threads} threads sharing an Engine", seconds, threaded_runs))
+    rows.append(("subprocess python lang.py", subprocesses(args.subprocess_runs), args.subprocess_runs))
+
+    for label, seconds, runs in rows:
+        print(f"  {label:<32}{seconds / runs * 1e6:10.0f} us per run{runs / seconds:10.0f} runs/s")
+    print(f"  threaded results correct: {correct}/{threaded_runs}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""External commands: a new shell per call against the --shell-workers pool.
+
+    python bench/external_commands.py [--commands 10000] [--workers 1]
+
+Runs `true` --commands times through the console's run_external_command,
+with its output going to /dev/null, once forking /bin/sh for every call
+and once through a pool of --workers long-lived shells.
+"""
+import os
+import sys
+import time
+import argparse
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from console import WindowsLikeConsole  # noqa: E402
+
+
+def run(console, command, count):
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        for _ in range(count):
+            console.run_external_command(command)
+        return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--commands", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=1, help="shells in the pool")
+    parser.add_argument("--command", default="true")
+    args = parser.parse_args(argv)
+    if os.name == 'nt':
+        parser.error("--shell-workers needs a POSIX shell")
+
+    print(f"{args.commands:,} x {args.command}")
+    for label, workers in (("fork per call", 0), (f"--shell-workers {args.workers}", args.workers)):
+        console = WindowsLikeConsole(shell_workers=workers, trace=False)
+        try:
+            run(console, args.command, 1)  # Starts the pool's shells
+            seconds = run(console, args.command, args.commands)
+        finally:
+            console.close()
+        print(f"  {label:<24}{seconds:8.2f} s{seconds / args.commands * 1e6:8.0f} us per command")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Module imports: a main script importing many modules that share libraries.
+
+    python bench/imports.py [--modules 200] [--repeat 2]
+
+main.cla imports --modules modules. Each of them imports common.cla and
+util.cla, and util.cla imports common.cla too, so most imports reach a
+module that has already run. Times a fresh interpreter running main.cla
+with no .clac files (cold), with them (warm), and python lang.py as a
+subprocess, and counts the imports that actually ran.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lang import MyLangInterpreter, cache_path  # noqa: E402
+from sinks import BufferedSink, CaptureSink  # noqa: E402
+
+
+def write_modules(directory, count):
+    def write(name, source):
+        with open(os.path.join(directory, name), 'w') as file:
+            file.write(source)
+
+    write("common.cla", "new common_loaded 1\n")
+    write("util.cla", "import common.cla\nnew util_loaded 1\n")
+    for i in range(count):
+        write(f"mod{i:03d}.cla", f"import common.cla\nimport util.cla\nnew m{i} {i}\np module {i} ready\n")
+    write("main.cla", "".join(f"import mod{i:03d}.cla\n" for i in range(count)) + "p done\n")
+    return os.path.join(directory, "main.cla")
+
+
+def uncache(directory):
+    for name in os.listdir(directory):
+        if name.endswith(".cla") and os.path.exists(cache_path(os.path.join(directory, name))):
+            os.remove(cache_path(os.path.join(directory, name)))
+
+
+def best(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--modules", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_modules(directory, args.modules)
+        devnull = open(os.devnull, 'w')
+
+        def run(prepare):
+            def function():
+                prepare()
+                interpreter = MyLangInterpreter(output=BufferedSink(devnull), trace=False)
+                interpreter.run_file(path)
+                interpreter.output.flush()
+            return function
+
+        def subprocess_run():
+            subprocess.run([sys.executable, os.path.join(ROOT, "lang.py"), "--quiet", path],
+                           stdout=subprocess.DEVNULL, check=True)
+
+        capture = CaptureSink()
+        MyLangInterpreter(output=capture, trace=False).run_file(path)
+        executed = capture.getvalue().count("Importing from")
+        rows = [
+            ("cold (no .clac)", best(run(lambda: uncache(directory)), args.repeat)),
+            ("warm", best(run(lambda: None), args.repeat)),
+            ("python lang.py", best(subprocess_run, args.repeat)),
+        ]
+        devnull.close()
+
+    print(f"main.cla importing {args.modules} modules: {executed} imports executed, best of {args.repeat}")
+    for label, seconds in rows:
+        print(f"  {label:<20}{seconds * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Microbenchmarks of .cla control flow: while loops and if/else blocks.
+
+    python bench/loops.py [--iterations 1000000] [--repo DIR]
+
+Each case is a generated .cla script run with run_file() on a fresh
+interpreter, output discarded, after a first run has written its .clac,
+so only execution is timed. --repo runs the same cases on another
+checkout's lang.py, e.g. a git worktree of an older commit, to compare.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def cases(n):
+    """(name, source lines, loop iterations) per benchmark."""
+    return [
+        ("counter loop", [f"new n {n}", "while n > 0", "add n -1", "end"], n),
+        ("nested if/else", [f"new n {n}", "new m 0", "while n > 0", "if m < 5", "add m 1", "else", "new m 0",
+                            "end", "add n -1", "end"], n),
+        ("string compare", [f"new n {n}", "new mode fast", "while n > 0", "if mode == fast", "add n -1", "end",
+                            "end"], n),
+    ]
+
+
+def run_cases(description, cases, argv=None):
+    """Parse the common options, then time each of cases(iterations)."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--iterations", type=int, default=1_000_000,
+                        help="iterations of the loop cases (default: 1000000)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--repo", default=ROOT, help="tree whose lang.py is measured (default: this one)")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, os.path.abspath(args.repo))
+    from lang import MyLangInterpreter
+    from sinks import BufferedSink
+
+    devnull = open(os.devnull, 'w')
+    print(f"{os.path.abspath(args.repo)}, best of {args.repeat}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, lines, iterations in cases(args.iterations):
+            path = os.path.join(directory, name.replace(" ", "_").replace("/", "_") + ".cla")
+            with open(path, 'w') as file:
+                file.write("\n".join(lines) + "\n")
+            times = []
+            for _ in range(args.repeat + 1):
+                interpreter = MyLangInterpreter(output=BufferedSink(devnull), trace=False)
+                start = time.perf_counter()
+                interpreter.run_file(path)
+                interpreter.output.flush()
+                times.append(time.perf_counter() - start)
+                if interpreter.errors:
+                    print(f"  {name}: the script reported errors")
+                    break
+            seconds = min(times[1:] or times)  # The first run compiles and writes the .clac
+            print(f"  {name:<20}{seconds:8.3f} s{seconds / iterations * 1e9:10.0f} ns per iteration")
+    devnull.close()
+
+
+def main(argv=None):
+    run_cases(__doc__.split("\n")[0], cases, argv)
+
+
+if __name__ == "__main__":
+    main()
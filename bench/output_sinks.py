@@ -0,0 +1,90 @@
+"""Interpreter output: a script printing many lines, to a file, /dev/null and a pty.
+
+    python bench/output_sinks.py [--lines 1000000] [--repeat 2]
+
+Runs python lang.py --quiet on a script whose loop prints --lines lines
+and times it with stdout on a regular file, on /dev/null and on a
+pseudo-terminal, which is drained as fast as it fills the way a terminal
+emulator would.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = """new n {lines}
+while n > 0
+p line $n of the benchmark output
+add n -1
+end
+"""
+
+
+def run(args, stdout):
+    start = time.perf_counter()
+    subprocess.run(args, stdout=stdout, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def run_on_pty(args):
+    import pty
+    master, slave = pty.openpty()
+
+    def drain():
+        try:
+            while os.read(master, 1 << 16):
+                pass
+        except OSError:
+            pass  # EIO once the last writer has closed the slave end
+
+    reader = threading.Thread(target=drain, daemon=True)
+    reader.start()
+    try:
+        return run(args, slave)
+    finally:
+        os.close(slave)
+        reader.join()
+        os.close(master)
+
+
+def best(function, repeat):
+    return min(function() for _ in range(repeat))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        script = os.path.join(directory, "print.cla")
+        with open(script, 'w') as file:
+            file.write(SCRIPT.format(lines=args.lines))
+        command = [sys.executable, os.path.join(ROOT, "lang.py"), "--quiet", script]
+        output = os.path.join(directory, "output.txt")
+
+        def to_file():
+            with open(output, 'w') as file:
+                return run(command, file)
+
+        def to_devnull():
+            return run(command, subprocess.DEVNULL)
+
+        rows = [("file", best(to_file, args.repeat)), ("/dev/null", best(to_devnull, args.repeat))]
+        if os.name != 'nt':
+            rows.append(("terminal (pty)", best(lambda: run_on_pty(command), args.repeat)))
+        size = os.path.getsize(output)
+
+    print(f"{args.lines:,} lines, {size / 1e6:.1f} MB")
+    for label, seconds in rows:
+        print(f"  {label:<20}{seconds:8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Pipes and redirection: moving a large stream through python console.py -c.
+
+    python bench/pipelines.py [--size 1024] [--lines-of 1000]
+
+Writes a --size MB file and a .cla script printing the same amount in
+lines of --lines-of characters, then times console.py --quiet -c on a
+plain cat, cat into wc -c, the script into wc -c, into a file and
+straight to the console, with the console's stdout on /dev/null.
+Reports throughput and the console process's peak RSS for each.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONSOLE = os.path.join(ROOT, "console.py")
+
+
+def write_data(path, size):
+    block = (b"x" * 1023 + b"\n") * 1024
+    with open(path, 'wb') as file:
+        for _ in range(size // len(block)):
+            file.write(block)
+
+
+def write_generator(path, lines, width):
+    text = "y" * (width - 8)
+    with open(path, 'w') as file:
+        file.write(f"new n {lines}\nwhile n > 0\np {text} $n\nadd n -1\nend\n")
+
+
+def run(command, cwd):
+    """(seconds, peak RSS in MB) of one console.py -c run."""
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, CONSOLE, "--quiet", "--error-log", "", "-c", command],
+                               cwd=cwd, stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(process.pid, 0)
+    seconds = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode:
+        raise RuntimeError(f"{command} exited with status {process.returncode}")
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    return seconds, usage.ru_maxrss / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--size", type=int, default=1024, help="MB to move")
+    parser.add_argument("--lines-of", type=int, default=1000, help="characters per line the script prints")
+    parser.add_argument("--base", help="directory to write the data in")
+    args = parser.parse_args(argv)
+    if os.name == 'nt':
+        parser.error("the cases use cat and wc")
+    size = args.size << 20
+
+    with tempfile.TemporaryDirectory(prefix="pipe-bench-", dir=args.base) as directory:
+        write_data(os.path.join(directory, "data.txt"), size)
+        write_generator(os.path.join(directory, "gen.cla"), size // args.lines_of, args.lines_of)
+        cases = [
+            "cat data.txt",
+            "cat data.txt | wc -c",
+            "run gen.cla | wc -c",
+            "run gen.cla > out.txt",
+            "run gen.cla",
+        ]
+        print(f"{args.size:,} MB")
+        for command in cases:
+            seconds, rss = run(command, directory)
+            print(f"  {command:<24}{seconds:8.2f} s{size / seconds / 1e6:8.0f} MB/s{rss:8.0f} MB RSS")
+
+
+if __name__ == "__main__":
+    main()
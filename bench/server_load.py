@@ -0,0 +1,123 @@
+"""Server throughput and latency: an asyncio load generator against console.py --serve.
+
+    python bench/server_load.py [--connections 1,16,64] [--requests 2000]
+
+Starts python console.py --serve on a Unix socket in a temporary
+directory holding --files files, then for each connection count opens
+that many connections, waits for their session processes to start, and
+sends each workload over all of them at once, every connection waiting
+for one reply before sending its next request. Reports requests per
+second and the median and 99th percentile latency, then the cost of a
+fresh python console.py -c per request for comparison.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONSOLE = os.path.join(ROOT, "console.py")
+
+# (label, request, share of --requests)
+WORKLOADS = [
+    ("command 'p hello'", {"command": "p hello"}, 1.0),
+    ("20-iteration script", {"script": "new n 0\nwhile n < 20\nadd n 1\nend\np $n"}, 1.0),
+    ("dir", {"command": "dir"}, 0.5),
+    ("external 'true'", {"command": "true"}, 0.1),
+]
+
+
+async def connect(address):
+    """A connection whose session process has started."""
+    reader, writer = await asyncio.open_unix_connection(address)
+    await request(reader, writer, {"command": "p ready"})
+    return reader, writer
+
+
+async def request(reader, writer, data):
+    writer.write((json.dumps(data) + "\n").encode())
+    await writer.drain()
+    reply = json.loads(await reader.readline())
+    if reply["status"] != 0:
+        raise RuntimeError(f"{data} failed: {reply}")
+
+
+async def client(connection, data, count, latencies):
+    for _ in range(count):
+        start = time.perf_counter()
+        await request(*connection, data)
+        latencies.append(time.perf_counter() - start)
+
+
+async def load(address, connections, requests):
+    """(label, requests per second, p50, p99) for each workload."""
+    clients = [await connect(address) for _ in range(connections)]
+    rows = []
+    try:
+        for label, data, share in WORKLOADS:
+            latencies = []
+            count = max(1, int(requests * share) // connections)
+            start = time.perf_counter()
+            await asyncio.gather(*(client(connection, data, count, latencies) for connection in clients))
+            elapsed = time.perf_counter() - start
+            latencies.sort()
+            p50, p99 = (latencies[int(p * (len(latencies) - 1))] for p in (0.5, 0.99))
+            rows.append((label, len(latencies) / elapsed, p50, p99))
+    finally:
+        for reader, writer in clients:
+            writer.close()
+    return rows
+
+
+def start_server(address, cwd):
+    server = subprocess.Popen([sys.executable, CONSOLE, "--error-log", "", "--serve", address],
+                              cwd=cwd, stdout=subprocess.PIPE, text=True)
+    if not server.stdout.readline().startswith("Serving on"):
+        server.kill()
+        raise RuntimeError("the server did not start")
+    return server
+
+
+def baseline(count):
+    start = time.perf_counter()
+    for _ in range(count):
+        subprocess.run([sys.executable, CONSOLE, "--error-log", "", "-c", "p hello"],
+                       stdout=subprocess.DEVNULL, check=True)
+    return (time.perf_counter() - start) / count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--connections", default="1,16,64", help="comma-separated connection counts to try")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per workload and connection count")
+    parser.add_argument("--files", type=int, default=50, help="entries in the directory dir lists")
+    parser.add_argument("--baseline-runs", type=int, default=20)
+    args = parser.parse_args(argv)
+    if os.name == 'nt':
+        parser.error("the load generator uses a Unix socket")
+    connection_counts = [int(count) for count in args.connections.split(",")]
+
+    with tempfile.TemporaryDirectory() as directory:
+        for i in range(args.files):
+            open(os.path.join(directory, f"file{i:04d}.txt"), 'w').close()
+        address = os.path.join(directory, "console.sock")
+        server = start_server(address, directory)
+        try:
+            for connections in connection_counts:
+                print(f"{connections} connection(s)")
+                for label, rate, p50, p99 in asyncio.run(load(address, connections, args.requests)):
+                    print(f"  {label:<24}{rate:8.0f} req/s  p50 {p50 * 1e3:7.2f} ms  p99 {p99 * 1e3:7.2f} ms")
+        finally:
+            server.terminate()
+            server.wait()
+
+    if args.baseline_runs:
+        print(f"python console.py -c 'p hello' per request: {baseline(args.baseline_runs) * 1e3:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
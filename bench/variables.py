@@ -0,0 +1,34 @@
+"""Microbenchmarks of variable-heavy .cla scripts: typed values and slots.
+
+    python bench/variables.py [--iterations 1000000] [--repo DIR]
+
+Runs like bench/loops.py: numeric updates on a float, 20,000 variables
+updated in turn, and a template printing two variables per line.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from loops import run_cases  # noqa: E402
+
+
+def cases(n):
+    """(name, source lines, loop iterations) per benchmark."""
+    variables = 20_000
+    return [
+        ("float accumulator", [f"new n {n}", "new total 0.5", "while n > 0", "add total 0.25", "add n -1",
+                               "end"], n),
+        ("many variables", [f"new v{i} {i}" for i in range(variables)]
+         + [f"add v{i % variables} 1" for i in range(n // 5)], n // 5),
+        ("template print", [f"new n {n // 10}", "new name x", "while n > 0", "p $name is $n", "add n -1",
+                            "end"], n // 10),
+    ]
+
+
+def main(argv=None):
+    run_cases(__doc__.split("\n")[0], cases, argv)
+
+
+if __name__ == "__main__":
+    main()
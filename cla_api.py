@@ -0,0 +1,122 @@
+import threading
+from collections import OrderedDict
+
+from lang import CompileError, MyLangInterpreter, compile_source
+from sinks import CaptureSink
+
+# Distinct sources kept compiled by an Engine
+COMPILED_CACHE_SIZE = 256
+
+# Interpreters an Engine keeps for reuse once their runs finish
+MAX_IDLE_INTERPRETERS = 16
+
+
+class Result:
+    """Outcome of one execute() call.
+
+    output is everything the code printed, variables the values it left
+    assigned, errors the number of errors it reported, and exception the
+    message of an error that stopped it early (e.g. running out of inputs),
+    or None.
+    """
+
+    def __init__(self, output, variables, errors, exception=None):
+        self.output = output
+        self.variables = variables
+        self.errors = errors
+        self.exception = exception
+
+    @property
+    def ok(self):
+        return not self.errors and self.exception is None
+
+    def __repr__(self):
+        return (f"Result(ok={self.ok}, errors={self.errors}, exception={self.exception!r}, "
+                f"variables={self.variables!r}, output={self.output!r})")
+
+
+def line_reader(inputs):
+    """A read_line callable answering `i` from inputs, then failing like input() at EOF."""
+    values = iter(inputs)
+
+    def read_line():
+        try:
+            return str(next(values))
+        except StopIteration:
+            raise EOFError("EOF when reading a line") from None
+    return read_line
+
+
+class Engine:
+    """Runs .cla source in-process without touching stdout or stdin.
+
+    One Engine can be shared by any number of threads: every run gets an
+    interpreter of its own, taken from a pool of reset instances, and
+    compiled code, which is never modified, is shared through a cache.
+    """
+
+    def __init__(self, trace=False):
+        self.trace = trace
+        self.lock = threading.Lock()
+        self.idle = []
+        self.compiled = OrderedDict()  # source -> compiled code, oldest first
+
+    def execute(self, source, inputs=(), variables=None):
+        """Run source and return a Result.
+
+        inputs answers `i` commands in order; variables are assigned before
+        the first line runs.
+        """
+        interpreter = self.take()
+        output = CaptureSink()
+        interpreter.output = output
+        interpreter.read_line = line_reader(inputs)
+        exception = None
+        try:
+            if variables:
+                for name, value in variables.items():
+                    interpreter.set_variable(name, value)
+            interpreter.execute(interpreter.link(self.compile(source)))
+        except CompileError as e:
+            interpreter.error(f"Error: {e}")
+        except Exception as e:
+            exception = str(e)
+            interpreter.error(f"Error: {e}")
+        result = Result(output.getvalue(), interpreter.variables, interpreter.errors, exception)
+        self.release(interpreter)
+        return result
+
+    def compile(self, source):
+        with self.lock:
+            code = self.compiled.get(source)
+            if code is not None:
+                self.compiled.move_to_end(source)
+                return code
+        code = compile_source(source.splitlines())
+        with self.lock:
+            self.compiled[source] = code
+            if len(self.compiled) > COMPILED_CACHE_SIZE:
+                self.compiled.popitem(last=False)
+        return code
+
+    def take(self):
+        with self.lock:
+            if self.idle:
+                return self.idle.pop()
+        return MyLangInterpreter(trace=self.trace)
+
+    def release(self, interpreter):
+        interpreter.reset()
+        interpreter.output = None
+        interpreter.read_line = None
+        with self.lock:
+            if len(self.idle) < MAX_IDLE_INTERPRETERS:
+                self.idle.append(interpreter)
+
+
+default_engine = Engine()
+
+
+def execute(source, inputs=(), variables=None):
+    """Run .cla source on the shared default Engine; see Engine.execute."""
+    return default_engine.execute(source, inputs, variables)
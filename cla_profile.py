@@ -0,0 +1,135 @@
+import json
+import time
+
+from lang import OP_INPUT, OP_JUMP, OP_JUMP_IF_TRUE, CompileError, load_script
+
+# Hot spots listed by report()
+REPORT_LINES = 10
+
+
+class Profiler:
+    """Per-command, per-line and I/O timings for a MyLangInterpreter.
+
+    Installed as interpreter.profiler, it takes over execute() and
+    run_file(); while it is None the interpreter pays one attribute check
+    per script or block, not per instruction.
+    """
+
+    def __init__(self):
+        self.commands = {}  # command -> [count, seconds]
+        self.lines = {}  # (file, line number, source) -> [count, seconds]
+        self.stacks = {}  # tuple of frame labels -> self seconds
+        self.io = {"input": 0.0, "load": 0.0}
+        self.stack = []
+        self.children = []  # Time spent in nested scripts, per active frame
+        self.total = 0.0
+
+    def run_file(self, interpreter, filename, echo=True):
+        start = time.perf_counter()
+        try:
+            numbers = []
+            code = load_script(filename, numbers)
+        except CompileError as e:
+            interpreter.error(f"Error: {filename}: {e}")
+            return
+        finally:
+            self.io["load"] += time.perf_counter() - start
+        self.execute(interpreter, interpreter.link(code), echo, filename, numbers)
+
+    def execute(self, interpreter, code, echo=False, filename="<input>", numbers=None):
+        """MyLangInterpreter.execute with every instruction timed."""
+        sites = []
+        for index, (opcode, operands, source) in enumerate(code):
+            number = numbers[index] if numbers else None
+            command = source.split(" ", 1)[0]
+            label = f"{filename}:{number} {command}" if number else f"{filename} {command}"
+            sites.append((command, label.replace(";", ","), (filename, number, source)))
+
+        dispatch = interpreter.dispatch
+        clock = time.perf_counter
+        stack = self.stack
+        children = self.children
+        pc = 0
+        end = len(code)
+        while pc < end:
+            opcode, operands, source = code[pc]
+            command, label, line = sites[pc]
+            pc += 1
+            if echo:
+                interpreter.output.write(f"Executing: {source}\n")
+            stack.append(label)
+            children.append(0.0)
+            start = clock()
+            try:
+                if opcode < OP_JUMP:
+                    dispatch[opcode](*operands)
+                elif opcode == OP_JUMP:
+                    pc = operands[0]
+                elif interpreter.test_condition(*operands[:3]) == (opcode == OP_JUMP_IF_TRUE):
+                    pc = operands[3]
+            finally:
+                elapsed = clock() - start
+                self.record(command, line, tuple(stack), elapsed, elapsed - children.pop())
+                stack.pop()
+                if children:
+                    children[-1] += elapsed
+                else:
+                    self.total += elapsed
+                if opcode == OP_INPUT:
+                    self.io["input"] += elapsed
+
+    def record(self, command, line, path, elapsed, own):
+        stats = self.commands.get(command)
+        if stats is None:
+            stats = self.commands[command] = [0, 0.0]
+        stats[0] += 1
+        stats[1] += own
+        stats = self.lines.get(line)
+        if stats is None:
+            stats = self.lines[line] = [0, 0.0]
+        stats[0] += 1
+        stats[1] += elapsed
+        self.stacks[path] = self.stacks.get(path, 0.0) + own
+
+    def report(self, write=print):
+        """Write the command table, the hottest lines and the I/O time."""
+        total = self.total or 1e-9
+        write(f"{'command':<12}{'count':>10}{'total ms':>12}{'mean us':>10}{'%':>7}")
+        for command, (count, seconds) in sorted(self.commands.items(), key=lambda item: -item[1][1]):
+            write(f"{command:<12}{count:>10}{seconds * 1000:>12.2f}{seconds * 1e6 / count:>10.2f}"
+                  f"{seconds * 100 / total:>7.1f}")
+        write("")
+        write("Hottest lines (time includes scripts they open):")
+        hot = sorted(self.lines.items(), key=lambda item: -item[1][1])[:REPORT_LINES]
+        for (filename, number, source), (count, seconds) in hot:
+            where = f"{filename}:{number}" if number else filename
+            write(f"  {where:<24}{count:>10}{seconds * 1000:>12.2f} ms  {source}")
+        write("")
+        write(f"Total {self.total * 1000:.2f} ms; waiting for input {self.io['input'] * 1000:.2f} ms, "
+              f"loading scripts {self.io['load'] * 1000:.2f} ms")
+
+    def to_json(self):
+        return {
+            "total_seconds": self.total,
+            "io_seconds": dict(self.io),
+            "commands": {command: {"count": count, "seconds": seconds}
+                         for command, (count, seconds) in self.commands.items()},
+            "lines": [{"file": filename, "line": number, "source": source, "count": count, "seconds": seconds}
+                      for (filename, number, source), (count, seconds) in self.lines.items()],
+        }
+
+    def collapsed(self):
+        """Stacks in the folded format read by flamegraph.pl and speedscope.
+
+        Weights are microseconds of time spent in the frame itself.
+        """
+        return "".join(f"{';'.join(path)} {round(seconds * 1e6)}\n"
+                       for path, seconds in self.stacks.items() if seconds > 0)
+
+    def save(self, path):
+        """Write JSON if path ends in .json, otherwise collapsed stacks."""
+        with open(path, 'w') as file:
+            if path.endswith(".json"):
+                json.dump(self.to_json(), file, indent=2)
+            else:
+                file.write(self.collapsed())
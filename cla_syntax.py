@@ -0,0 +1,225 @@
+import re
+
+# command -> usage message printed when its operand is missing or malformed
+USAGES = {
+    "p": None,
+    "i": "Usage: i <variable_name>",
+    "new": "Usage: new <variable_name> <value>",
+    "open": "Usage: open <filename.cla>",
+    "import": "Usage: import <filename.cla>",
+    "add": "Usage: add <variable_name> <number>",
+}
+
+BLOCK_OPENERS = ("if", "while")
+BLOCK_KEYWORDS = BLOCK_OPENERS + ("else", "end")
+
+# Every word the interpreter accepts as a command
+KEYWORDS = frozenset(USAGES) | frozenset(BLOCK_KEYWORDS)
+
+COMPARISON_SYMBOLS = ("==", "!=", ">", "<", ">=", "<=")
+
+# Commands whose first operand names a variable
+NAMED_OPERAND = ("i", "new", "add", "if", "while")
+
+INT_LITERAL = re.compile(r"[+-]?[0-9]+\Z")
+FLOAT_LITERAL = re.compile(r"[+-]?(?:[0-9]+\.[0-9]*|\.[0-9]+)\Z")
+
+# A template reference is `$` followed by the longest run of name characters
+TEMPLATE_VAR = re.compile(r"\$([A-Za-z0-9_]+)")
+
+STRING = re.compile(r'"[^"]*"')
+
+
+def parse_number(text):
+    """Return text as an int or float if it is an integer or plain decimal, else None.
+
+    Forms float() would accept such as "1e3" or "nan" are not numbers here.
+    """
+    if INT_LITERAL.match(text):
+        return int(text)
+    if FLOAT_LITERAL.match(text):
+        return float(text)
+    return None
+
+
+def parse_literal(text):
+    """Infer a value: numbers written the way Python prints them become numbers.
+
+    Anything else stays a string, so printing the value gives back the text
+    as written: "02134", "+5", "1.50" and "1e3" are all strings.
+
+    >>> parse_literal("42"), parse_literal("-1.5"), parse_literal("02134"), parse_literal("1.50")
+    (42, -1.5, '02134', '1.50')
+    """
+    value = parse_number(text)
+    if value is None or str(value) != text:
+        return text
+    return value
+
+
+def split_command(line):
+    """Split a stripped line into its command word and operand (or None)."""
+    parts = line.split(" ", 1)
+    return parts[0], (parts[1] if len(parts) > 1 else None)
+
+
+def split_condition(line):
+    """Split `if|while <variable> <operator> <value>`.
+
+    Returns ((variable, symbol, value_text), None), or (None, message) if
+    the condition is malformed.
+    """
+    parts = line.split(" ", 3)
+    if len(parts) != 4:
+        return None, f"Usage: {parts[0]} <variable> <operator> <value>"
+    command, var_name, symbol, value = parts
+    if symbol not in COMPARISON_SYMBOLS:
+        return None, f"Unknown operator: {symbol}"
+    return (var_name, symbol, value), None
+
+
+def tokenize_line(line):
+    """Return (tag, start column, end column) for each highlighted part of line.
+
+    Tags are "command", "variable", "string" and "comment".
+    """
+    stripped = line.lstrip()
+    if not stripped:
+        return []
+    start = len(line) - len(stripped)
+    if stripped.startswith("#"):
+        return [("comment", start, len(line))]
+
+    tokens = []
+    command, operand = split_command(stripped)
+    base = start + len(command) + 1  # Column where the operand starts
+    if command in KEYWORDS:
+        tokens.append(("command", start, base - 1))
+    if operand is None:
+        return tokens
+    if command in NAMED_OPERAND:
+        name = operand.split(" ", 1)[0]
+        if name:
+            tokens.append(("variable", base, base + len(name)))
+    for match in STRING.finditer(operand):
+        tokens.append(("string", base + match.start(), base + match.end()))
+    for match in TEMPLATE_VAR.finditer(operand):
+        tokens.append(("variable", base + match.start(), base + match.end()))
+    return tokens
+
+
+def parse_line(line):
+    """Parse one line for analysis, without context from other lines.
+
+    Returns (command, span, defined, used, problems): span is the command
+    word's (start, end) columns, defined the variable the line assigns or
+    None, used a tuple of (name, start, end) for the variables it reads and
+    problems a tuple of (start, end, message). Blank lines and comments
+    have a command of None.
+    """
+    stripped = line.rstrip()
+    text = stripped.lstrip()
+    start = len(stripped) - len(text)
+    if not text or text.startswith("#"):
+        return (None, (start, start), None, (), ())
+
+    command, operand = split_command(text)
+    span = (start, start + len(command))
+    base = span[1] + 1
+    whole = (start, len(stripped))
+    defined = None
+    used = []
+    problems = []
+
+    if command in BLOCK_OPENERS:
+        condition, problem = split_condition(text)
+        if problem:
+            problems.append(whole + (problem,))
+        else:
+            used.append((condition[0], base, base + len(condition[0])))
+    elif command in ("else", "end"):
+        pass
+    elif command not in USAGES:
+        problems.append(span + (f"Unknown command: {command}",))
+    elif command == "p":
+        if operand is not None:
+            for match in TEMPLATE_VAR.finditer(operand):
+                used.append((match.group(1), base + match.start(), base + match.end()))
+    elif not operand:
+        problems.append(whole + (USAGES[command],))
+    elif command in ("open", "import"):
+        if not operand.endswith(".cla"):
+            problems.append(whole + ("Error: File must have a .cla extension.",))
+    elif command == "i":
+        defined = operand
+    else:
+        parts = operand.split(" ", 1)
+        if len(parts) != 2:
+            problems.append(whole + (USAGES[command],))
+        elif command == "new":
+            defined = parts[0]
+        else:
+            if parse_number(parts[1]) is None:
+                amount = base + len(parts[0]) + 1
+                problems.append((amount, amount + len(parts[1]), USAGES[command]))
+            used.append((parts[0], base, base + len(parts[0])))
+    return (command, span, defined, tuple(used), tuple(problems))
+
+
+def analyze(lines, cache=None):
+    """Diagnostics for a whole script as (line number, start, end, message).
+
+    cache maps line text to parse_line() results. It is left holding the
+    lines of this script, so re-analysing it after an edit only re-parses
+    the lines that changed. A variable is undefined if no `new` or `i` assigns it on
+    an earlier line; after an `open` or `import`, which may define anything,
+    no variable is reported.
+    """
+    if cache is None:
+        cache = {}
+    parsed_lines = {}
+    diagnostics = []
+    blocks = []  # (kind, line number, span) of the open if/else/while blocks
+    defined = set()
+    opaque = False
+    for lineno, line in enumerate(lines, 1):
+        parsed = parsed_lines.get(line)
+        if parsed is None:
+            parsed = cache.get(line)
+            if parsed is None:
+                parsed = parse_line(line)
+            parsed_lines[line] = parsed
+        command, span, name, used, problems = parsed
+        if command is None:
+            continue
+        for start, end, message in problems:
+            diagnostics.append((lineno, start, end, message))
+        if not opaque:
+            for var_name, start, end in used:
+                if var_name not in defined:
+                    diagnostics.append((lineno, start, end, f"Error: Variable '{var_name}' is not defined."))
+        if name is not None:
+            defined.add(name)
+
+        if command in ("open", "import"):
+            opaque = True
+        elif command in BLOCK_OPENERS:
+            blocks.append((command, lineno, span))
+        elif command == "else":
+            if blocks and blocks[-1][0] == "if":
+                blocks[-1] = ("else",) + blocks[-1][1:]
+            else:
+                diagnostics.append((lineno,) + span + ("'else' without 'if'",))
+        elif command == "end":
+            if blocks:
+                blocks.pop()
+            else:
+                diagnostics.append((lineno,) + span + ("'end' without 'if' or 'while'",))
+
+    for kind, lineno, span in blocks:
+        kind = "if" if kind == "else" else kind
+        diagnostics.append((lineno,) + span + (f"'{kind}' without 'end'",))
+    cache.clear()
+    cache.update(parsed_lines)
+    diagnostics.sort()
+    return diagnostics
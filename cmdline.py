@@ -0,0 +1,100 @@
+def has_operators(line):
+    """Cheap check for |, < or > anywhere in line, quoted or not."""
+    return "|" in line or "<" in line or ">" in line
+
+
+def split_pipeline(line):
+    """Split a command line into stages on |, and collect < > >> redirections.
+
+    Returns a list of (command, stdin_path, stdout_path, append) tuples, or
+    None if the line uses syntax this parser does not handle (||, 2>, >&,
+    an empty stage or a missing file name); such lines are left to the
+    shell. Operators inside single or double quotes are plain text, and
+    command text is kept as written so builtins see the same words as
+    before.
+
+    >>> split_pipeline('dir /s | find "a|b" > out.txt')
+    [('dir /s', None, None, False), ('find "a|b"', None, 'out.txt', False)]
+    """
+    stages = []
+    command = []
+    stdin_path = stdout_path = None
+    append = False
+    quote = None
+    i = 0
+    n = len(line)
+    while i < n:
+        char = line[i]
+        if quote:
+            if char == quote:
+                quote = None
+            command.append(char)
+            i += 1
+        elif char in "\"'":
+            quote = char
+            command.append(char)
+            i += 1
+        elif char == "|":
+            if line.startswith("||", i):
+                return None
+            text = "".join(command).strip()
+            if not text:
+                return None
+            stages.append((text, stdin_path, stdout_path, append))
+            command = []
+            stdin_path = stdout_path = None
+            append = False
+            i += 1
+        elif char in "<>":
+            # 2>file, 2>&1 and >&2 are shell syntax
+            if char == ">" and command and command[-1].isdigit() and (len(command) == 1 or command[-2].isspace()):
+                return None
+            if char == ">" and line.startswith(">>", i):
+                append = True
+                i += 2
+            else:
+                append = append if char == "<" else False
+                i += 1
+            if line.startswith("&", i):
+                return None
+            path, i = read_word(line, i)
+            if not path:
+                return None
+            if char == "<":
+                stdin_path = path
+            else:
+                stdout_path = path
+        else:
+            command.append(char)
+            i += 1
+    if quote:
+        return None
+    text = "".join(command).strip()
+    if not text:
+        return None
+    stages.append((text, stdin_path, stdout_path, append))
+    return stages
+
+
+def read_word(line, i):
+    """Read a file name starting at i, skipping leading blanks; returns (word, end)."""
+    n = len(line)
+    while i < n and line[i].isspace():
+        i += 1
+    word = []
+    quote = None
+    while i < n:
+        char = line[i]
+        if quote:
+            if char == quote:
+                quote = None
+            else:
+                word.append(char)
+        elif char in "\"'":
+            quote = char
+        elif char.isspace() or char in "|<>":
+            break
+        else:
+            word.append(char)
+        i += 1
+    return "".join(word), i
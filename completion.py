@@ -0,0 +1,133 @@
+import os
+import time
+import bisect
+from collections import OrderedDict
+
+try:
+    import readline
+except ImportError:  # Windows, unless pyreadline is installed
+    readline = None
+
+from cla_syntax import KEYWORDS
+from dircache import RACY_WINDOW_NS
+
+# Directory listings kept for completion
+INDEX_DIRECTORIES = 256
+
+# Commands whose operands are variable names
+VARIABLE_COMMANDS = ("i", "new", "add", "if", "while")
+
+
+class CompletionIndex:
+    """Sorted entry names per directory, so completing a prefix is a binary search.
+
+    Directory names end with a separator. A listing is reused while the
+    directory's mtime is unchanged; mkdir and rmdir drop the directories
+    they change explicitly, since a change within the same mtime tick would
+    go unnoticed. Only names and d_type are read, never a stat per entry.
+    """
+
+    def __init__(self, max_directories=INDEX_DIRECTORIES):
+        self.max_directories = max_directories
+        self.listings = OrderedDict()  # path -> (mtime_ns, sorted names), oldest first
+
+    def names(self, path):
+        path = os.path.abspath(path)
+        mtime_ns = os.stat(path).st_mtime_ns
+        cached = self.listings.get(path)
+        if cached is not None and cached[0] == mtime_ns:
+            self.listings.move_to_end(path)
+            return cached[1]
+
+        names = []
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                names.append(entry.name + os.sep if is_dir else entry.name)
+        names.sort()
+        self.listings.pop(path, None)
+        if time.time_ns() - mtime_ns >= RACY_WINDOW_NS:
+            self.listings[path] = (mtime_ns, names)
+            if len(self.listings) > self.max_directories:
+                self.listings.popitem(last=False)
+        return names
+
+    def complete(self, path, prefix):
+        """Names in directory path starting with prefix; dot files only for a dot prefix."""
+        try:
+            names = self.names(path)
+        except OSError:
+            return []
+        # Every name starting with prefix sorts between these two
+        start = bisect.bisect_left(names, prefix)
+        end = bisect.bisect_left(names, prefix + "\U0010ffff", start)
+        matches = names[start:end]
+        if not prefix:
+            matches = [name for name in matches if not name.startswith(".")]
+        return matches
+
+    def invalidate(self, path=None, tree=False):
+        """Forget path's listing, with tree those of its subdirectories too, or all listings."""
+        if path is None:
+            self.listings.clear()
+            return
+        path = os.path.abspath(path)
+        self.listings.pop(path, None)
+        if tree:
+            below = path.rstrip(os.sep) + os.sep
+            for cached in [cached for cached in self.listings if cached.startswith(below)]:
+                del self.listings[cached]
+
+
+class Completer:
+    """readline completer for the console.
+
+    The first word of a line, or of a pipeline stage, completes to builtins
+    and .cla keywords; $name to the interpreter's variables, as do the
+    operands of i, new, add, if and while; anything else to file paths.
+    """
+
+    def __init__(self, console, index=None):
+        self.console = console
+        self.index = index or CompletionIndex()
+        self.candidates = []
+
+    def __call__(self, text, state):
+        # readline asks for match 0, 1, 2, ... until it gets None
+        if state == 0:
+            line = readline.get_line_buffer()
+            self.candidates = self.matches(line[:readline.get_begidx()], text)
+        return self.candidates[state] if state < len(self.candidates) else None
+
+    def matches(self, before, text):
+        """Completions of text, given the part of the line before it."""
+        stage = before.rsplit("|", 1)[-1]
+        words = stage.split()
+        if text.startswith("$"):
+            return ["$" + name for name in self.variables(text[1:])]
+        if not words:
+            return self.commands(text)
+        if words[0] in VARIABLE_COMMANDS and len(words) == 1:
+            return self.variables(text)
+        return self.paths(text)
+
+    def commands(self, text):
+        lowered = text.lower()
+        names = set(self.console.commands) | KEYWORDS
+        return sorted(name for name in names if name.startswith(lowered))
+
+    def variables(self, prefix):
+        return sorted(name for name in self.console.mylang.variables if name.startswith(prefix))
+
+    def paths(self, text):
+        directory, prefix = os.path.split(text)
+        base = os.path.expanduser(directory) if directory else os.curdir
+        names = self.index.complete(base, prefix)
+        if not directory:
+            return names
+        if not directory.endswith(os.sep):
+            directory += os.sep
+        return [directory + name for name in names]
@@ -1,253 +1,1336 @@
-import os
-import subprocess
-import shutil
-import pygame  # Import pygame for playing music
-from lang import MyLangInterpreter  # Import the custom language interpreter
-
-class WindowsLikeConsole:
-    def __init__(self):
-        self.running = True
-        self.commands = {
-            "help": self.help,
-            "exit": self.exit_console,
-            "cd": self.change_directory,
-            "dir": self.list_directory,
-            "mkdir": self.make_directory,
-            "rmdir": self.remove_directory,
-            "echo": self.echo,
-            "set": self.set_env_var,
-            "get": self.get_env_var,
-            #"open": self.open_cla_file,  # Add the open command for .cla files
-            "play": self.play_music,  # Add the play command for music
-            "pause": self.pause_music,  # Add the pause command for music
-            "stop": self.stop_music,  # Add the stop command for music
-            "run": self.run_file,  # Add command to run files
-            "edit": self.edit_file,  # Add command to edit files with Vim
-            "clear": self.clear_screen  # Add the clear command
-        }
-        self.mylang = MyLangInterpreter()  # Initialize custom language interpreter
-        pygame.mixer.init()  # Initialize the Pygame mixer
-
-        # Check if Vim is installed
-        self.vim_installed = self.check_vim_installed()
-
-    def check_vim_installed(self):
-        try:
-            subprocess.run(['vim', '--version'], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            return True
-        except FileNotFoundError:
-            print("Error: Vim is not installed on this system.")
-            return False
-
-    def run(self):
-        print("Console by Adobe7508. Type 'help' for a list of commands.")
-        while self.running:
-            current_dir = os.getcwd()
-            user_input = input(f"{current_dir}> ")
-            self.process_command(user_input.strip())
-
-    def process_command(self, user_input):
-        # Check if it's a custom language command
-        if self.is_custom_language_command(user_input):
-            self.mylang.interpret(user_input)
-        else:
-            parts = user_input.split()
-            command = parts[0].lower() if parts else ''
-            args = parts[1:]
-
-            if command in self.commands:
-                self.commands[command](args)
-            else:
-                self.run_external_command(user_input)
-
-    def is_custom_language_command(self, user_input):
-        # Detect if the input starts with a custom language command keyword
-        return user_input.startswith(("p ", "i ", "new "))
-
-    def open_cla_file(self, args):
-        if not args:
-            print("Usage: open <filename>")
-            return
-        filename = args[0]
-
-        if not filename.endswith('.cla'):
-            print("Error: Can only open .cla files.")
-            return
-
-        if not os.path.isfile(filename):
-            print(f"Error: File '{filename}' not found.")
-            return
-
-        print(f"Opening and executing '{filename}'...")
-        with open(filename, 'r') as file:
-            for line in file:
-                line = line.strip()
-                if line:
-                    print(f"Executing: {line}")
-                    self.mylang.interpret(line)
-
-    def play_music(self, args):
-        if not args:
-            print("Usage: play <music_file>")
-            return
-        music_file = args[0]
-
-        if not os.path.isfile(music_file):
-            print(f"Error: File '{music_file}' not found.")
-            return
-
-        try:
-            pygame.mixer.music.load(music_file)
-            pygame.mixer.music.play()
-            print(f"Playing '{music_file}'...")
-        except pygame.error as e:
-            print(f"Error: {str(e)}")
-
-    def pause_music(self, args):
-        if pygame.mixer.music.get_busy():
-            pygame.mixer.music.pause()
-            print("Music paused.")
-        else:
-            print("No music is currently playing.")
-
-    def stop_music(self, args):
-        pygame.mixer.music.stop()
-        print("Music stopped.")
-
-    def help(self, args):
-        print("-------------------")
-        print("Available commands:")
-        for command in self.commands:
-            print(f" - {command}")
-        print("-------------------")
-
-    def exit_console(self, args):
-        print("Exiting...")
-        self.running = False
-
-    def echo(self, args):
-        print(" ".join(args))
-
-    def change_directory(self, args):
-        if not args:
-            print("Usage: cd <directory>")
-            return
-        try:
-            os.chdir(args[0])
-            print(f"Directory changed to: {os.getcwd()}")
-        except FileNotFoundError:
-            print("The system cannot find the path specified.")
-        except NotADirectoryError:
-            print("The system cannot find the path specified.")
-
-    def list_directory(self, args):
-        current_dir = os.getcwd()
-        try:
-            files = os.listdir(current_dir)
-            print(f"Directory of {current_dir}")
-            print("--------------------------")
-            for file in files:
-                print(file)
-            print("--------------------------")
-        except FileNotFoundError:
-            print("Directory not found.")
-
-    def make_directory(self, args):
-        if not args:
-            print("Usage: mkdir <directory>")
-            return
-        try:
-            os.makedirs(args[0], exist_ok=True)
-            print(f"Directory '{args[0]}' created.")
-        except Exception as e:
-            print(f"Error: {str(e)}")
-
-    def remove_directory(self, args):
-        if not args:
-            print("Usage: rmdir <directory>")
-            return
-        try:
-            shutil.rmtree(args[0])
-            print(f"Directory '{args[0]}' removed.")
-        except FileNotFoundError:
-            print("The directory does not exist.")
-        except Exception as e:
-            print(f"Error: {str(e)}")
-
-    def set_env_var(self, args):
-        if len(args) == 2:
-            os.environ[args[0]] = args[1]
-            print(f"Environment variable '{args[0]}' set to '{args[1]}'.")
-        else:
-            print("Usage: set VAR_NAME VALUE")
-
-    def get_env_var(self, args):
-        if len(args) == 1:
-            value = os.environ.get(args[0], None)
-            if value is not None:
-                print(f"{args[0]}={value}")
-            else:
-                print(f"Error: Environment variable '{args[0]}' not found.")
-        else:
-            print("Usage: get VAR_NAME")
-
-    def run_file(self, args):
-        if not args:
-            print("Usage: run <file>")
-            return
-        file_path = args[0]
-
-        if os.path.isfile(file_path):
-            try:
-                if file_path.lower().endswith(('.exe', '.lnk')):  # For executables and shortcuts
-                    subprocess.run(file_path, shell=True)
-                elif file_path.lower().endswith(('.png', '.jpg', '.jpeg')):  # For images
-                    subprocess.run(['start', file_path], shell=True)
-                elif file_path.lower().endswith(('.mp4', '.avi', '.mkv')):  # For videos
-                    subprocess.run(['start', file_path], shell=True)
-                elif file_path.lower().endswith('.py'):  # For Python files
-                    subprocess.run(['python', file_path], check=True)
-                elif file_path.lower().endswith('.cla'):  # For .cla files
-                    print(f"Running .cla file: {file_path}")
-                    self.open_cla_file(args)  # Reuse the open command for .cla files
-                else:
-                    print("Unsupported file type.")
-            except Exception as e:
-                print(f"Error: {str(e)}")
-        else:
-            print(f"Error: File '{file_path}' not found.")
-
-    def edit_file(self, args):
-        if not args:
-            print("Usage: edit <filename>")
-            return
-        filename = args[0]
-
-        if not os.path.isfile(filename):
-            print(f"Error: File '{filename}' not found.")
-            return
-
-        if self.vim_installed:
-            try:
-                subprocess.run(['vim', filename])
-            except Exception as e:
-                print(f"Error: {str(e)}")
-        else:
-            print("Error: Vim is not installed on this system.")
-
-    def clear_screen(self, args):
-        # Clear the console screen
-        os.system('cls' if os.name == 'nt' else 'clear')
-        print("Screen cleared.")
-
-    def run_external_command(self, command):
-        # For other commands, try to run them normally
-        try:
-            result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
-            print(result.stdout.strip())
-        except subprocess.CalledProcessError as e:
-            print(f"Error: {e.stderr.strip()}")
-
-if __name__ == "__main__":
-    console = WindowsLikeConsole()
-    console.run()
+import time
+IMPORT_START = time.perf_counter()
+import os
+import sys
+import codecs
+import argparse
+import importlib.util
+import fnmatch
+import threading
+import subprocess
+import shutil
+STDLIB_IMPORTED = time.perf_counter()
+from lang import MyLangInterpreter  # Import the custom language interpreter
+LANG_IMPORTED = time.perf_counter()  # Includes cla_syntax and sinks, which lang imports
+from dircache import DirectoryCache
+from jobs import JobScheduler
+from cmdline import has_operators, split_pipeline
+from cla_syntax import KEYWORDS
+HELPERS_IMPORTED = time.perf_counter()
+from telemetry import ERROR_LOG, EXPORT_INTERVAL, ErrorLog, Metrics, MetricsExporter
+TELEMETRY_IMPORTED = time.perf_counter()
+# pygame is imported by the audio worker on the first play; see audio.py
+
+# Batch mode writes through a large buffer and flushes in bulk
+BATCH_BUFFER_SIZE = 1 << 16
+
+# dir writes its output in blocks of this many lines
+DIR_FLUSH_LINES = 2048
+
+# Interactive history, kept between sessions
+HISTORY_FILE = os.path.join(os.path.expanduser("~"), ".console_history")
+HISTORY_SIZE = 1000
+
+# dir /o sort keys: name, size, date, extension
+DIR_SORT_KEYS = {
+    "n": lambda entry: entry[0].lower(),
+    "s": lambda entry: entry[2],
+    "d": lambda entry: entry[3],
+    "e": lambda entry: (os.path.splitext(entry[0])[1].lower(), entry[0].lower()),
+}
+
+class WindowsLikeConsole:
+    def __init__(self, shell_workers=0, max_jobs=4, trace=True, metrics=None, error_log=None):
+        self.running = True
+        self.local = threading.local()  # Per-thread state, so background jobs keep their own status
+        self.commands = {
+            "help": self.help,
+            "exit": self.exit_console,
+            "cd": self.change_directory,
+            "dir": self.list_directory,
+            "mkdir": self.make_directory,
+            "rmdir": self.remove_directory,
+            "copy": self.copy_path,
+            "move": self.move_path,
+            "echo": self.echo,
+            "set": self.set_env_var,
+            "get": self.get_env_var,
+            #"open": self.open_cla_file,  # Add the open command for .cla files
+            "play": self.play_music,  # Add the play command for music
+            "pause": self.pause_music,  # Add the pause command for music
+            "stop": self.stop_music,  # Add the stop command for music
+            "queue": self.queue_music,  # Playlist played after the current track
+            "next": self.next_track,
+            "volume": self.music_volume,
+            "status": self.music_status,
+            "run": self.run_file,  # Add command to run files
+            "runall": self.run_all_scripts,  # Run many .cla files in parallel
+            "profile": self.profile,  # Time .cla commands and lines
+            "edit": self.edit_file,  # Add command to edit files with Vim
+            "clear": self.clear_screen,  # Add the clear command
+            "jobs": self.list_jobs,  # Background jobs started with a trailing &
+            "fg": self.foreground_job,
+            "wait": self.wait_job,
+            "kill": self.kill_job,
+            "stats": self.show_stats  # Command latencies and error counts
+        }
+        self.interpreter = MyLangInterpreter(trace=trace)  # The foreground's; jobs and pipeline stages get forks
+        self.interpreter.on_error = self.log_error  # Each .cla error is logged with its command
+        self.dir_cache = DirectoryCache()  # Listings reused until a directory changes
+        self.dir_time_cache = {}
+        self.jobs = JobScheduler(max_jobs)
+        self.serving = False  # Set for the sessions of `console.py --serve`
+        self.metrics = metrics or Metrics()  # A server's sessions relay theirs to the server
+        self.error_log = error_log  # Where self.error also records, if set (see telemetry.py)
+        self.cwd = os.getcwd()  # Shown in the prompt; kept up to date by cd
+        self.completer = None  # Set up by run() when readline is available
+
+        # Music and editing are set up on first use, so startup pays for neither
+        self.audio = None
+        self.vim_path = None
+        self.vim_checked = False
+
+        # Optional long-lived shells for external commands (see shell_pool.py)
+        self.shell_pool = None
+        if shell_workers > 0:
+            from shell_pool import ShellPool
+            self.shell_pool = ShellPool(shell_workers)
+
+    def audio_player(self):
+        """The AudioPlayer, created on the first play; None without pygame."""
+        if self.audio is None:
+            if importlib.util.find_spec("pygame") is None:
+                self.error("Error: pygame is not installed on this system.")
+                return None
+            from audio import AudioPlayer
+            self.audio = AudioPlayer()
+        return self.audio
+
+    def check_vim_installed(self):
+        # Looked up once; the result is cached for later edit commands
+        if not self.vim_checked:
+            self.vim_path = shutil.which('vim')
+            self.vim_checked = True
+        return self.vim_path is not None
+
+    @property
+    def status(self):
+        """Exit status of the last command on this thread, 0 on success."""
+        return getattr(self.local, "status", 0)
+
+    @status.setter
+    def status(self, value):
+        self.local.status = value
+
+    @property
+    def mylang(self):
+        """The .cla interpreter of this thread: a job's or a pipeline stage's own, else the foreground's."""
+        return getattr(self.local, "mylang", None) or self.interpreter
+
+    def run(self):
+        print("Console by Adobe7508. Type 'help' for a list of commands.")
+        readline = self.setup_line_editing()
+        while self.running:
+            self.report_finished_jobs()
+            self.report_audio_errors()
+            user_input = input(f"{self.cwd}> ")
+            if readline is not None:
+                self.save_history(readline)
+            self.process_command(user_input.strip())
+
+    def setup_line_editing(self):
+        """Load the history and install tab completion; returns readline or None."""
+        from completion import Completer, readline
+        if readline is None:
+            return None
+        readline.set_history_length(HISTORY_SIZE)
+        try:
+            readline.read_history_file(HISTORY_FILE)
+        except FileNotFoundError:
+            # First session: appending needs an existing file
+            try:
+                open(HISTORY_FILE, 'a').close()
+            except OSError:
+                pass
+        except OSError:
+            pass
+        self.history_length = readline.get_current_history_length()
+        self.completer = Completer(self)
+        readline.set_completer(self.completer)
+        readline.set_completer_delims(" \t\n\"'|<>;")
+        if "libedit" in (readline.__doc__ or ""):
+            readline.parse_and_bind("bind ^I rl_complete")
+        else:
+            readline.parse_and_bind("tab: complete")
+        return readline
+
+    def save_history(self, readline):
+        # Append only the lines added since the last save; readline trims
+        # the file to HISTORY_SIZE lines. Repeated lines are not added.
+        length = readline.get_current_history_length()
+        added = length - self.history_length
+        self.history_length = length
+        if added > 0:
+            try:
+                readline.append_history_file(added, HISTORY_FILE)
+            except OSError:
+                pass
+
+    def invalidate_completions(self, path):
+        # The directory changed and its parent's listing changed with it
+        if self.completer is not None:
+            path = os.path.abspath(path)
+            self.completer.index.invalidate(path, tree=True)
+            self.completer.index.invalidate(os.path.dirname(path))
+
+    def run_batch(self, commands):
+        """Run commands without prompts and return the exit status.
+
+        The status is that of the last failing command, or 0 if all of them
+        succeeded. Blank lines and lines starting with # are skipped.
+        """
+        stdout = sys.stdout
+        sys.stdout = self.open_batch_output(stdout)
+        exit_status = 0
+        try:
+            for command in commands:
+                command = command.strip()
+                if not command or command.startswith('#'):
+                    continue
+                self.status = 0
+                self.process_command(command)
+                if self.status:
+                    exit_status = self.status
+                if not self.running:
+                    break
+            # Background jobs finish before the batch does; show their output
+            self.jobs.wait_all()
+            for job in self.jobs.list():
+                if job.status:
+                    exit_status = job.status if job.status > 0 else 1
+                sys.stdout.write(job.output.getvalue())
+                self.jobs.remove(job)
+        finally:
+            if sys.stdout is not stdout:
+                sys.stdout.close()
+                sys.stdout = stdout
+        return exit_status
+
+    def open_batch_output(self, stdout):
+        # Reopen stdout with a large buffer; fall back to it as-is if it is
+        # not backed by a file descriptor (e.g. when embedded or captured).
+        try:
+            fd = stdout.fileno()
+            stdout.flush()
+        except (AttributeError, OSError, ValueError):
+            return stdout
+        return open(fd, 'w', buffering=BATCH_BUFFER_SIZE, encoding=stdout.encoding,
+                    errors=stdout.errors, closefd=False)
+
+    def error(self, message):
+        print(message)
+        self.status = 1
+        self.log_error(message)
+
+    def log_error(self, message):
+        if self.error_log is not None:
+            self.error_log.error(message, command=getattr(self.local, "command", None), cwd=self.cwd,
+                                 job=getattr(self.jobs.current(), "id", None))
+
+    def process_command(self, user_input):
+        # Every command is timed for `stats` and the metrics file; a
+        # command counts as failed if it set a status or the .cla
+        # interpreter reported errors
+        start = time.perf_counter()
+        label = self.command_label(user_input)
+        cla_errors = self.mylang.errors
+        self.local.command = user_input
+        self.status = 0
+        try:
+            if self.run_command_line(user_input):
+                return  # A background job, timed by its own thread
+        except EOFError:
+            # `i` with stdin exhausted, e.g. in a batch reading /dev/null
+            print()
+            self.error("Error: No input left to read.")
+        except Exception as e:
+            self.log_error(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            self.local.command = None
+        elapsed = time.perf_counter() - start
+        failed = bool(self.status)
+        if self.mylang.errors != cla_errors:
+            failed = True  # Each error was logged by the interpreter's on_error
+            self.status = self.status or 1
+        self.metrics.observe(label, elapsed, failed)
+
+    def command_label(self, user_input):
+        # Builtins and .cla commands by name; external programs share one
+        # label, so the metrics stay bounded whatever is typed
+        if self.mylang.block_depth:
+            return "block"
+        word = user_input.split(None, 1)[0].lower() if user_input.strip() else ""
+        return word if word in self.commands or word in KEYWORDS else "external"
+
+    def run_command_line(self, user_input):
+        """Run one line; True if it was queued as a background job."""
+        # A trailing & runs the command as a background job
+        if user_input.endswith("&") and not user_input.endswith("&&") and not self.mylang.block_depth:
+            command = user_input[:-1].strip()
+            if command:
+                interpreter = self.mylang.fork()
+                job = self.jobs.submit(command, lambda command: self.run_job_command(command, interpreter))
+                print(f"[{job.id}] {job.command}")
+                return True
+
+        # Check if it's a custom language command (or the body of an open
+        # block); these lines are never split on | < >, so `if x > 3` stays
+        # a condition
+        if self.mylang.block_depth or self.is_custom_language_command(user_input):
+            self.mylang.interpret(user_input)
+            return
+
+        if has_operators(user_input):
+            stages = split_pipeline(user_input)
+            if stages is None:
+                if self.is_builtin(user_input):
+                    self.error("The syntax of the command is incorrect.")
+                    return
+            elif any(self.is_builtin(stage[0]) for stage in stages):
+                self.run_pipeline(stages)
+                return
+            # Only external commands: the shell runs the whole line
+        self.dispatch_command(user_input)
+
+    def dispatch_command(self, user_input):
+        parts = user_input.split()
+        command = parts[0].lower() if parts else ''
+        args = parts[1:]
+
+        if command in self.commands:
+            self.commands[command](args)
+        else:
+            self.run_external_command(user_input)
+
+    def is_builtin(self, command):
+        word = command.split(None, 1)[0] if command.strip() else ''
+        return word.lower() in self.commands
+
+    def run_pipeline(self, stages):
+        """Run stages of a command line joined by |, with < > >> redirections.
+
+        External commands get OS pipe ends as stdin and stdout, so data
+        between them never passes through Python. Builtins and .cla scripts
+        run on threads of their own with their output routed into
+        the next stage's pipe or file; like cmd, they ignore piped input.
+        Nothing is held beyond the pipes' own buffers, however much data
+        flows. The status is that of the last stage.
+        """
+        self.jobs.install_output()
+        console = self.jobs.output.target()  # The terminal, a job's buffer or a client's reply
+        job = self.jobs.current()
+        background = self.detached()
+        builtins = [self.is_builtin(stage[0]) for stage in stages]
+        statuses = [0] * len(stages)
+        processes = []
+        threads = []
+        drain = None  # Last stage's stdout, when it has to be copied to console
+        errors = None  # Write end of the pipe collecting background stderr
+        source = None  # Read end of the pipe from the previous stage
+        sys.stdout.flush()
+        try:
+            for index, (command, stdin_path, stdout_path, append) in enumerate(stages):
+                last = index == len(stages) - 1
+                stdin, source = source, None
+                stdout = None
+                try:
+                    if stdin_path is not None:
+                        if stdin is not None:
+                            os.close(stdin)
+                            stdin = None
+                        stdin = os.open(stdin_path, os.O_RDONLY)
+                    if stdout_path is not None:
+                        flags = os.O_WRONLY | os.O_CREAT | (os.O_APPEND if append else os.O_TRUNC)
+                        stdout = os.open(stdout_path, flags, 0o666)
+                    elif not last:
+                        if builtins[index + 1]:
+                            stdout = os.open(os.devnull, os.O_WRONLY)  # Builtins ignore their input
+                        else:
+                            source, stdout = os.pipe()
+                except OSError as e:
+                    for fd in (stdin, stdout):
+                        if fd is not None:
+                            os.close(fd)
+                    if isinstance(e, FileNotFoundError):
+                        self.error("The system cannot find the file specified.")
+                    else:
+                        self.error(f"Error: {e}")
+                    break  # Later stages are not started; earlier ones see a closed pipe
+
+                if builtins[index]:
+                    if stdin is not None:
+                        os.close(stdin)
+                    thread = threading.Thread(target=self.run_stage, name=f"pipeline-stage-{index + 1}",
+                                              args=(command, stdout, console, job, self.mylang.fork(), statuses, index),
+                                              daemon=True)
+                    threads.append(thread)
+                    thread.start()
+                    continue
+
+                if stdin is None and (index or background):
+                    stdin = subprocess.DEVNULL  # Nothing piped in: do not read the terminal
+                target = stdout
+                if target is None and not background:
+                    target = self.console_fd(console)
+                if target is None:
+                    target = subprocess.PIPE
+                if background and errors is None:
+                    read_end, errors = os.pipe()
+                    thread = threading.Thread(target=self.copy_output, args=(open(read_end, 'rb'), console),
+                                              name="pipeline-stderr", daemon=True)
+                    threads.append(thread)
+                    thread.start()
+                try:
+                    process = subprocess.Popen(command, shell=True, stdin=stdin, stdout=target,
+                                               stderr=errors, start_new_session=background)
+                finally:
+                    for fd in (stdin, stdout):
+                        if fd is not None and fd >= 0:
+                            os.close(fd)
+                processes.append((index, process))
+                self.jobs.track(process)
+                if target is subprocess.PIPE:
+                    drain = process.stdout
+        except BaseException:
+            for index, process in processes:
+                self.stop_process(process, background)
+            raise
+        finally:
+            if source is not None:
+                os.close(source)
+            if errors is not None:
+                os.close(errors)
+
+        try:
+            if drain is not None:
+                self.copy_output(drain, console)
+            for thread in threads:
+                thread.join()
+            for index, process in processes:
+                statuses[index] = process.wait()
+        except BaseException:
+            # Ctrl+C or `kill`: stop whatever is still running
+            for index, process in processes:
+                self.stop_process(process, background)
+            raise
+        if statuses[-1]:
+            self.status = statuses[-1]
+
+    def run_stage(self, command, fd, console, job, interpreter, statuses, index):
+        """Thread body of a builtin pipeline stage: run command writing to fd.
+
+        With no fd (the last stage, not redirected) the output goes to the
+        console, as it would without the pipeline.
+        """
+        self.jobs.adopt(job)
+        self.local.mylang = interpreter
+        stream = console
+        if fd is not None:
+            stream = open(fd, 'w', buffering=BATCH_BUFFER_SIZE, encoding="utf-8", errors="replace")
+            self.local.redirected = True
+        self.jobs.output.redirect(stream)
+        self.local.command = command
+        self.status = 0
+        try:
+            self.dispatch_command(command)
+        except BrokenPipeError:
+            pass  # The next stage stopped reading, e.g. `dir /s | head`
+        except Exception as e:
+            self.error(f"Error: {e}")
+        finally:
+            statuses[index] = self.status
+            try:
+                stream.flush()
+                if stream is not console:
+                    stream.close()
+            except BrokenPipeError:
+                pass
+            self.jobs.output.redirect(None)
+            self.jobs.adopt(None)
+            self.local.mylang = None
+
+    def stop_process(self, process, background):
+        if background:
+            self.jobs.terminate(process)  # Its own session: stop the whole group
+        elif process.poll() is None:
+            process.terminate()
+
+    def console_fd(self, stream):
+        """File descriptor behind stream, flushed so a child can write to it directly, or None."""
+        try:
+            fd = stream.fileno()
+            stream.flush()
+        except (AttributeError, OSError, ValueError):
+            return None
+        return fd
+
+    def copy_output(self, pipe, stream):
+        """Copy a child's output to stream as it arrives, in bounded chunks."""
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        with pipe:
+            for chunk in iter(lambda: pipe.read1(BATCH_BUFFER_SIZE), b""):
+                stream.write(decoder.decode(chunk))
+            stream.write(decoder.decode(b"", final=True))
+        stream.flush()
+
+    def run_job_command(self, command, interpreter):
+        self.local.mylang = interpreter
+        self.status = 0
+        try:
+            self.process_command(command)
+        finally:
+            self.local.mylang = None
+        return self.status
+
+    def report_finished_jobs(self):
+        for job in self.jobs.finished():
+            print(f"[{job.id}] {job.state:<8} {job.command}")
+
+    def find_job(self, args):
+        if not args:
+            job = self.jobs.latest()
+            if job is None:
+                self.error("No background jobs.")
+            return job
+        try:
+            job = self.jobs.get(int(args[0].lstrip("%")))
+        except ValueError:
+            job = None
+        if job is None:
+            self.error(f"Error: No such job: {args[0]}")
+        return job
+
+    def list_jobs(self, args):
+        for job in self.jobs.list():
+            status = "" if job.status is None else f" (exit {job.status})"
+            print(f"[{job.id}] {job.state:<8} {job.command}{status}")
+
+    def foreground_job(self, args):
+        job = self.find_job(args)
+        if job is None:
+            return
+        # Show what the job printed so far, then let it write to the terminal
+        job.attach(self.jobs.output.stream)
+        try:
+            while not job.done.wait(0.1):
+                pass
+        except KeyboardInterrupt:
+            self.jobs.kill(job)
+            job.done.wait()
+        finally:
+            job.detach()
+        job.notified = True
+        self.jobs.remove(job)
+        if job.status:
+            self.status = job.status if job.status > 0 else 1
+
+    def wait_job(self, args):
+        jobs = self.jobs.list() if not args else [self.find_job(args)]
+        for job in jobs:
+            if job is None:
+                return
+            try:
+                while not job.done.wait(0.1):
+                    pass
+            except KeyboardInterrupt:
+                print("^C")
+                return
+        self.report_finished_jobs()
+
+    def kill_job(self, args):
+        if not args:
+            self.error("Usage: kill <job_id>")
+            return
+        job = self.find_job(args)
+        if job is None:
+            return
+        if self.jobs.kill(job):
+            print(f"[{job.id}] Killed   {job.command}")
+        else:
+            print(f"[{job.id}] has already finished.")
+
+    def detached(self):
+        """True when there is no terminal to hand to child processes."""
+        return (self.serving or self.jobs.current() is not None
+                or getattr(self.local, "redirected", False))
+
+    def run_child(self, argv, shell=False, check=False):
+        # In a background job or a server session the child's output goes
+        # to sys.stdout (the job's buffer or the client's reply), and a
+        # job's process group can be stopped by `kill`.
+        if not self.detached():
+            return subprocess.run(argv, shell=shell, check=check)
+        process = subprocess.Popen(argv, shell=shell, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT, start_new_session=True)
+        self.jobs.track(process)
+        try:
+            self.copy_output(process.stdout, sys.stdout)
+            process.wait()
+        except BaseException:
+            self.stop_process(process, True)  # e.g. a server request that timed out
+            raise
+        if check and process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, argv)
+        return process
+
+    def is_custom_language_command(self, user_input):
+        # Detect if the input starts with a custom language command keyword
+        return user_input.startswith(("p ", "i ", "new ", "add ", "if ", "while "))
+
+    def open_cla_file(self, args):
+        if not args:
+            self.error("Usage: open <filename>")
+            return
+        filename = args[0]
+
+        if not filename.endswith('.cla'):
+            self.error("Error: Can only open .cla files.")
+            return
+
+        if not os.path.isfile(filename):
+            self.error(f"Error: File '{filename}' not found.")
+            return
+
+        print(f"Opening and executing '{filename}'...")
+        errors = self.mylang.errors
+        self.mylang.run_file(filename)  # Compiled once, then served from the .clac cache
+        if self.mylang.errors != errors:
+            self.status = 1  # Also when run as a pipeline stage, outside process_command
+
+    # Music commands hand their work to the audio thread and return at once;
+    # decoding errors are shown at the next prompt (report_audio_errors)
+
+    def play_music(self, args):
+        if not args:
+            # A bare play resumes paused music
+            if self.audio is not None and self.audio.status()[1]:
+                self.audio.resume()
+                print("Music resumed.")
+                return
+            self.error("Usage: play <music_file>")
+            return
+        music_file = args[0]
+
+        if not os.path.isfile(music_file):
+            self.error(f"Error: File '{music_file}' not found.")
+            return
+
+        audio = self.audio_player()
+        if audio is not None:
+            audio.play(os.path.abspath(music_file))
+            print(f"Playing '{music_file}'...")
+
+    def pause_music(self, args):
+        if self.audio is not None and self.audio.active():
+            self.audio.pause()
+            print("Music paused.")
+        else:
+            print("No music is currently playing.")
+
+    def stop_music(self, args):
+        if self.audio is not None:
+            self.audio.stop()
+        print("Music stopped.")
+
+    def queue_music(self, args):
+        """queue [music_file ...]: add files to the playlist, or list it."""
+        if not args:
+            queued = self.audio.status()[5] if self.audio is not None else []
+            if not queued:
+                print("The queue is empty.")
+            for position, path in enumerate(queued, 1):
+                print(f"{position:>3}. {os.path.basename(path)}")
+            return
+        missing = [name for name in args if not os.path.isfile(name)]
+        if missing:
+            self.error(f"Error: File '{missing[0]}' not found.")
+            return
+        audio = self.audio_player()
+        if audio is None:
+            return
+        for name in args:
+            audio.enqueue(os.path.abspath(name))
+        print(f"Queued {len(args)} file(s); {len(audio.status()[5])} in the queue.")
+
+    def next_track(self, args):
+        if self.audio is None or not self.audio.status()[5]:
+            if self.audio is not None:
+                self.audio.stop()
+            print("The queue is empty; music stopped.")
+            return
+        self.audio.next()
+        print("Playing the next track...")
+
+    def music_volume(self, args):
+        """volume [0-100]"""
+        if not args:
+            volume = self.audio.status()[4] if self.audio is not None else 1.0
+            print(f"Volume: {round(volume * 100)}%")
+            return
+        try:
+            volume = int(args[0].rstrip("%"))
+        except ValueError:
+            volume = -1
+        if not 0 <= volume <= 100:
+            self.error("Usage: volume [0-100]")
+            return
+        audio = self.audio_player()
+        if audio is not None:
+            audio.set_volume(volume / 100)
+            print(f"Volume set to {volume}%.")
+
+    def music_status(self, args):
+        if self.audio is None:
+            print("No music is currently playing.")
+            return
+        current, paused, elapsed, length, volume, queued = self.audio.status()
+        if current is None:
+            print("No music is currently playing.")
+        else:
+            state = "Paused" if paused else "Playing"
+            print(f"{state} '{os.path.basename(current)}' "
+                  f"{int(elapsed) // 60}:{int(elapsed) % 60:02} / {int(length) // 60}:{int(length) % 60:02}")
+        print(f"Volume: {round(volume * 100)}%, {len(queued)} track(s) queued.")
+
+    def report_audio_errors(self):
+        if self.audio is not None:
+            for message in self.audio.take_errors():
+                print(message)
+                self.log_error(message)
+
+    def help(self, args):
+        print("-------------------")
+        print("Available commands:")
+        for command in self.commands:
+            print(f" - {command}")
+        print("-------------------")
+
+    def exit_console(self, args):
+        print("Exiting...")
+        self.running = False
+
+    def echo(self, args):
+        print(" ".join(args))
+
+    def change_directory(self, args):
+        if not args:
+            self.error("Usage: cd <directory>")
+            return
+        if self.jobs.current() is not None:
+            # The directory belongs to the whole process, not to the job
+            self.error("Error: cd is not available in background jobs.")
+            return
+        try:
+            os.chdir(args[0])
+            self.cwd = os.getcwd()
+            print(f"Directory changed to: {self.cwd}")
+        except FileNotFoundError:
+            self.error("The system cannot find the path specified.")
+        except NotADirectoryError:
+            self.error("The system cannot find the path specified.")
+
+    def list_directory(self, args):
+        """dir [path|pattern] [/s] [/o[:][-]n|s|d|e]"""
+        recursive = False
+        order = None
+        target = None
+        for arg in args:
+            switch = arg.lower()
+            if switch == "/s":
+                recursive = True
+            elif switch.startswith("/o"):
+                order = switch[2:].lstrip(":") or "n"
+                if order.lstrip("-") not in DIR_SORT_KEYS:
+                    self.error(f"Invalid switch - {arg}")
+                    return
+            else:
+                target = arg
+
+        directory, pattern = os.getcwd(), None
+        if target is not None:
+            if os.path.isdir(target):
+                directory = target
+            else:
+                directory, pattern = os.path.split(target)
+                directory = directory or os.getcwd()
+
+        lines = []
+        file_count = dir_count = total_size = 0
+        root = os.path.abspath(directory)
+        pending = [root]
+        try:
+            while pending:
+                current_dir = pending.pop()
+                try:
+                    entries = self.dir_cache.scan(current_dir)
+                except (FileNotFoundError, NotADirectoryError):
+                    if current_dir == root:
+                        self.error("The system cannot find the path specified.")
+                        return
+                    continue  # Removed while we were walking the tree
+                except PermissionError:
+                    self.error(f"Access is denied: {current_dir}")
+                    continue
+
+                if recursive:
+                    # Visit subdirectories in listing order; links to directories
+                    # are listed but not followed, so a link to a parent cannot loop
+                    pending.extend(os.path.join(current_dir, entry[0])
+                                   for entry in reversed(entries) if entry[4])
+                if pattern is not None:
+                    entries = [entry for entry in entries if fnmatch.fnmatch(entry[0], pattern)]
+                    if recursive and not entries:
+                        continue
+                if order is not None:
+                    entries = sorted(entries, key=DIR_SORT_KEYS[order.lstrip("-")],
+                                     reverse=order.startswith("-"))
+
+                lines.append(f"Directory of {current_dir}")
+                lines.append("--------------------------")
+                format_time = self.format_dir_time
+                for name, is_dir, size, mtime, walk in entries:
+                    if is_dir:
+                        dir_count += 1
+                        lines.append(f"{format_time(mtime)}    <DIR>          {name}")
+                    else:
+                        file_count += 1
+                        total_size += size
+                        lines.append(f"{format_time(mtime)} {size:>17,} {name}")
+                    if len(lines) >= DIR_FLUSH_LINES:
+                        sys.stdout.write("\n".join(lines))
+                        sys.stdout.write("\n")
+                        lines.clear()
+                lines.append("--------------------------")
+        except KeyboardInterrupt:
+            lines.append("^C")
+
+        if pattern is not None and not file_count and not dir_count:
+            lines.append("File Not Found")
+            self.status = 1
+        lines.append(f"{file_count:>15} File(s) {total_size:>17,} bytes")
+        lines.append(f"{dir_count:>15} Dir(s)")
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
+
+    def format_dir_time(self, mtime):
+        # Many entries share a minute, so format each minute only once
+        minute = mtime // 60
+        text = self.dir_time_cache.get(minute)
+        if text is None:
+            if len(self.dir_time_cache) > 100000:
+                self.dir_time_cache.clear()
+            text = self.dir_time_cache[minute] = time.strftime("%Y-%m-%d  %H:%M", time.localtime(int(minute) * 60))
+        return text
+
+    # Tree operations run on treeops worker threads. They show live progress
+    # on a terminal, stop on Ctrl+C and report every error at the end.
+
+    def make_directory(self, args):
+        """mkdir <directory> [...] [--jobs N]"""
+        options = self.tree_options(args, "Usage: mkdir <directory> [...] [--jobs N]")
+        if options is None:
+            return
+        paths, workers, flags = options
+        if len(paths) == 1:
+            try:
+                os.makedirs(paths[0], exist_ok=True)
+                self.invalidate_completions(paths[0])
+                print(f"Directory '{paths[0]}' created.")
+            except Exception as e:
+                self.error(f"Error: {str(e)}")
+            return
+
+        from treeops import Progress, WorkQueue
+        progress = Progress()
+        work = WorkQueue(workers)
+        for path in paths:
+            work.put(self.create_directory, path, progress)
+        report = self.progress_reporter("Created")
+        work.run(progress, report)
+        for path in paths:
+            self.invalidate_completions(path)
+        if self.finish_tree_operation(progress, report):
+            print(f"{progress.dirs:,} directories created.")
+
+    def create_directory(self, path, progress):
+        os.makedirs(path, exist_ok=True)
+        progress.add(dirs=1)
+
+    def remove_directory(self, args):
+        """rmdir <directory> [--dry-run] [--jobs N]"""
+        usage = "Usage: rmdir <directory> [--dry-run] [--jobs N]"
+        options = self.tree_options(args, usage, ("--dry-run",))
+        if options is None:
+            return
+        paths, workers, flags = options
+        if len(paths) != 1:
+            self.error(usage)
+            return
+        path = paths[0]
+        if not os.path.lexists(path):
+            self.error("The directory does not exist.")
+            return
+        if os.path.islink(path) or not os.path.isdir(path):
+            self.error("The directory name is invalid.")
+            return
+
+        from treeops import remove_tree
+        dry_run = "--dry-run" in flags
+        report = self.progress_reporter("Found" if dry_run else "Removed")
+        progress = remove_tree(path, workers, dry_run, report)
+        self.invalidate_completions(path)
+        if self.finish_tree_operation(progress, report):
+            if dry_run:
+                print(f"Would remove {progress.summary()} in '{path}'.")
+            else:
+                print(f"Directory '{path}' removed ({progress.summary()}).")
+
+    def copy_path(self, args):
+        """copy <source> <destination> [--jobs N]"""
+        paths = self.transfer_paths(args, "Usage: copy <source> <destination> [--jobs N]")
+        if paths is None:
+            return
+        source, destination, workers = paths
+        from treeops import copy_file, copy_tree, same_file
+        if same_file(source, destination):
+            self.error("The file cannot be copied onto itself.")
+            return
+        if os.path.isdir(source) and not os.path.islink(source):
+            report = self.progress_reporter("Copied")
+            progress = copy_tree(source, destination, workers, report)
+            self.invalidate_completions(destination)
+            if self.finish_tree_operation(progress, report):
+                print(f"Copied {progress.summary()} to '{destination}'.")
+            return
+        try:
+            copy_file(source, destination)
+        except OSError as e:
+            self.error(f"Error: {e}")
+            return
+        self.invalidate_completions(destination)
+        print("        1 file(s) copied.")
+
+    def move_path(self, args):
+        """move <source> <destination> [--jobs N]"""
+        paths = self.transfer_paths(args, "Usage: move <source> <destination> [--jobs N]")
+        if paths is None:
+            return
+        source, destination, workers = paths
+        from treeops import move
+        report = self.progress_reporter("Moved")
+        try:
+            progress = move(source, destination, workers, report)
+        except OSError as e:
+            self.error(f"Error: {e}")
+            return
+        self.invalidate_completions(source)
+        self.invalidate_completions(destination)
+        if progress is None or self.finish_tree_operation(progress, report):
+            print(f"Moved '{source}' to '{destination}'.")
+
+    def transfer_paths(self, args, usage):
+        # (source, destination, workers) for copy and move; a destination
+        # that is a directory receives the source under its own name
+        options = self.tree_options(args, usage)
+        if options is None:
+            return None
+        paths, workers, flags = options
+        if len(paths) != 2:
+            self.error(usage)
+            return None
+        source, destination = paths
+        if not os.path.lexists(source):
+            self.error("The system cannot find the file specified.")
+            return None
+        if os.path.isdir(destination):
+            destination = os.path.join(destination, os.path.basename(os.path.normpath(source)))
+        if os.path.isdir(source):
+            inside = os.path.join(os.path.realpath(source), "")
+            if os.path.join(os.path.realpath(destination), "").startswith(inside):
+                self.error("Error: Cannot copy or move a directory into itself.")
+                return None
+        return source, destination, workers
+
+    def tree_options(self, args, usage, flags=()):
+        """Split args into (paths, workers, flags given); None after a usage error."""
+        from treeops import TREE_WORKERS
+        paths = []
+        workers = TREE_WORKERS
+        given = set()
+        args = list(args)
+        while args:
+            arg = args.pop(0)
+            if arg in ("--jobs", "-j") and args:
+                try:
+                    workers = int(args.pop(0))
+                except ValueError:
+                    workers = 0
+                if workers < 1:
+                    self.error(usage)
+                    return None
+            elif arg in flags:
+                given.add(arg)
+            elif arg.startswith("--"):
+                self.error(usage)
+                return None
+            else:
+                paths.append(arg)
+        if not paths:
+            self.error(usage)
+            return None
+        return paths, workers, given
+
+    def progress_reporter(self, verb):
+        # Live progress only on an interactive terminal
+        if self.detached() or not sys.stdout.isatty():
+            return None
+
+        def report(progress):
+            sys.stdout.write(f"\r{verb} {progress.summary()}...")
+            sys.stdout.flush()
+        return report
+
+    def finish_tree_operation(self, progress, report):
+        """Print cancellation and errors; True if everything succeeded."""
+        if report is not None:
+            sys.stdout.write("\r\033[K")  # Clear the progress line
+        if progress.cancelled:
+            print(f"^C Cancelled after {progress.summary()}.")
+        for path, message in progress.errors:
+            print(f"Error: {path}: {message}")
+        hidden = progress.error_count - len(progress.errors)
+        if hidden:
+            print(f"... and {hidden:,} more error(s).")
+        if progress.cancelled or progress.error_count:
+            self.status = 1
+            return False
+        return True
+
+    def set_env_var(self, args):
+        if len(args) == 2:
+            os.environ[args[0]] = args[1]
+            if self.shell_pool is not None:
+                self.shell_pool.environment_changed()
+            print(f"Environment variable '{args[0]}' set to '{args[1]}'.")
+        else:
+            self.error("Usage: set VAR_NAME VALUE")
+
+    def get_env_var(self, args):
+        if len(args) == 1:
+            value = os.environ.get(args[0], None)
+            if value is not None:
+                print(f"{args[0]}={value}")
+            else:
+                self.error(f"Error: Environment variable '{args[0]}' not found.")
+        else:
+            self.error("Usage: get VAR_NAME")
+
+    def run_file(self, args):
+        if not args:
+            self.error("Usage: run <file>")
+            return
+        file_path = args[0]
+
+        if os.path.isfile(file_path):
+            sys.stdout.flush()  # Keep buffered output ahead of the child's
+            try:
+                if file_path.lower().endswith(('.exe', '.lnk')):  # For executables and shortcuts
+                    self.run_child(file_path, shell=True)
+                elif file_path.lower().endswith(('.png', '.jpg', '.jpeg')):  # For images
+                    subprocess.run(['start', file_path], shell=True)
+                elif file_path.lower().endswith(('.mp4', '.avi', '.mkv')):  # For videos
+                    subprocess.run(['start', file_path], shell=True)
+                elif file_path.lower().endswith('.py'):  # For Python files
+                    self.run_child(['python', file_path], check=True)
+                elif file_path.lower().endswith('.cla'):  # For .cla files
+                    print(f"Running .cla file: {file_path}")
+                    self.open_cla_file(args)  # Reuse the open command for .cla files
+                else:
+                    self.error("Unsupported file type.")
+            except Exception as e:
+                self.error(f"Error: {str(e)}")
+        else:
+            self.error(f"Error: File '{file_path}' not found.")
+
+    def run_all_scripts(self, args):
+        pattern = None
+        jobs = None
+        args = list(args)
+        while args:
+            arg = args.pop(0)
+            if arg in ("--jobs", "-j") and args:
+                try:
+                    jobs = int(args.pop(0))
+                except ValueError:
+                    jobs = 0
+                if jobs < 1:
+                    self.error("Usage: runall <glob> [--jobs N]")
+                    return
+            elif pattern is None:
+                pattern = arg
+            else:
+                self.error("Usage: runall <glob> [--jobs N]")
+                return
+        if pattern is None:
+            self.error("Usage: runall <glob> [--jobs N]")
+            return
+
+        from runall import find_scripts, report
+        paths = find_scripts(pattern)
+        if not paths:
+            self.error(f"Error: No .cla files match '{pattern}'.")
+            return
+        sys.stdout.flush()
+        if report(paths, jobs):
+            self.status = 1
+
+    def profile(self, args):
+        """profile on | off | report [file] | <script.cla> [file]"""
+        usage = "Usage: profile on|off|report [file] or profile <script.cla> [file]"
+        if not args or len(args) > 2:
+            self.error(usage)
+            return
+        from cla_profile import Profiler
+        action = args[0].lower()
+        output = args[1] if len(args) > 1 else None
+        if action == "on":
+            self.mylang.profiler = Profiler()
+            print("Profiling .cla commands; use 'profile report' or 'profile off' to see the results.")
+        elif action in ("off", "report"):
+            profiler = self.mylang.profiler
+            if profiler is None:
+                self.error("Error: Profiling is not on.")
+                return
+            if action == "off":
+                self.mylang.profiler = None
+            self.write_profile(profiler, output)
+        elif action.endswith(".cla"):
+            if not os.path.isfile(args[0]):
+                self.error(f"Error: File '{args[0]}' not found.")
+                return
+            previous = self.mylang.profiler
+            profiler = self.mylang.profiler = Profiler()
+            try:
+                self.mylang.run_file(args[0], echo=False)
+            finally:
+                self.mylang.profiler = previous
+                self.write_profile(profiler, output)
+        else:
+            self.error(usage)
+
+    def write_profile(self, profiler, output):
+        profiler.report()
+        if output:
+            try:
+                profiler.save(output)
+                print(f"Profile saved to '{output}'.")
+            except OSError as e:
+                self.error(f"Error: {e}")
+
+    def show_stats(self, args):
+        """stats [reset | export <file>]"""
+        if args and args[0].lower() == "reset" and len(args) == 1:
+            self.metrics.reset()
+            print("Statistics cleared.")
+            return
+        if args and args[0].lower() == "export" and len(args) == 2:
+            try:
+                self.metrics.write_prometheus(args[1])
+                print(f"Metrics written to '{args[1]}'.")
+            except OSError as e:
+                self.error(f"Error: {e}")
+            return
+        if args:
+            self.error("Usage: stats [reset | export <file>]")
+            return
+        rows = self.metrics.rows()
+        if not rows:
+            print("No commands run yet.")
+            return
+        print(f"{'command':<12}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        for command, count, errors, p50, p95, p99, slowest in rows:
+            print(f"{command:<12}{count:>8}{errors:>8}{p50 * 1000:>10.3f}{p95 * 1000:>10.3f}"
+                  f"{p99 * 1000:>10.3f}{slowest * 1000:>10.3f}")
+
+    def edit_file(self, args):
+        if not args:
+            self.error("Usage: edit <filename>")
+            return
+        filename = args[0]
+
+        if not os.path.isfile(filename):
+            self.error(f"Error: File '{filename}' not found.")
+            return
+
+        if self.check_vim_installed():
+            sys.stdout.flush()
+            try:
+                subprocess.run([self.vim_path, filename])
+            except Exception as e:
+                self.error(f"Error: {str(e)}")
+        else:
+            self.error("Error: Vim is not installed on this system.")
+
+    def clear_screen(self, args):
+        # Clear the console screen
+        sys.stdout.flush()
+        os.system('cls' if os.name == 'nt' else 'clear')
+        print("Screen cleared.")
+
+    def run_external_command(self, command):
+        if self.shell_pool is not None:
+            # Output is streamed as the command produces it
+            status = self.shell_pool.run(command, self.write_output, started=self.jobs.track)
+            if status:
+                # stderr was shown with the output, so this is only logged
+                self.status = status
+                self.log_error(f"Error: Exit status {status}")
+            return
+
+        # For other commands, try to run them normally. Output is streamed:
+        # in the foreground the command writes to the terminal itself,
+        # otherwise it is copied over in chunks; only stderr is kept, for
+        # the error message.
+        background = self.detached()
+        stdout = None if background else self.console_fd(sys.stdout)
+        process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE if stdout is None else stdout,
+                                   stderr=subprocess.PIPE, stdin=subprocess.DEVNULL if background else None,
+                                   start_new_session=background)
+        self.jobs.track(process)
+        stderr = []
+        try:
+            if process.stdout is not None:
+                reader = threading.Thread(target=lambda: stderr.append(process.stderr.read()), daemon=True)
+                reader.start()
+                self.copy_output(process.stdout, sys.stdout)
+                reader.join()
+            else:
+                stderr.append(process.stderr.read())
+        except BaseException:
+            self.stop_process(process, background)  # Ctrl+C, or a server request that timed out
+            raise
+        process.stderr.close()
+        if process.wait():
+            message = stderr[0].decode(errors='replace').strip() or f"Exit status {process.returncode}"
+            self.error(f"Error: {message}")
+            self.status = process.returncode
+
+    def write_output(self, text):
+        if text:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+
+    def close(self):
+        self.jobs.shutdown()
+        if self.audio is not None:
+            self.audio.close()
+        if self.shell_pool is not None:
+            self.shell_pool.close()
+
+def print_startup_profile(init_time):
+    rows = [
+        ("import stdlib modules", STDLIB_IMPORTED - IMPORT_START),
+        ("import lang, cla_syntax, sinks", LANG_IMPORTED - STDLIB_IMPORTED),
+        ("import dircache, jobs, cmdline", HELPERS_IMPORTED - LANG_IMPORTED),
+        ("import telemetry", TELEMETRY_IMPORTED - HELPERS_IMPORTED),
+        ("WindowsLikeConsole()", init_time),
+    ]
+    print("Startup profile")
+    print("--------------------------")
+    for label, seconds in rows:
+        print(f"{label:<32}{seconds * 1000:8.2f} ms")
+    print(f"{'total':<32}{sum(seconds for label, seconds in rows) * 1000:8.2f} ms")
+    print("pygame mixer and vim probe are deferred to the first play/edit.")
+    print("--------------------------")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Console by Adobe7508")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("-c", dest="commands", metavar="COMMANDS",
+                        help="run commands separated by ';' and exit")
+    source.add_argument("--script", metavar="FILE",
+                        help="run commands from FILE, one per line ('-' for stdin), and exit")
+    source.add_argument("--serve", metavar="ADDRESS",
+                        help="serve commands and .cla scripts on a Unix socket path or [host:]port")
+    parser.add_argument("--request-timeout", type=float, metavar="SECONDS",
+                        help="with --serve, stop requests running longer than this (default: 60; 0 for no limit)")
+    parser.add_argument("--shell-workers", type=int, default=0, metavar="N",
+                        help="run external commands in N long-lived shells instead of a new shell per command")
+    parser.add_argument("--max-jobs", type=int, default=4, metavar="N",
+                        help="run at most N background jobs at once (default: 4)")
+    parser.add_argument("--quiet", action="store_true",
+                        help="do not echo each line of .cla files as it runs")
+    parser.add_argument("--error-log", metavar="FILE", default=ERROR_LOG,
+                        help="append errors as JSON lines to FILE, rotated at 1 MB (default: console_errors.log; "
+                             "'' to disable)")
+    parser.add_argument("--metrics-file", metavar="FILE",
+                        help=f"rewrite FILE with command metrics in Prometheus text format every "
+                             f"{EXPORT_INTERVAL:g} seconds")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print a breakdown of import and initialization time")
+    args = parser.parse_args(argv)
+    if args.shell_workers and os.name == 'nt':
+        parser.error("--shell-workers needs a POSIX shell")
+
+    # One error log and one set of metrics, shared by every server session
+    metrics = Metrics()
+    error_log = None
+    if args.error_log:
+        error_log = ErrorLog(args.error_log)
+        error_log.preload()
+    exporter = None
+    if args.metrics_file:
+        exporter = MetricsExporter(metrics, args.metrics_file)
+        exporter.start()
+    try:
+        return run_console(args, metrics, error_log)
+    finally:
+        if exporter is not None:
+            exporter.stop()
+        if error_log is not None:
+            error_log.close()
+
+def run_console(args, metrics, error_log):
+    if args.serve is not None:
+        from server import REQUEST_TIMEOUT, serve_forever
+        # Each session runs in a process of its own; see server.py
+        worker_args = ["--max-jobs", str(args.max_jobs)] + (["--quiet"] if args.quiet else [])
+        timeout = REQUEST_TIMEOUT if args.request_timeout is None else args.request_timeout
+        return serve_forever(args.serve, worker_args, metrics, error_log, timeout)
+
+    init_start = time.perf_counter()
+    console = WindowsLikeConsole(shell_workers=args.shell_workers, max_jobs=args.max_jobs,
+                                 trace=not args.quiet, metrics=metrics, error_log=error_log)
+    if args.profile_startup:
+        print_startup_profile(time.perf_counter() - init_start)
+    try:
+        if args.commands is not None:
+            return console.run_batch(args.commands.split(";"))
+        if args.script == "-":
+            return console.run_batch(sys.stdin)
+        if args.script is not None:
+            try:
+                with open(args.script, 'r') as file:
+                    return console.run_batch(file)
+            except OSError as e:
+                print(f"Error: {e}")
+                return 1
+
+        console.run()
+        return 0
+    finally:
+        console.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
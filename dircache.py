@@ -0,0 +1,67 @@
+import os
+import time
+from collections import OrderedDict
+
+# A directory modified this recently may change again within the same
+# mtime tick, so its listing is not cached.
+RACY_WINDOW_NS = 2 * 10**9
+
+
+class DirectoryCache:
+    """scandir results per directory, reused while its mtime is unchanged.
+
+    Entries are (name, is_dir, size, mtime, walk) tuples, where walk is true
+    for a real directory and false for a symlink to one. A directory's mtime only
+    changes when entries are added, removed or renamed, so the size and date
+    of a file rewritten in place can be stale until the directory changes.
+    """
+
+    def __init__(self, max_entries=2000000):
+        self.max_entries = max_entries
+        self.total = 0
+        self.listings = OrderedDict()  # path -> (mtime_ns, entries), oldest first
+
+    def scan(self, path):
+        path = os.path.abspath(path)
+        mtime_ns = os.stat(path).st_mtime_ns
+        cached = self.listings.get(path)
+        if cached is not None and cached[0] == mtime_ns:
+            self.listings.move_to_end(path)
+            return cached[1]
+
+        entries = []
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                    walk = entry.is_dir(follow_symlinks=False)
+                    info = entry.stat()
+                except OSError:
+                    # Broken symlink; describe the link itself
+                    try:
+                        is_dir = walk = False
+                        info = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                entries.append((entry.name, is_dir, 0 if is_dir else info.st_size, info.st_mtime, walk))
+        self.store(path, mtime_ns, entries)
+        return entries
+
+    def store(self, path, mtime_ns, entries):
+        self.invalidate(path)
+        if time.time_ns() - mtime_ns < RACY_WINDOW_NS or len(entries) > self.max_entries:
+            return
+        self.listings[path] = (mtime_ns, entries)
+        self.total += len(entries)
+        while self.total > self.max_entries:
+            old_mtime, old_entries = self.listings.popitem(last=False)[1]
+            self.total -= len(old_entries)
+
+    def invalidate(self, path=None):
+        if path is None:
+            self.listings.clear()
+            self.total = 0
+            return
+        cached = self.listings.pop(os.path.abspath(path), None)
+        if cached is not None:
+            self.total -= len(cached[1])
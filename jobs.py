@@ -0,0 +1,288 @@
+import os
+import sys
+import queue
+import ctypes
+import signal
+import threading
+from collections import deque
+
+# Lines of output kept per background job; older lines are dropped
+JOB_BUFFER_LINES = 1000
+
+# Finished jobs kept for `jobs`/`fg` after their completion was reported
+FINISHED_JOBS_KEPT = 50
+
+
+class JobKilled(BaseException):
+    """Raised in a job's thread by `kill`; not an Exception, so command
+    handlers that report errors do not swallow it."""
+
+
+class RingBuffer:
+    """Keeps the last `max_lines` lines written to it, counting those dropped."""
+
+    def __init__(self, max_lines=JOB_BUFFER_LINES):
+        self.lines = deque(maxlen=max_lines)
+        self.partial = ""
+        self.dropped = 0
+
+    def write(self, text):
+        text = self.partial + text
+        lines = text.split("\n")
+        self.partial = lines.pop()
+        overflow = len(self.lines) + len(lines) - self.lines.maxlen
+        if overflow > 0:
+            self.dropped += overflow
+        self.lines.extend(lines)
+
+    def getvalue(self):
+        text = "\n".join(self.lines)
+        if self.lines:
+            text += "\n"
+        return text + self.partial
+
+    def clear(self):
+        self.lines.clear()
+        self.partial = ""
+        self.dropped = 0
+
+
+class Job:
+    def __init__(self, job_id, command):
+        self.id = job_id
+        self.command = command
+        self.state = "Queued"
+        self.status = None
+        self.output = RingBuffer()
+        self.attached = None  # Stream the job writes to directly after `fg`
+        self.thread = None
+        self.process = None  # Child process currently started by the job
+        self.notified = False
+        self.done = threading.Event()
+        self.lock = threading.Lock()
+        self.thread_lock = threading.Lock()  # Held while a kill targets, or run_job releases, thread
+        self.kill_sent = False
+
+    def write(self, text):
+        with self.lock:
+            if self.attached is not None:
+                self.attached.write(text)
+                self.attached.flush()
+            else:
+                self.output.write(text)
+
+    def flush(self):
+        pass
+
+    def attach(self, stream):
+        """Send what was buffered so far, then the job's live output, to stream."""
+        with self.lock:
+            if self.output.dropped:
+                stream.write(f"[{self.output.dropped} earlier line(s) of output were not kept]\n")
+            stream.write(self.output.getvalue())
+            stream.flush()
+            self.output.clear()
+            self.attached = stream
+
+    def detach(self):
+        with self.lock:
+            self.attached = None
+
+
+class JobOutput:
+    """sys.stdout replacement routing each job thread's output to its job."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def target(self):
+        return getattr(self.local, "job", None) or self.stream
+
+    def write(self, text):
+        return self.target().write(text)
+
+    def flush(self):
+        self.target().flush()
+
+    def redirect(self, stream):
+        """Send the calling thread's output to stream; None restores the default."""
+        self.local.job = stream
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class JobScheduler:
+    """Runs commands on at most `max_jobs` background threads."""
+
+    def __init__(self, max_jobs=4):
+        self.max_jobs = max_jobs
+        self.jobs = {}
+        self.next_id = 1
+        self.pending = queue.Queue()
+        self.workers = []
+        self.local = threading.local()
+        self.output = None
+        self.lock = threading.Lock()
+
+    def submit(self, command, run):
+        """Queue run(command) as a background job and return the Job.
+
+        run() returns the command's exit status.
+        """
+        self.install_output()
+        with self.lock:
+            self.prune()
+            job = Job(self.next_id, command)
+            self.jobs[job.id] = job
+            self.next_id += 1
+            if len(self.workers) < self.max_jobs:
+                worker = threading.Thread(target=self.work, name=f"job-worker-{len(self.workers) + 1}",
+                                          daemon=True)
+                self.workers.append(worker)
+                worker.start()
+        self.pending.put((job, run))
+        return job
+
+    def install_output(self):
+        # Re-wrap whenever sys.stdout was replaced, e.g. by batch mode; a
+        # wrapper installed by another console in this process is shared
+        if not isinstance(sys.stdout, JobOutput):
+            sys.stdout = JobOutput(sys.stdout)
+        self.output = sys.stdout
+
+    def prune(self):
+        finished = [job for job in self.jobs.values() if job.notified]
+        for job in finished[:-FINISHED_JOBS_KEPT]:
+            del self.jobs[job.id]
+
+    def work(self):
+        while True:
+            try:
+                job, run = self.pending.get()
+                if job.state != "Queued":
+                    continue  # Killed before it started
+                self.run_job(job, run)
+            except JobKilled:
+                pass  # A kill that arrived after its job had finished
+
+    def run_job(self, job, run):
+        job.state = "Running"
+        job.thread = threading.current_thread()
+        self.local.job = job
+        self.output.local.job = job
+        try:
+            try:
+                job.status = run(job.command)
+                if job.state == "Running":
+                    job.state = "Done" if not job.status else "Failed"
+            except JobKilled:
+                job.status = -signal.SIGTERM
+            except Exception as e:
+                job.write(f"Error: {e}\n")
+                job.status = 1
+                job.state = "Failed"
+            finally:
+                self.release(job)
+        except JobKilled:
+            # Sent as run() returned and raised before release() took the lock
+            job.status = -signal.SIGTERM
+            self.release(job)
+        finally:
+            job.process = None
+            self.local.job = None
+            self.output.local.job = None
+            job.done.set()
+
+    def release(self, job):
+        # After this no kill can reach the thread, and one already sent but
+        # not yet raised is cancelled, so it cannot hit the thread's next job
+        with job.thread_lock:
+            job.thread = None
+            if job.kill_sent:
+                raise_in_thread(threading.get_ident(), None)
+
+    def current(self):
+        """The job running on the calling thread, or None in the foreground."""
+        return getattr(self.local, "job", None)
+
+    def adopt(self, job):
+        """Count the calling thread's work as part of job, e.g. a pipeline stage."""
+        self.local.job = job
+
+    def track(self, process):
+        job = self.current()
+        if job is not None:
+            job.process = process
+            if job.state == "Killed":
+                self.terminate(process)  # Killed while the process was starting
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def latest(self):
+        with self.lock:
+            return max(self.jobs.values(), key=lambda job: job.id, default=None)
+
+    def list(self):
+        with self.lock:
+            return sorted(self.jobs.values(), key=lambda job: job.id)
+
+    def kill(self, job):
+        if job.done.is_set():
+            return False
+        if job.state == "Queued":
+            job.state = "Killed"
+            job.status = -signal.SIGTERM
+            job.done.set()
+            return True
+
+        job.state = "Killed"
+        process = job.process
+        if process is not None:
+            self.terminate(process)
+        # Stop in-process work (e.g. a .cla loop) at its next bytecode, if
+        # the thread is still running this job
+        with job.thread_lock:
+            if job.thread is not None and not job.kill_sent:
+                job.kill_sent = True
+                raise_in_thread(job.thread.ident, JobKilled)
+        return True
+
+    def terminate(self, process):
+        if process.poll() is not None:
+            return
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(process.pid, signal.SIGTERM)
+            else:
+                process.terminate()
+        except OSError:
+            pass
+
+    def finished(self):
+        """Jobs that completed since the last call, for completion notices."""
+        with self.lock:
+            done = [job for job in self.jobs.values() if job.done.is_set() and not job.notified]
+            for job in done:
+                job.notified = True
+        return done
+
+    def remove(self, job):
+        with self.lock:
+            self.jobs.pop(job.id, None)
+
+    def wait_all(self):
+        for job in list(self.jobs.values()):
+            job.done.wait()
+
+    def shutdown(self):
+        for job in list(self.jobs.values()):
+            self.kill(job)
+
+
+def raise_in_thread(ident, exception):
+    """Raise exception in thread ident at its next bytecode; None cancels a pending one."""
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(ident),
+                                               None if exception is None else ctypes.py_object(exception))
@@ -1,203 +1,656 @@
-import os
-
-class MyLangInterpreter:
-    def __init__(self):
-        self.variables = {}
-        self.characters = {}
-        self.current_character = None
-
-    def interpret(self, line):
-        parts = line.split(" ", 1)
-        command = parts[0]
-
-        if command == "p":
-            if len(parts) > 1:
-                self.handle_print(parts[1])
-            else:
-                print()
-
-        elif command == "i":
-            if len(parts) > 1:
-                self.handle_input(parts[1])
-            else:
-                print("Usage: i <variable_name>")
-
-        elif command == "new":
-            if len(parts) > 1:
-                self.handle_new(parts[1])
-            else:
-                print("Usage: new <variable_name> <value>")
-
-        elif command == "open":
-            if len(parts) > 1:
-                self.handle_open(parts[1])
-            else:
-                print("Usage: open <filename.cla>")
-
-        elif command == "import":
-            if len(parts) > 1:
-                self.handle_import(parts[1])
-            else:
-                print("Usage: import <filename.cla>")
-
-        elif command == "if":
-            if len(parts) > 1:
-                self.handle_if(parts[1])
-            else:
-                print("Usage: if <condition>")
-
-        elif command == "while":
-            if len(parts) > 1:
-                self.handle_while(parts[1])
-            else:
-                print("Usage: while <condition>")
-
-        else:
-            print(f"Unknown command: {command}")
-
-    def handle_if(self, condition):
-        condition_parts = condition.split(" ", 1)
-        if len(condition_parts) < 2:
-            print("Usage: if <variable> <operator> <value>")
-            return
-
-        var_name, operator_value = condition_parts[0], condition_parts[1].split(" ", 1)
-        if len(operator_value) != 2:
-            print("Usage: if <variable> <operator> <value>")
-            return
-
-        operator, value = operator_value
-        value = int(value) if value.isdigit() else value
-        var_value = self.variables.get(var_name)
-        if var_value.isdigit():
-            var_value = int(var_value)
-
-        if operator == "==":
-            if var_value == value:
-                print(f"Condition is true for: {var_name} {operator} {value}")
-        elif operator == "!=":
-            if var_value != value:
-                print(f"Condition is true for: {var_name} {operator} {value}")
-        elif operator == ">":
-            if var_value > value:
-                print(f"Condition is true for: {var_name} {operator} {value}")
-        elif operator == "<":
-            if var_value < value:
-                print(f"Condition is true for: {var_name} {operator} {value}")
-        elif operator == ">=":
-            if var_value >= value:
-                print(f"Condition is true for: {var_name} {operator} {value}")
-        elif operator == "<=":
-            if var_value <= value:
-                print(f"Condition is true for: {var_name} {operator} {value}")
-        else:
-            print(f"Unknown operator: {operator}")
-
-    def handle_while(self, condition):
-        condition_parts = condition.split(" ", 1)
-        if len(condition_parts) < 2:
-            print("Usage: while <variable> <operator> <value>")
-            return
-
-        var_name, operator_value = condition_parts[0], condition_parts[1].split(" ", 1)
-        if len(operator_value) != 2:
-            print("Usage: while <variable> <operator> <value>")
-            return
-
-        operator, value = operator_value
-        value = int(value) if value.isdigit() else value
-        print(f"Starting loop while {var_name} {operator} {value}")
-
-        while True:
-            var_value = self.variables.get(var_name)
-            if var_value.isdigit():
-                var_value = int(var_value)
-
-            if operator == "==":
-                if var_value != value:
-                    break
-            elif operator == "!=":
-                if var_value == value:
-                    break
-            elif operator == ">":
-                if var_value <= value:
-                    break
-            elif operator == "<":
-                if var_value >= value:
-                    break
-            elif operator == ">=":
-                if var_value < value:
-                    break
-            elif operator == "<=":
-                if var_value > value:
-                    break
-            else:
-                print(f"Unknown operator: {operator}")
-                break
-
-            print(f"Looping with {var_name}: {var_value}")
-            # Modify the variable within the loop to prevent an infinite loop
-            self.variables[var_name] = var_value - 1  # Example modification
-
-    def handle_import(self, filename):
-        if not filename.endswith('.cla'):
-            print("Error: File must have a .cla extension.")
-            return
-
-        if not os.path.exists(filename):
-            print(f"Error: File '{filename}' not found.")
-            return
-
-        print(f"Importing from '{filename}'...")
-        with open(filename, 'r') as file:
-            for line in file:
-                line = line.strip()
-                if line and not line.startswith('#'):
-                    print(f"Executing: {line}")
-                    self.interpret(line)
-
-    def handle_open(self, filename):
-        if not filename.endswith('.cla'):
-            print("Error: File must have a .cla extension.")
-            return
-
-        if not os.path.exists(filename):
-            print(f"Error: File '{filename}' not found.")
-            return
-
-        print(f"Opening '{filename}'...")
-        with open(filename, 'r') as file:
-            for line in file:
-                line = line.strip()
-                if line and not line.startswith('#'):
-                    print(f"Executing: {line}")
-                    self.interpret(line)
-
-    def handle_print(self, text):
-        for var in self.variables:
-            text = text.replace(f"${var}", str(self.variables[var]))
-        print(text)
-
-    def handle_input(self, variable_name):
-        value = input(f"Enter value for {variable_name}: ")
-        self.variables[variable_name] = value
-
-    def handle_new(self, command):
-        parts = command.split(" ", 1)
-        if len(parts) == 2:
-            var_name, value = parts
-            self.variables[var_name] = value
-        else:
-            print("Usage: new <variable_name> <value>")
-
-if __name__ == "__main__":
-    interpreter = MyLangInterpreter()
-    while True:
-        try:
-            command = input("> ")
-            interpreter.interpret(command)
-        except KeyboardInterrupt:
-            print("\nExiting...")
-            break
-        except Exception as e:
-            print(f"Error: {e}")
+import os
+import sys
+import hashlib
+import marshal
+import operator
+import tempfile
+
+from cla_syntax import (BLOCK_OPENERS, TEMPLATE_VAR, USAGES, parse_literal, parse_number, split_command,
+                        split_condition)
+from sinks import BufferedSink, StdoutSink
+
+# Opcodes of the compiled instruction form. An instruction is a tuple
+# (opcode, operands, source_line); operands are already split and literal
+# values already typed, so running a compiled script never touches the lexer.
+OP_PRINT = 0
+OP_INPUT = 1
+OP_NEW = 2
+OP_ADD = 3
+OP_OPEN = 4
+OP_IMPORT = 5
+OP_USAGE = 6
+OP_UNKNOWN = 7
+# Control flow is handled inline by the executor, so keep these last.
+# Conditional jumps carry (compare, variable, value, target).
+OP_JUMP = 8
+OP_JUMP_IF_FALSE = 9
+OP_JUMP_IF_TRUE = 10
+
+# Compiled scripts are cached next to the source (script.cla -> script.clac).
+# Bump CACHE_MAGIC whenever the instruction format changes.
+CACHE_SUFFIX = "c"
+CACHE_MAGIC = b"CLA\x06"
+
+# Upper bound on the number of interactive lines kept compiled by interpret()
+LINE_CACHE_SIZE = 1024
+
+# Environment variable listing extra directories searched by `import`
+SEARCH_PATH_VAR = "CLA_PATH"
+
+OPCODES = {
+    "p": OP_PRINT,
+    "i": OP_INPUT,
+    "new": OP_NEW,
+    "open": OP_OPEN,
+    "import": OP_IMPORT,
+    "add": OP_ADD,
+}
+
+# command -> (opcode, usage message printed when the operand is missing)
+COMMANDS = {command: (OPCODES[command], usage) for command, usage in USAGES.items()}
+
+# Resolved when code is linked, so the executor never matches operator strings
+COMPARISONS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le,
+}
+
+# Value of frame slots for names that are referenced but not yet assigned
+UNSET = object()
+
+
+class CompileError(Exception):
+    pass
+
+
+def compile_template(text):
+    """Split a `p` template into literal segments and variable references.
+
+    Returns (literals, names) with len(literals) == len(names) + 1; the
+    rendered text is literals[0] + value(names[0]) + literals[1] + ...
+
+    A reference takes the longest run of letters, digits and underscores
+    after the `$`, so `$ab` always means the variable `ab`, never `a`
+    followed by "b". References to undefined variables are printed
+    verbatim, a `$` not followed by a name character is literal text, and
+    substituted values are not scanned for further references.
+
+    >>> compile_template("Hi $name, $$ $n2!")
+    (('Hi ', ', $$ ', '!'), ('name', 'n2'))
+    """
+    pieces = TEMPLATE_VAR.split(text)
+    return (tuple(pieces[0::2]), tuple(pieces[1::2]))
+
+
+def compile_line(line):
+    """Compile a single line of .cla source into an instruction tuple."""
+    command, operand = split_command(line)
+
+    entry = COMMANDS.get(command)
+    if entry is None:
+        if command in ("else", "end"):
+            return (OP_USAGE, (f"Error: '{command}' without 'if' or 'while'",), line)
+        return (OP_UNKNOWN, (command,), line)
+
+    opcode, usage = entry
+    if operand is None:
+        if opcode == OP_PRINT:
+            return (OP_PRINT, (("",), ()), line)
+        return (OP_USAGE, (usage,), line)
+
+    if opcode == OP_PRINT:
+        return (OP_PRINT, compile_template(operand), line)
+    if opcode == OP_NEW or opcode == OP_ADD:
+        new_parts = operand.split(" ", 1)
+        if len(new_parts) != 2:
+            return (OP_USAGE, (usage,), line)
+        if opcode == OP_ADD:
+            amount = parse_number(new_parts[1])
+            if amount is None:
+                return (OP_USAGE, (usage,), line)
+            return (OP_ADD, (new_parts[0], amount), line)
+        return (OP_NEW, (new_parts[0], parse_literal(new_parts[1])), line)
+    return (opcode, (operand,), line)
+
+
+def compile_condition(line):
+    """Parse `if|while <variable> <operator> <value>` into condition operands."""
+    condition, problem = split_condition(line)
+    if problem:
+        raise CompileError(problem)
+    var_name, symbol, value = condition
+    return (symbol, var_name, parse_literal(value))
+
+
+def compile_source(lines, numbers=None):
+    """Compile .cla source lines, skipping blank lines and # comments.
+
+    `if`/`else`/`end` and `while`/`end` blocks become conditional jumps over
+    the instruction list. A `while` tests its condition at the top and again
+    at its `end`, so each iteration costs a single jump instruction.
+    Unbalanced blocks raise CompileError. If numbers is a list, the source
+    line number of each instruction is appended to it.
+    """
+    code = []
+    blocks = []  # (kind, index of the instruction to patch, line number)
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        command = line.split(" ", 1)[0]
+
+        if command in BLOCK_OPENERS:
+            try:
+                condition = compile_condition(line)
+            except CompileError as e:
+                raise CompileError(f"line {lineno}: {e}") from None
+            blocks.append((command, len(code), lineno))
+            code.append((OP_JUMP_IF_FALSE, condition + (None,), line))
+
+        elif command == "else":
+            if not blocks or blocks[-1][0] != "if":
+                raise CompileError(f"line {lineno}: 'else' without 'if'")
+            kind, start, opened = blocks.pop()
+            blocks.append(("else", len(code), opened))
+            code.append((OP_JUMP, (None,), line))
+            patch_jump(code, start, len(code))
+
+        elif command == "end":
+            if not blocks:
+                raise CompileError(f"line {lineno}: 'end' without 'if' or 'while'")
+            kind, start, opened = blocks.pop()
+            if kind == "while":
+                condition = code[start][1][:3]
+                code.append((OP_JUMP_IF_TRUE, condition + (start + 1,), line))
+            patch_jump(code, start, len(code))
+
+        else:
+            code.append(compile_line(line))
+
+        if numbers is not None:
+            numbers.extend([lineno] * (len(code) - len(numbers)))
+
+    if blocks:
+        kind, start, opened = blocks[-1]
+        kind = "if" if kind == "else" else kind
+        raise CompileError(f"line {opened}: '{kind}' without 'end'")
+    return code
+
+
+def patch_jump(code, index, target):
+    opcode, operands, source = code[index]
+    code[index] = (opcode, operands[:-1] + (target,), source)
+
+
+def cache_path(filename):
+    return filename + CACHE_SUFFIX
+
+
+def load_script(filename, numbers=None):
+    """Return the compiled form of a .cla file, using the on-disk cache.
+
+    The cache is valid when the source mtime and size match the recorded
+    ones; if they differ but the source hash is unchanged (e.g. after a
+    checkout touched the file) the cached code is reused and re-stamped.
+    numbers, if a list, receives each instruction's line number, which
+    the cache keeps alongside the code.
+    """
+    st = os.stat(filename)
+    cached_path = cache_path(filename)
+    cached = None
+    try:
+        with open(cached_path, 'rb') as cache_file:
+            data = cache_file.read()
+        if data.startswith(CACHE_MAGIC):
+            cached = marshal.loads(memoryview(data)[len(CACHE_MAGIC):])
+    except (OSError, EOFError, ValueError, TypeError):
+        cached = None
+
+    if not isinstance(cached, tuple) or len(cached) != 5:
+        cached = None
+    elif cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        if numbers is not None:
+            numbers.extend(cached[4])
+        return cached[3]
+
+    with open(filename, 'rb') as source_file:
+        source = source_file.read()
+    digest = hashlib.sha1(source).digest()
+    if cached is not None and cached[2] == digest:
+        code, lines = cached[3], cached[4]
+    else:
+        lines = []
+        code = compile_source(source.decode().splitlines(), lines)
+    write_cache(cached_path, (st.st_mtime_ns, st.st_size, digest, code, lines), st.st_mode & 0o666)
+    if numbers is not None:
+        numbers.extend(lines)
+    return code
+
+
+def write_cache(cached_path, entry, mode=0o644):
+    # Write atomically; an unwritable directory just means no caching.
+    # Each writer gets a temporary file of its own, since jobs and
+    # pipeline stages may compile the same script on several threads.
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cached_path) or ".", suffix=".tmp")
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, 'wb') as cache_file:
+            cache_file.write(CACHE_MAGIC)
+            marshal.dump(entry, cache_file)
+        os.chmod(tmp_path, mode)  # mkstemp makes it 0600; like .pyc, follow the source
+        os.replace(tmp_path, cached_path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+class MyLangInterpreter:
+    def __init__(self, output=None, trace=True, read_line=None):
+        # Everything the interpreter prints goes to output (see sinks.py);
+        # trace=False drops the "Executing:" echo of opened/imported lines
+        self.output = output if output is not None else StdoutSink()
+        self.trace = trace
+        self.read_line = read_line or input  # Called with no arguments by `i`
+        self.profiler = None  # A cla_profile.Profiler while profiling is on
+        self.on_error = None  # Called with each error message, e.g. to log it
+        self.reset()
+
+        # Jump table indexed by opcode; handlers take the pre-split operands
+        self.dispatch = [None] * (OP_UNKNOWN + 1)
+        self.dispatch[OP_PRINT] = self.print_template
+        self.dispatch[OP_INPUT] = self.read_input
+        self.dispatch[OP_NEW] = self.store
+        self.dispatch[OP_ADD] = self.handle_add
+        self.dispatch[OP_OPEN] = self.handle_open
+        self.dispatch[OP_IMPORT] = self.handle_import
+        self.dispatch[OP_USAGE] = self.error
+        self.dispatch[OP_UNKNOWN] = self.unknown_command
+
+    def reset(self):
+        """Forget all variables, loaded scripts, pending blocks and errors."""
+        # Variables live in a flat frame; linking turns names into indices
+        self.slots = {}
+        self.names = []
+        self.frame = []
+        self.characters = {}
+        self.current_character = None
+        self.line_cache = {}
+        self.errors = 0  # Errors reported so far; a script run fails if any occur
+        # Linked code per resolved script path: (mtime_ns, size, code)
+        self.modules = {}
+        # Resolved path -> mtime_ns of the version `import` last ran
+        self.imported = {}
+        self.running = []  # Resolved paths of the scripts being run, outermost first
+        self.echo = self.trace  # Echo setting of the script being run, inherited by those it imports
+        # Interactive if/while blocks are collected until their final `end`
+        self.block_lines = []
+        self.block_depth = 0
+
+    def fork(self, output=None):
+        """A new interpreter starting with a copy of this one's variables.
+
+        Background jobs and pipeline stages run on a fork, so scripts on
+        different threads never share a frame, a running stack, an open
+        block or an error count. output defaults to a StdoutSink, since a
+        buffering sink cannot be shared between threads.
+        """
+        other = MyLangInterpreter(output=output, trace=self.trace, read_line=self.read_line)
+        other.on_error = self.on_error
+        other.slots = dict(self.slots)
+        other.names = list(self.names)
+        other.frame = list(self.frame)
+        other.characters = dict(self.characters)
+        other.current_character = self.current_character
+        # Linked code refers to slots by index, and the fork has the same slots
+        other.line_cache = dict(self.line_cache)
+        other.modules = dict(self.modules)
+        other.imported = dict(self.imported)
+        return other
+
+    def interpret(self, line):
+        try:
+            if self.block_depth or line.split(" ", 1)[0] in BLOCK_OPENERS:
+                self.continue_block(line)
+                return
+            instruction = self.line_cache.get(line)
+            if instruction is None:
+                instruction = self.link([compile_line(line)])[0]
+                if len(self.line_cache) >= LINE_CACHE_SIZE:
+                    self.line_cache.clear()
+                self.line_cache[line] = instruction
+            if self.profiler is not None:
+                self.profiler.execute(self, [instruction])
+                return
+            self.dispatch[instruction[0]](*instruction[1])
+        finally:
+            self.output.flush()
+
+    def continue_block(self, line):
+        command = line.strip().split(" ", 1)[0]
+        if command in BLOCK_OPENERS:
+            try:
+                compile_condition(line.strip())
+            except CompileError as e:
+                self.error(f"Error: {e}")
+                self.block_lines = []
+                self.block_depth = 0
+                return
+            self.block_depth += 1
+        elif command == "end":
+            self.block_depth -= 1
+        self.block_lines.append(line)
+        if self.block_depth:
+            return
+
+        lines, self.block_lines = self.block_lines, []
+        try:
+            code = self.link(compile_source(lines))
+        except CompileError as e:
+            self.error(f"Error: {e}")
+            return
+        self.execute(code)
+
+    @property
+    def variables(self):
+        """Snapshot of the assigned variables as a {name: value} dict."""
+        frame = self.frame
+        return {name: frame[slot] for name, slot in self.slots.items() if frame[slot] is not UNSET}
+
+    def slot(self, var_name):
+        slot = self.slots.get(var_name)
+        if slot is None:
+            slot = self.slots[var_name] = len(self.frame)
+            self.names.append(var_name)
+            self.frame.append(UNSET)
+        return slot
+
+    def set_variable(self, var_name, value):
+        self.frame[self.slot(var_name)] = value
+
+    def link(self, code):
+        """Bind compiled code to this interpreter.
+
+        Variable names become frame slots and comparison symbols become
+        `operator` functions. Compiled code keeps names and symbols so it can
+        be marshalled to the cache; linking happens once per load, never per
+        instruction executed.
+        """
+        slot = self.slot
+        slots = self.slots
+        linked = []
+        append = linked.append
+        for instruction in code:
+            opcode, operands, source = instruction
+            if opcode == OP_PRINT:
+                literals, names = operands
+                if names:
+                    names_slots = tuple([slots[name] if name in slots else slot(name) for name in names])
+                    instruction = (opcode, (literals, names_slots, names), source)
+                else:
+                    instruction = (opcode, (literals, (), names), source)
+            elif opcode == OP_NEW or opcode == OP_ADD:
+                var_name = operands[0]
+                instruction = (opcode, (slots[var_name] if var_name in slots else slot(var_name), operands[1]), source)
+            elif opcode == OP_INPUT:
+                instruction = (opcode, (slot(operands[0]), operands[0]), source)
+            elif opcode == OP_JUMP_IF_FALSE or opcode == OP_JUMP_IF_TRUE:
+                symbol, var_name, value, target = operands
+                instruction = (opcode, (COMPARISONS[symbol], slot(var_name), value, target), source)
+            append(instruction)
+        return linked
+
+    def execute(self, code, echo=False):
+        if self.profiler is not None:
+            self.profiler.execute(self, code, echo)
+            return
+        dispatch = self.dispatch
+        frame = self.frame
+        pc = 0
+        end = len(code)
+        while pc < end:
+            opcode, operands, source = code[pc]
+            pc += 1
+            if echo:
+                self.output.write(f"Executing: {source}\n")
+            # Assignments, loop counters and conditions take an inline fast
+            # path; errors (undefined names, strings) fall back to the handlers.
+            if opcode == OP_ADD:
+                try:
+                    frame[operands[0]] += operands[1]
+                except TypeError:
+                    self.handle_add(*operands)
+            elif opcode == OP_NEW:
+                frame[operands[0]] = operands[1]
+            elif opcode < OP_JUMP:
+                dispatch[opcode](*operands)
+            elif opcode == OP_JUMP:
+                pc = operands[0]
+            else:
+                compare, slot, value, target = operands
+                var_value = frame[slot]
+                if var_value is UNSET:
+                    taken = self.test_condition(compare, slot, value)
+                else:
+                    try:
+                        taken = compare(var_value, value)
+                    except TypeError:
+                        taken = self.test_condition(compare, slot, value)
+                if taken == (opcode == OP_JUMP_IF_TRUE):
+                    pc = target
+
+    def test_condition(self, compare, slot, value):
+        var_value = self.frame[slot]
+        if var_value is UNSET:
+            self.error(f"Error: Variable '{self.names[slot]}' is not defined.")
+            return False
+        try:
+            return compare(var_value, value)
+        except TypeError as e:
+            self.error(f"Error: {e}")
+        return False
+
+    def run_file(self, filename, echo=None):
+        """Run a .cla file; echo defaults to that of the script importing or
+        opening it, or to the interpreter's trace setting at the top level.
+
+        A script that is already running further up (a.cla opens b.cla
+        which opens a.cla) is reported instead of recursing.
+        """
+        if echo is None:
+            echo = self.echo if self.running else self.trace
+        path = os.path.realpath(filename)
+        if path in self.running:
+            self.cycle_error(path, "open")
+            return
+        self.running.append(path)
+        outer_echo, self.echo = self.echo, echo
+        try:
+            if self.profiler is not None:
+                self.profiler.run_file(self, filename, echo)
+                return
+            try:
+                code = self.load_module(filename, path)
+            except CompileError as e:
+                self.error(f"Error: {filename}: {e}")
+                return
+            self.execute(code, echo=echo)
+        finally:
+            self.running.pop()
+            self.echo = outer_echo
+            self.output.flush()
+
+    def load_module(self, filename, path):
+        """Linked code for a script, reused while its mtime and size are unchanged."""
+        st = os.stat(filename)
+        cached = self.modules.get(path)
+        if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2]
+        code = self.link(load_script(filename))
+        self.modules[path] = (st.st_mtime_ns, st.st_size, code)
+        return code
+
+    def find_module(self, filename):
+        """Resolve an `import` operand, or return None if there is no such file.
+
+        Relative names are looked up in the current directory, then next to
+        the importing script, then in each directory listed in CLA_PATH.
+        """
+        if os.path.isabs(filename):
+            return filename if os.path.isfile(filename) else None
+        directories = [""]
+        if self.running:
+            directories.append(os.path.dirname(self.running[-1]))
+        directories.extend(d for d in os.environ.get(SEARCH_PATH_VAR, "").split(os.pathsep) if d)
+        for directory in directories:
+            candidate = os.path.join(directory, filename)
+            if os.path.isfile(candidate):
+                return candidate
+        return None
+
+    def cycle_error(self, path, command):
+        chain = self.running[self.running.index(path):] + [path]
+        self.error(f"Error: Circular {command}: " + " -> ".join(os.path.basename(p) for p in chain))
+
+    def error(self, message):
+        self.output.write(message + "\n")
+        self.errors += 1
+        if self.on_error is not None:
+            self.on_error(message)
+
+    def unknown_command(self, command):
+        self.error(f"Unknown command: {command}")
+
+    def handle_import(self, filename):
+        """Run a script once; importing it again is a no-op until the file changes."""
+        if not filename.endswith('.cla'):
+            self.error("Error: File must have a .cla extension.")
+            return
+
+        found = self.find_module(filename)
+        if found is None:
+            self.error(f"Error: File '{filename}' not found.")
+            return
+
+        path = os.path.realpath(found)
+        if path in self.running:
+            self.cycle_error(path, "import")
+            return
+        mtime_ns = os.stat(path).st_mtime_ns
+        if self.imported.get(path) == mtime_ns:
+            return
+        self.imported[path] = mtime_ns
+        self.output.write(f"Importing from '{found}'...\n")
+        self.run_file(found)
+
+    def handle_open(self, filename):
+        if not filename.endswith('.cla'):
+            self.error("Error: File must have a .cla extension.")
+            return
+
+        if not os.path.exists(filename):
+            self.error(f"Error: File '{filename}' not found.")
+            return
+
+        self.output.write(f"Opening '{filename}'...\n")
+        self.run_file(filename)
+
+    def handle_print(self, text):
+        literals, names = compile_template(text)
+        self.print_template(literals, tuple(self.slot(name) for name in names), names)
+
+    def print_template(self, literals, slots, names):
+        self.output.write(self.render_template(literals, slots, names) + "\n")
+
+    def render_template(self, literals, slots, names):
+        if not slots:
+            return literals[0]
+        frame = self.frame
+        pieces = [literals[0]]
+        for slot, name, literal in zip(slots, names, literals[1:]):
+            value = frame[slot]
+            if value is UNSET:
+                pieces.append("$" + name)
+            else:
+                pieces.append(str(value))
+            pieces.append(literal)
+        return "".join(pieces)
+
+    def handle_input(self, variable_name):
+        self.read_input(self.slot(variable_name), variable_name)
+
+    def read_input(self, slot, variable_name):
+        # The prompt goes through the sink too, so it follows earlier output
+        self.output.write(f"Enter value for {variable_name}: ")
+        self.output.flush()
+        value = self.read_line()
+        self.frame[slot] = parse_literal(value)
+
+    def handle_new(self, command):
+        parts = command.split(" ", 1)
+        if len(parts) == 2:
+            var_name, value = parts
+            self.set_variable(var_name, parse_literal(value))
+        else:
+            self.error("Usage: new <variable_name> <value>")
+
+    def store(self, slot, value):
+        self.frame[slot] = value
+
+    def handle_add(self, slot, amount):
+        try:
+            self.frame[slot] += amount
+        except TypeError:
+            if self.frame[slot] is UNSET:
+                self.error(f"Error: Variable '{self.names[slot]}' is not defined.")
+            else:
+                self.error(f"Error: Variable '{self.names[slot]}' is not a number.")
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="MyLang interpreter")
+    parser.add_argument("script", nargs="?", help="run this .cla file instead of the prompt")
+    parser.add_argument("--quiet", action="store_true",
+                        help="do not echo each line of opened and imported scripts")
+    parser.add_argument("--profile", action="store_true",
+                        help="time every command and line, and print a report on exit")
+    parser.add_argument("--profile-output", metavar="FILE",
+                        help="also save the profile: JSON if FILE ends in .json, else collapsed stacks")
+    args = parser.parse_args(argv)
+
+    interpreter = MyLangInterpreter(output=BufferedSink(sys.stdout), trace=not args.quiet)
+    if args.profile or args.profile_output:
+        from cla_profile import Profiler
+        interpreter.profiler = Profiler()
+    try:
+        if args.script is not None:
+            try:
+                interpreter.run_file(args.script, echo=False)
+            except Exception as e:
+                interpreter.error(f"Error: {e}")
+            return 1 if interpreter.errors else 0
+        while True:
+            try:
+                command = input("... " if interpreter.block_depth else "> ")
+                interpreter.interpret(command)
+            except (KeyboardInterrupt, EOFError):
+                print("\nExiting...")
+                break
+            except Exception as e:
+                print(f"Error: {e}")
+        return 0
+    finally:
+        if interpreter.profiler is not None:
+            interpreter.profiler.report()
+            if args.profile_output:
+                interpreter.profiler.save(args.profile_output)
+
+if __name__ == "__main__":
+    sys.exit(main())
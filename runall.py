@@ -0,0 +1,83 @@
+import io
+import os
+import sys
+import glob
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from lang import MyLangInterpreter
+from sinks import CaptureSink
+
+
+def run_script(path):
+    """Run one .cla script in a fresh interpreter.
+
+    Returns (path, status, output, seconds). The script's output is
+    captured and stdin is empty, so `i` fails instead of blocking.
+    """
+    start = time.perf_counter()
+    output = CaptureSink()
+    stdin = sys.stdin
+    sys.stdin = io.StringIO()
+    interpreter = MyLangInterpreter(output=output)
+    try:
+        interpreter.run_file(path, echo=False)
+    except Exception as e:
+        interpreter.error(f"Error: {e}")
+    finally:
+        sys.stdin = stdin
+    status = 1 if interpreter.errors else 0
+    return (path, status, output.getvalue(), time.perf_counter() - start)
+
+
+def find_scripts(pattern):
+    return sorted(path for path in glob.glob(pattern, recursive=True)
+                  if path.endswith('.cla') and os.path.isfile(path))
+
+
+def run_all(paths, jobs=None):
+    """Run scripts on a process pool, yielding results in path order."""
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(paths) == 1:
+        for path in paths:
+            yield run_script(path)
+        return
+    # Batch small scripts so pickling overhead does not dominate
+    chunksize = max(1, len(paths) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(run_script, paths, chunksize=chunksize)
+
+
+def report(paths, jobs=None, write=print):
+    """Run paths, write each script's output and a summary; return the exit status."""
+    start = time.perf_counter()
+    failed = 0
+    for path, status, output, seconds in run_all(paths, jobs):
+        write(f"==> {path} [{'ok' if not status else 'FAILED'}, {seconds * 1000:.1f} ms] <==")
+        if output:
+            write(output.rstrip("\n"))
+        if status:
+            failed += 1
+    elapsed = time.perf_counter() - start
+    rate = len(paths) / elapsed if elapsed else 0.0
+    write(f"{len(paths)} script(s), {failed} failed, {elapsed:.2f} s "
+          f"({rate:.1f} scripts/s, {jobs or os.cpu_count() or 1} jobs)")
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run many .cla scripts in parallel")
+    parser.add_argument("pattern", help="glob of scripts to run, e.g. 'scripts/**/*.cla'")
+    parser.add_argument("--jobs", "-j", type=int, default=None, metavar="N",
+                        help="number of worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    paths = find_scripts(args.pattern)
+    if not paths:
+        print(f"Error: No .cla files match '{args.pattern}'.")
+        return 1
+    return report(paths, args.jobs)
+
+if __name__ == "__main__":
+    sys.exit(main())
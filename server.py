@@ -0,0 +1,284 @@
+import os
+import sys
+import json
+import signal
+import asyncio
+import contextlib
+
+from telemetry import Metrics
+
+# Session processes run this script
+SESSION_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "session.py")
+
+# Longest request line accepted, in bytes
+MAX_REQUEST_SIZE = 1 << 24
+
+# Longest reply line a session process may send, in bytes
+MAX_REPLY_SIZE = 1 << 30
+
+# Seconds a request may run before it is interrupted (--request-timeout)
+REQUEST_TIMEOUT = 60.0
+
+# Seconds an interrupted request gets to stop before its process is killed
+INTERRUPT_GRACE = 5.0
+
+# Seconds a named session may sit unused before its process is stopped
+SESSION_IDLE_TIMEOUT = 600.0
+
+# Most named sessions kept at once; each is a process
+MAX_NAMED_SESSIONS = 64
+
+
+class SessionWorker:
+    """One client's console, running in a process of its own.
+
+    The process (session.py) has its own interpreter, status, cwd
+    and environment, so sessions run in parallel and one client's long
+    command never holds up another's. Requests and replies are JSON lines
+    over its stdin and stdout. A request that runs past the timeout gets
+    SIGINT, which stops it like Ctrl+C; a process that does not answer
+    within INTERRUPT_GRACE seconds after that is killed.
+    """
+
+    def __init__(self, process):
+        self.process = process
+        self.lock = asyncio.Lock()  # A named session may be used by several connections
+        self.killed = False  # Set when a timed-out request ignored its interrupt
+        self.last_used = asyncio.get_running_loop().time()
+
+    @classmethod
+    async def start(cls, worker_args):
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, SESSION_SCRIPT, *worker_args,
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, limit=MAX_REPLY_SIZE,
+            start_new_session=True)  # Ctrl+C at the server's terminal is not meant for the sessions
+        return cls(process)
+
+    async def call(self, request, timeout=None):
+        """Send request and return the reply, or None if the process died."""
+        async with self.lock:
+            if self.process.returncode is not None:
+                return None
+            try:
+                self.process.stdin.write(json.dumps(request).encode() + b"\n")
+                await self.process.stdin.drain()
+                reply = asyncio.ensure_future(self.process.stdout.readline())
+                try:
+                    line = await asyncio.wait_for(asyncio.shield(reply), timeout)
+                except asyncio.TimeoutError:
+                    self.interrupt()
+                    try:
+                        line = await asyncio.wait_for(reply, INTERRUPT_GRACE)
+                    except asyncio.TimeoutError:
+                        self.killed = True
+                        self.kill()
+                        return None
+            except (ConnectionError, ValueError):
+                return None
+            finally:
+                self.last_used = asyncio.get_running_loop().time()
+            return json.loads(line) if line else None
+
+    def interrupt(self):
+        if os.name == 'nt':
+            self.kill()  # No SIGINT for another process group
+            return
+        with contextlib.suppress(ProcessLookupError):
+            self.process.send_signal(signal.SIGINT)
+
+    def kill(self):
+        with contextlib.suppress(ProcessLookupError):
+            self.process.kill()
+
+    async def close(self):
+        if self.process.returncode is None:
+            self.process.stdin.close()
+            try:
+                await asyncio.wait_for(self.process.wait(), INTERRUPT_GRACE)
+            except asyncio.TimeoutError:
+                self.kill()
+                await self.process.wait()
+
+
+class ConsoleServer:
+    """Serves console commands and .cla scripts to many clients over one socket.
+
+    Requests are JSON objects, one per line:
+        {"command": "dir /o"}
+        {"script": "new x 1\\np $x", "inputs": ["answer"]}
+    with optional "id" (echoed back) and "session" (a name, so a client can
+    reconnect to the same state). A line that is not JSON is taken as a
+    command. Each reply is one JSON line with status, output and cwd.
+
+    Every session runs in a SessionWorker process. A spare one is started
+    ahead of time, so a new session does not wait for Python to start.
+    Named sessions outlive their connections; one left unused for
+    SESSION_IDLE_TIMEOUT seconds is closed, and at most MAX_NAMED_SESSIONS
+    are kept.
+    The processes report their command timings and errors with each
+    reply, and the server adds them to its shared metrics and error log.
+    """
+
+    def __init__(self, worker_args=(), metrics=None, error_log=None, timeout=REQUEST_TIMEOUT):
+        self.worker_args = list(worker_args)
+        self.metrics = metrics or Metrics()
+        self.error_log = error_log
+        self.timeout = timeout or None
+        self.sessions = {}  # name -> SessionWorker, for clients that name theirs
+        self.spare = None  # Task starting the next session's process
+        self.clients = {}  # Handler task -> writer of each open connection
+
+    async def new_session(self):
+        spare = self.spare or asyncio.ensure_future(SessionWorker.start(self.worker_args))
+        self.spare = asyncio.ensure_future(SessionWorker.start(self.worker_args))
+        return await spare
+
+    async def serve_client(self, reader, writer):
+        private = None
+        task = asyncio.current_task()
+        self.clients[task] = writer
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):
+                    break  # Request too long, or the client went away
+                if not line:
+                    break
+                request = parse_request(line)
+                if request is None:
+                    response = {"status": 1, "output": "Error: Invalid request.\n"}
+                    writer.write(json.dumps(response).encode() + b"\n")
+                    await writer.drain()
+                    continue
+
+                name = request.get("session")
+                if name is not None:
+                    session = self.sessions.get(name)
+                    if session is None and len(self.sessions) >= MAX_NAMED_SESSIONS:
+                        response = {"status": 1, "output": "Error: Too many named sessions are open.\n"}
+                        if "id" in request:
+                            response["id"] = request["id"]
+                        writer.write(json.dumps(response).encode() + b"\n")
+                        await writer.drain()
+                        continue
+                    if session is None:
+                        new = await self.new_session()
+                        session = self.sessions.setdefault(name, new)  # Another connection may have won
+                        if session is not new:
+                            await new.close()
+                else:
+                    if private is None:
+                        private = await self.new_session()
+                    session = private
+                response = await self.handle(session, request)
+                closed = response.pop("closed", False)  # `exit` ends the session and the connection
+                if response.pop("reset", False) or closed:
+                    # The next request starts a new session
+                    if name is not None:
+                        if self.sessions.get(name) is session:
+                            del self.sessions[name]
+                    else:
+                        private = None
+                    await session.close()
+                if "id" in request:
+                    response["id"] = request["id"]
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+                if closed:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            if private is not None:
+                try:
+                    await private.close()
+                except asyncio.CancelledError:
+                    private.kill()  # The server is shutting down
+            writer.close()
+            self.clients.pop(task, None)
+
+    async def handle(self, session, request):
+        reply = await session.call(request, self.timeout)
+        if reply is None:
+            if session.killed:
+                message = "Error: The request did not stop after timing out; its session was reset.\n"
+            else:
+                message = "Error: The session's process exited; its session was reset.\n"
+            return {"status": 1, "output": message, "reset": True}
+        for event in reply.pop("events", ()):
+            if event[0] == "observe":
+                self.metrics.observe(event[1], event[2], event[3])
+            elif self.error_log is not None:
+                self.error_log.error(event[1], **event[2])
+        return reply
+
+    async def close_idle(self):
+        """Close named sessions nobody has used for SESSION_IDLE_TIMEOUT seconds."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(SESSION_IDLE_TIMEOUT / 10)
+            for name, session in list(self.sessions.items()):
+                if (self.sessions.get(name) is session and not session.lock.locked()
+                        and loop.time() - session.last_used > SESSION_IDLE_TIMEOUT):
+                    del self.sessions[name]
+                    await session.close()
+
+    async def close(self):
+        # Closed connections read as EOF, so each handler closes its own session
+        for writer in self.clients.values():
+            writer.close()
+        if self.clients:
+            await asyncio.wait(list(self.clients), timeout=INTERRUPT_GRACE)
+        sessions = list(self.sessions.values())
+        self.sessions = {}
+        if self.spare is not None:
+            sessions.append(await self.spare)
+            self.spare = None
+        for session in sessions:
+            await session.close()
+
+
+def parse_request(line):
+    text = line.decode(errors="replace").strip()
+    if not text.startswith("{"):
+        return {"command": text}
+    try:
+        request = json.loads(text)
+    except ValueError:
+        return None
+    return request if isinstance(request, dict) else None
+
+
+async def serve(address, server):
+    """Listen on address: a Unix socket path (anything with a /) or [host:]port."""
+    if "/" in address:
+        listener = await asyncio.start_unix_server(server.serve_client, path=address, limit=MAX_REQUEST_SIZE)
+    else:
+        host, _, port = address.rpartition(":")
+        listener = await asyncio.start_server(server.serve_client, host or "127.0.0.1", int(port),
+                                              limit=MAX_REQUEST_SIZE)
+    print(f"Serving on {address}. Press Ctrl+C to stop.", flush=True)
+    with contextlib.suppress(NotImplementedError):
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, listener.close)
+    reaper = asyncio.ensure_future(server.close_idle())
+    try:
+        async with listener:
+            await listener.serve_forever()
+    except asyncio.CancelledError:
+        pass  # Closed by SIGTERM
+    finally:
+        reaper.cancel()
+        await server.close()
+        if "/" in address:
+            with contextlib.suppress(OSError):
+                os.remove(address)
+
+
+def serve_forever(address, worker_args=(), metrics=None, error_log=None, timeout=REQUEST_TIMEOUT):
+    server = ConsoleServer(worker_args, metrics, error_log, timeout)
+    try:
+        asyncio.run(serve(address, server))
+    except KeyboardInterrupt:
+        print("\nServer stopped.")
+    return 0
@@ -0,0 +1,143 @@
+import io
+import os
+import sys
+import json
+import signal
+import argparse
+import contextlib
+
+from lang import CompileError, compile_source
+from cla_api import line_reader
+from telemetry import Metrics
+
+# Commands that drive the server's own terminal
+TERMINAL_COMMANDS = ("edit", "clear")
+
+
+class RelayedMetrics(Metrics):
+    """A session's metrics, also queued as events for the server's shared metrics."""
+
+    def __init__(self, events):
+        super().__init__()
+        self.events = events
+
+    def observe(self, command, seconds, failed=False):
+        super().observe(command, seconds, failed)
+        self.events.append(("observe", command, seconds, failed))
+
+
+class RelayedErrorLog:
+    """Queues a session's errors as events for the server's error log."""
+
+    def __init__(self, events):
+        self.events = events
+
+    def error(self, message, **fields):
+        self.events.append(("error", message, fields))
+
+
+class SessionHandler:
+    """Runs the requests of one session in its process."""
+
+    def __init__(self, console):
+        self.console = console
+        self.busy = False  # SIGINT only interrupts a running request
+
+    def interrupt(self, signum, frame):
+        if self.busy:
+            raise KeyboardInterrupt
+
+    def handle(self, request):
+        console = self.console
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            console.status = 0
+            inputs = request.get("inputs") or []
+            if not isinstance(inputs, list):
+                console.error("Error: inputs must be a list of lines.")
+                return {"status": console.status, "output": output.getvalue(), "cwd": os.getcwd()}
+            console.mylang.read_line = line_reader(inputs)
+            try:
+                self.busy = True
+                try:
+                    if "script" in request:
+                        self.run_script(str(request["script"]))
+                    else:
+                        self.run_command(str(request.get("command", "")).strip())
+                finally:
+                    self.busy = False
+            except KeyboardInterrupt:
+                console.local.command = request.get("command", "script")  # For the error log
+                console.error("Error: The request timed out and was stopped.")
+                console.local.command = None
+            except Exception as e:
+                console.error(f"Error: {e}")
+        return {"status": console.status, "output": output.getvalue(), "cwd": os.getcwd()}
+
+    def run_command(self, command):
+        console = self.console
+        if not command or command.startswith('#'):
+            return
+        if command.endswith("&") and not command.endswith("&&"):
+            console.error("Error: Background jobs are not available in server mode.")
+            return
+        word = command.split()[0].lower()
+        if word in TERMINAL_COMMANDS:
+            console.error(f"Error: '{word}' needs a terminal and is not available in server mode.")
+            return
+        console.process_command(command)
+
+    def run_script(self, script):
+        console = self.console
+        mylang = console.mylang
+        errors = mylang.errors
+        try:
+            code = mylang.link(compile_source(script.splitlines()))
+        except CompileError as e:
+            console.error(f"Error: {e}")
+            return
+        mylang.execute(code)
+        mylang.output.flush()
+        if mylang.errors != errors:
+            console.status = 1
+
+
+def main(argv=None):
+    """Requests on stdin, replies on the original stdout."""
+    parser = argparse.ArgumentParser(description="A console session of console.py --serve")
+    parser.add_argument("--max-jobs", type=int, default=4)
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args(argv)
+
+    # Replies get a descriptor of their own; anything else writing to
+    # stdout, e.g. a child process, goes to /dev/null instead
+    replies = os.fdopen(os.dup(1), 'w', encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+
+    from console import WindowsLikeConsole
+    events = []
+    console = WindowsLikeConsole(max_jobs=args.max_jobs, trace=not args.quiet, metrics=RelayedMetrics(events),
+                                 error_log=RelayedErrorLog(events))
+    console.serving = True
+    handler = SessionHandler(console)
+    signal.signal(signal.SIGINT, handler.interrupt)
+    try:
+        for line in sys.stdin:
+            response = handler.handle(json.loads(line))
+            response["events"] = events[:]
+            events.clear()
+            if not console.running:
+                response["closed"] = True  # `exit` ends the session
+            replies.write(json.dumps(response) + "\n")
+            replies.flush()
+            if not console.running:
+                break
+    finally:
+        console.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+import os
+import uuid
+import signal
+import queue
+import shlex
+import codecs
+import threading
+import subprocess
+
+READ_SIZE = 1 << 16
+
+
+class ShellWorker:
+    """A long-lived shell that runs one command at a time over a pipe.
+
+    Each command is sent to the shell's stdin followed by a printf of a
+    per-worker sentinel and the command's exit status, so the end of its
+    output can be found in the stream without starting a new process.
+    POSIX only.
+    """
+
+    def __init__(self, shell="/bin/sh", generation=0):
+        self.token = f"__console_done_{uuid.uuid4().hex}__".encode()
+        self.generation = generation  # Environment generation it was started with
+        # Own process group, so a command can be stopped with its children
+        self.process = subprocess.Popen([shell], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.STDOUT, start_new_session=True)
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def run(self, command, write):
+        """Run command, passing its output to write() as it arrives.
+
+        Returns the exit status. Commands read from /dev/null so they
+        cannot consume the pipe the worker receives its commands on. Each
+        starts with a cd to the console's directory (a builtin, so no
+        fork), since an earlier command such as `true; cd /` may have moved
+        the shell.
+        """
+        script = (f"cd {shlex.quote(os.getcwd())} && eval {shlex.quote(command)} </dev/null 2>&1\n"
+                  f"printf '%s%d\\n' {self.token.decode()} \"$?\"\n")
+        self.process.stdin.write(script.encode())
+        self.process.stdin.flush()
+        return self.read_output(write)
+
+    def read_output(self, write):
+        decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        fd = self.process.stdout.fileno()
+        token = self.token
+        keep = len(token) - 1  # A sentinel may straddle two reads
+        pending = b""
+        while True:
+            chunk = os.read(fd, READ_SIZE)
+            if not chunk:
+                # The shell itself exited, e.g. on `exit` or a syntax error
+                write(decoder.decode(pending, final=True))
+                return self.process.wait()
+            pending += chunk
+            index = pending.find(token)
+            if index >= 0:
+                write(decoder.decode(pending[:index], final=True))
+                status = pending[index + len(token):]
+                while not status.endswith(b"\n"):
+                    chunk = os.read(fd, 64)
+                    if not chunk:
+                        return self.process.wait()
+                    status += chunk
+                return int(status)
+            if len(pending) > keep:
+                write(decoder.decode(pending[:-keep]))
+                pending = pending[-keep:]
+
+    def kill(self):
+        """Stop the shell and whatever command it is running."""
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        self.close()
+
+    def close(self):
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+            try:
+                self.process.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                os.killpg(self.process.pid, signal.SIGKILL)
+                self.process.wait()
+        self.process.stdout.close()
+
+
+class ShellPool:
+    """Up to `size` shell workers shared by concurrent callers."""
+
+    def __init__(self, size=1, shell="/bin/sh"):
+        self.shell = shell
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+        self.generation = 0
+
+    def environment_changed(self):
+        """Retire the running workers; they inherited the old os.environ."""
+        self.generation += 1
+
+    def usable(self, worker):
+        return worker.alive() and worker.generation == self.generation
+
+    def run(self, command, write, started=None):
+        """Run command on an idle worker; see ShellWorker.run.
+
+        started(process), if given, receives the worker's shell process so
+        the caller can signal its process group while the command runs.
+        """
+        with self.slots:
+            worker = self.take()
+            try:
+                if started is not None:
+                    started(worker.process)
+                try:
+                    status = worker.run(command, write)
+                except BrokenPipeError:
+                    # The shell died between commands; retry once on a fresh one
+                    worker.close()
+                    worker = ShellWorker(self.shell, self.generation)
+                    if started is not None:
+                        started(worker.process)
+                    status = worker.run(command, write)
+            except BaseException:
+                # Interrupted mid-command: its output is still in the pipe
+                worker.kill()
+                raise
+            if self.usable(worker):
+                self.idle.put(worker)
+            else:
+                worker.close()
+        return status
+
+    def take(self):
+        while True:
+            try:
+                worker = self.idle.get_nowait()
+            except queue.Empty:
+                return ShellWorker(self.shell, self.generation)
+            if self.usable(worker):
+                return worker
+            worker.close()
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
@@ -0,0 +1,73 @@
+import sys
+import time
+
+
+class StdoutSink:
+    """Writes straight through to whatever sys.stdout is at the time.
+
+    Redirections such as contextlib.redirect_stdout and the console's
+    per-job output routing keep working, at the cost of one write per call.
+    """
+
+    def write(self, text):
+        sys.stdout.write(text)
+
+    def flush(self):
+        sys.stdout.flush()
+
+
+class BufferedSink:
+    """Collects output and passes it to stream in large writes.
+
+    Pending text is written once buffer_size characters have accumulated,
+    or on the first write more than flush_interval seconds after the last
+    flush, so a slow script still shows progress. flush_interval=None
+    flushes on size alone; buffer_size=1 writes every call through. A
+    stream of None means sys.stdout at the time of the flush.
+    """
+
+    def __init__(self, stream=None, buffer_size=1 << 16, flush_interval=0.1):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.pending = []
+        self.size = 0
+        self.last_flush = time.monotonic()
+
+    def write(self, text):
+        self.pending.append(text)
+        self.size += len(text)
+        if self.size >= self.buffer_size:
+            self.flush()
+        elif self.flush_interval is not None and time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self.last_flush = time.monotonic()
+        if not self.pending:
+            return
+        stream = self.stream or sys.stdout
+        text = "".join(self.pending)
+        self.pending = []
+        self.size = 0
+        stream.write(text)
+        stream.flush()
+
+
+class CaptureSink:
+    """Keeps everything written in memory, for embedding and tests."""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, text):
+        self.parts.append(text)
+
+    def flush(self):
+        pass
+
+    def getvalue(self):
+        return "".join(self.parts)
+
+    def clear(self):
+        self.parts = []
@@ -0,0 +1,229 @@
+import os
+import json
+import time
+import queue
+import bisect
+import tempfile
+import threading
+
+# Error log shipped (empty) next to console.py
+ERROR_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "console_errors.log")
+ERROR_LOG_BYTES = 1 << 20
+ERROR_LOG_BACKUPS = 3
+
+# Latency bucket bounds in seconds, 10 us to 168 s with four buckets per
+# doubling, so a percentile read from the buckets is within 19% of the truth
+BUCKET_BOUNDS = tuple(1e-5 * 2 ** (i / 4) for i in range(97))
+
+# Seconds between writes of the Prometheus metrics file
+EXPORT_INTERVAL = 10.0
+
+
+class Histogram:
+    """Counts of latencies per bucket of BUCKET_BOUNDS, plus their sum and maximum."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)  # The last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """Estimate of the q-quantile, interpolated within its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = BUCKET_BOUNDS[index - 1] if index else 0.0
+                upper = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else self.max
+                value = lower + (upper - lower) * (rank - seen) / count
+                return min(value, self.max)
+            seen += count
+        return self.max
+
+
+class Metrics:
+    """Per-command latency histograms and error counters.
+
+    observe() is a lock and a binary search, cheap enough to run on every
+    command; reports and exports work on a copy taken under the lock.
+    """
+
+    def __init__(self):
+        self.latency = {}  # command -> Histogram
+        self.errors = {}  # command -> commands that failed
+        self.lock = threading.Lock()
+
+    def observe(self, command, seconds, failed=False):
+        with self.lock:
+            histogram = self.latency.get(command)
+            if histogram is None:
+                histogram = self.latency[command] = Histogram()
+            histogram.observe(seconds)
+            if failed:
+                self.errors[command] = self.errors.get(command, 0) + 1
+
+    def reset(self):
+        with self.lock:
+            self.latency = {}
+            self.errors = {}
+
+    def snapshot(self):
+        with self.lock:
+            latency = {}
+            for command, histogram in self.latency.items():
+                copy = latency[command] = Histogram()
+                copy.counts = list(histogram.counts)
+                copy.count, copy.sum, copy.max = histogram.count, histogram.sum, histogram.max
+            return latency, dict(self.errors)
+
+    def rows(self):
+        """(command, count, errors, p50, p95, p99, max) per command, busiest first."""
+        latency, errors = self.snapshot()
+        return [(command, histogram.count, errors.get(command, 0), histogram.quantile(0.5),
+                 histogram.quantile(0.95), histogram.quantile(0.99), histogram.max)
+                for command, histogram in sorted(latency.items(), key=lambda item: -item[1].count)]
+
+    def prometheus(self):
+        """The metrics in the Prometheus text exposition format."""
+        latency, errors = self.snapshot()
+        lines = ["# HELP console_command_duration_seconds Time taken by console commands.",
+                 "# TYPE console_command_duration_seconds histogram"]
+        for command, histogram in sorted(latency.items()):
+            label = command.replace("\\", "\\\\").replace('"', '\\"')
+            cumulative = 0
+            for bound, count in zip(BUCKET_BOUNDS, histogram.counts):
+                cumulative += count
+                lines.append(f'console_command_duration_seconds_bucket{{command="{label}",le="{bound:.6g}"}} '
+                             f'{cumulative}')
+            lines.append(f'console_command_duration_seconds_bucket{{command="{label}",le="+Inf"}} '
+                         f'{histogram.count}')
+            lines.append(f'console_command_duration_seconds_sum{{command="{label}"}} {histogram.sum:.9g}')
+            lines.append(f'console_command_duration_seconds_count{{command="{label}"}} {histogram.count}')
+        lines.append("# HELP console_command_errors_total Console commands that reported an error.")
+        lines.append("# TYPE console_command_errors_total counter")
+        for command in sorted(latency):
+            label = command.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'console_command_errors_total{{command="{label}"}} {errors.get(command, 0)}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        # Written to a temporary file and renamed, so a scraper never sees half a file
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-")
+        try:
+            with os.fdopen(fd, 'w') as file:
+                file.write(self.prometheus())
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+
+class MetricsExporter:
+    """Rewrites a Prometheus text file every interval seconds on a daemon thread."""
+
+    def __init__(self, metrics, path, interval=EXPORT_INTERVAL):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.work, name="metrics-exporter", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def work(self):
+        while not self.stopped.wait(self.interval):
+            self.export()
+
+    def export(self):
+        try:
+            self.metrics.write_prometheus(self.path)
+        except OSError:
+            pass  # Tried again at the next interval
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        self.export()
+
+
+class ErrorLog:
+    """Error records written as JSON lines to a rotating file by a background thread.
+
+    error() only builds a LogRecord and puts it on the QueueHandler's
+    queue, skipping Logger's caller lookup and QueueHandler's copy of the
+    record; a QueueListener thread formats and writes it. The logging
+    module is loaded by preload() or at the first record.
+    """
+
+    def __init__(self, path=ERROR_LOG, max_bytes=ERROR_LOG_BYTES, backups=ERROR_LOG_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.handler = None
+        self.listener = None
+        self.make_record = None
+        self.level = None
+        self.lock = threading.Lock()
+
+    def preload(self):
+        """Load logging and start the writer on a background thread, off the startup path."""
+        threading.Thread(target=self.start, name="error-log-start", daemon=True).start()
+
+    def error(self, message, **fields):
+        if self.handler is None:
+            self.start()
+        record = self.make_record("console", self.level, "", 0, message, None, None)
+        record.fields = fields
+        self.handler.enqueue(record)
+
+    def start(self):
+        with self.lock:
+            if self.handler is not None:
+                return
+            import logging
+            import logging.handlers
+            handler = logging.handlers.RotatingFileHandler(self.path, maxBytes=self.max_bytes,
+                                                           backupCount=self.backups, encoding="utf-8", delay=True)
+            handler.setFormatter(JsonFormatter())
+            records = queue.SimpleQueue()
+            self.listener = logging.handlers.QueueListener(records, handler)
+            self.listener.start()
+            self.make_record = logging.LogRecord
+            self.level = logging.ERROR
+            self.handler = logging.handlers.QueueHandler(records)
+
+    def close(self):
+        # Waits for the queued records to be written
+        if self.listener is not None:
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.close()
+
+
+class JsonFormatter:
+    """One JSON object per record: time, level, message and the record's fields."""
+
+    def format(self, record):
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+                    + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry)
@@ -0,0 +1,171 @@
+import io
+import os
+import time
+import wave
+import tempfile
+import unittest
+import contextlib
+import importlib.util
+
+# Tests run headless: SDL plays into a dummy device
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from audio import AudioPlayer, SoundCache
+
+HAVE_PYGAME = importlib.util.find_spec("pygame") is not None
+
+
+def write_wav(path, seconds, rate=22050):
+    with wave.open(path, 'wb') as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(rate)
+        file.writeframes(b"\0\0" * int(seconds * rate))
+
+
+def until(condition, timeout=5.0):
+    """Wait for condition() to hold; False if it did not within timeout."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class SoundCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.loads = []
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name, data=b"x"):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'wb') as file:
+            file.write(data)
+        return path
+
+    def load(self, path):
+        self.loads.append(os.path.basename(path))
+        return os.path.basename(path), 40
+
+    def test_hit_and_least_recently_used_eviction(self):
+        cache = SoundCache(max_bytes=100)
+        a, b, c = self.path("a"), self.path("b"), self.path("c")
+        cache.get(a, self.load)
+        cache.get(b, self.load)
+        cache.get(a, self.load)  # a is now the most recent
+        cache.get(c, self.load)  # 120 bytes: b goes
+        self.assertEqual(self.loads, ["a", "b", "c"])
+        self.assertIn(a, cache)
+        self.assertNotIn(b, cache)
+        self.assertEqual(cache.size, 80)
+
+    def test_changed_file_is_decoded_again(self):
+        cache = SoundCache()
+        a = self.path("a")
+        cache.get(a, self.load)
+        self.path("a", b"longer")
+        cache.get(a, self.load)
+        self.assertEqual(self.loads, ["a", "a"])
+        self.assertEqual(cache.size, 40)
+
+    def test_sound_larger_than_cache_not_kept(self):
+        cache = SoundCache(max_bytes=10)
+        a = self.path("a")
+        self.assertEqual(cache.get(a, self.load), "a")
+        self.assertNotIn(a, cache)
+        self.assertEqual(cache.size, 0)
+
+
+@unittest.skipUnless(HAVE_PYGAME, "pygame is not installed")
+class AudioPlayerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.short = os.path.join(self.directory.name, "short.wav")
+        self.long = os.path.join(self.directory.name, "long.wav")
+        write_wav(self.short, 0.2)
+        write_wav(self.long, 30)
+        self.player = AudioPlayer()
+
+    def tearDown(self):
+        self.player.close()
+        self.directory.cleanup()
+
+    def current(self):
+        return self.player.status()[0]
+
+    def test_play_returns_before_decoding(self):
+        self.player.play(self.long)
+        self.assertTrue(self.player.active())
+        self.assertTrue(until(lambda: self.current() == self.long))
+        self.assertAlmostEqual(self.player.status()[3], 30, places=1)
+
+    def test_pause_right_after_play(self):
+        self.player.play(self.long)
+        self.player.pause()
+        self.assertTrue(until(lambda: self.player.status()[1]))
+        self.assertEqual(self.current(), self.long)
+        self.player.resume()
+        self.assertTrue(until(lambda: not self.player.status()[1]))
+
+    def test_playlist_advances_when_a_track_ends(self):
+        self.player.play(self.short)
+        self.player.enqueue(self.long)
+        self.assertTrue(until(lambda: self.current() == self.long))
+        self.assertEqual(self.player.status()[5], [])
+
+    def test_next_and_stop(self):
+        self.player.play(self.long)
+        self.player.enqueue(self.short)
+        self.player.next()
+        self.assertTrue(until(lambda: self.current() == self.short))
+        self.player.stop()
+        self.assertTrue(until(lambda: not self.player.active()))
+
+    def test_volume(self):
+        self.player.play(self.long)
+        self.player.set_volume(1.5)
+        self.assertEqual(self.player.status()[4], 1.0)
+        self.player.set_volume(0.25)
+        self.assertTrue(until(lambda: self.player.channel is not None
+                              and abs(self.player.channel.get_volume() - 0.25) < 0.01))
+
+    def test_undecodable_file_reported(self):
+        bad = os.path.join(self.directory.name, "bad.wav")
+        with open(bad, 'wb') as file:
+            file.write(b"not a sound")
+        self.player.play(bad)
+        self.assertTrue(until(lambda: not self.player.active()))
+        errors = self.player.take_errors()
+        self.assertEqual(len(errors), 1)
+        self.assertIn("bad.wav", errors[0])
+
+    def test_plays_when_every_channel_is_busy(self):
+        self.player.play(self.short)
+        self.assertTrue(until(lambda: self.player.pygame is not None))
+        mixer = self.player.pygame.mixer
+        mixer.set_num_channels(1)
+        other = mixer.Sound(self.long)
+        other.play()  # Takes the only channel
+        self.player.play(self.long)
+        self.assertTrue(until(lambda: self.current() == self.long))
+        self.assertEqual(self.player.take_errors(), [])
+
+    def test_console_pause_while_decoding(self):
+        from console import WindowsLikeConsole
+        console = WindowsLikeConsole(trace=False)
+        console.audio = self.player
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            console.process_command(f"play {self.long}")
+            console.process_command("pause")
+        self.assertEqual(output.getvalue().splitlines()[-1], "Music paused.")
+        self.assertTrue(until(lambda: self.player.status()[1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
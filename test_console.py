@@ -0,0 +1,189 @@
+import io
+import os
+import sys
+import time
+import doctest
+import tempfile
+import unittest
+
+import cmdline
+from cmdline import split_pipeline
+from console import WindowsLikeConsole
+
+
+class ConsoleTestCase(unittest.TestCase):
+    """Runs each test in a temporary directory with a fresh console.
+
+    What the console prints is collected in self.output.
+    """
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.directory = tempfile.TemporaryDirectory()
+        os.chdir(self.directory.name)
+        self.stdout = sys.stdout
+        sys.stdout = self.output = io.StringIO()
+        self.console = WindowsLikeConsole(trace=False)
+
+    def tearDown(self):
+        self.console.close()
+        sys.stdout = self.stdout
+        os.chdir(self.cwd)
+        self.directory.cleanup()
+
+    def read(self, path):
+        with open(path) as file:
+            return file.read()
+
+    def write(self, path, text):
+        with open(path, 'w') as file:
+            file.write(text)
+
+
+class SplitPipelineTest(unittest.TestCase):
+    def test_stages(self):
+        self.assertEqual(split_pipeline("dir /s | sort | more"),
+                         [("dir /s", None, None, False), ("sort", None, None, False), ("more", None, None, False)])
+
+    def test_quoted_operators_are_text(self):
+        self.assertEqual(split_pipeline("""echo 'a > b' | find "x|y" """),
+                         [("echo 'a > b'", None, None, False), ('find "x|y"', None, None, False)])
+
+    def test_redirections(self):
+        self.assertEqual(split_pipeline("sort < in.txt > out.txt"), [("sort", "in.txt", "out.txt", False)])
+        self.assertEqual(split_pipeline("echo a >> log.txt"), [("echo a", None, "log.txt", True)])
+        self.assertEqual(split_pipeline("dir >out.txt | sort"),
+                         [("dir", None, "out.txt", False), ("sort", None, None, False)])
+
+    def test_quoted_file_name(self):
+        self.assertEqual(split_pipeline('dir > "my list.txt"'), [("dir", None, "my list.txt", False)])
+
+    def test_shell_syntax_left_to_the_shell(self):
+        for line in ("make 2> errors.txt", "a || b", "a >&2", "a 2>&1 | b", "| sort", "dir |", "dir >",
+                     "echo 'open"):
+            self.assertIsNone(split_pipeline(line), line)
+
+    def test_digit_inside_a_word_is_not_a_descriptor(self):
+        self.assertEqual(split_pipeline("echo a2> out.txt"), [("echo a2", None, "out.txt", False)])
+
+
+class PipelineTest(ConsoleTestCase):
+    def test_builtin_to_external_to_file(self):
+        self.console.process_command("echo hello world | tr a-z A-Z > out.txt")
+        self.assertEqual(self.read("out.txt"), "HELLO WORLD\n")
+        self.assertEqual(self.console.status, 0)
+
+    def test_cla_script_to_external(self):
+        self.write("count.cla", "new n 3\nwhile n > 0\np line $n\nadd n -1\nend\n")
+        self.console.process_command("run count.cla | grep line | sort > out.txt")
+        self.assertEqual(self.read("out.txt"), "line 1\nline 2\nline 3\n")
+
+    def test_append(self):
+        self.console.process_command("echo one > log.txt")
+        self.console.process_command("echo two >> log.txt")
+        self.assertEqual(self.read("log.txt"), "one\ntwo\n")
+
+    def test_input_redirection(self):
+        self.write("in.txt", "b\na\n")
+        self.console.process_command("echo ignored | sort < in.txt > out.txt")
+        self.assertEqual(self.read("out.txt"), "a\nb\n")
+
+    def test_status_of_last_stage(self):
+        self.console.process_command("echo x | grep nothing > out.txt")
+        self.assertEqual(self.console.status, 1)
+
+    def test_missing_input_file(self):
+        self.console.process_command("echo x | sort < missing.txt")
+        self.assertEqual(self.console.status, 1)
+
+    def test_cla_condition_is_not_a_redirection(self):
+        self.console.process_command("new x 5")
+        self.console.process_command("if x > 3")
+        self.console.process_command("new y 1")
+        self.console.process_command("end")
+        self.assertFalse(os.path.exists("3"))
+        self.assertEqual(self.console.mylang.variables["y"], 1)
+
+
+class JobTest(ConsoleTestCase):
+    def start(self, command):
+        self.console.process_command(command + " &")
+        return self.console.jobs.latest()
+
+    def test_background_job_and_wait(self):
+        job = self.start("p hello from a job")
+        self.console.process_command("wait")
+        self.assertEqual(job.state, "Done")
+        self.assertEqual(job.output.getvalue(), "hello from a job\n")
+        self.assertIn(f"[{job.id}] p hello from a job", self.output.getvalue())
+
+    def test_jobs_lists_state_and_status(self):
+        self.start("p one")
+        self.start("run missing.cla")
+        self.console.process_command("wait")
+        self.console.process_command("jobs")
+        listing = self.output.getvalue().splitlines()[-2:]
+        self.assertRegex(listing[0], r"^\[1\] Done +p one \(exit 0\)$")
+        self.assertRegex(listing[1], r"^\[2\] Failed +run missing.cla \(exit 1\)$")
+
+    def test_job_gets_its_own_variables(self):
+        self.console.process_command("new x 1")
+        self.start("add x 5")
+        self.console.process_command("wait")
+        self.assertEqual(self.console.mylang.variables["x"], 1)
+
+    def test_kill_external_command(self):
+        job = self.start("sleep 30")
+        time.sleep(0.2)
+        start = time.perf_counter()
+        self.console.process_command("kill 1")
+        self.assertTrue(job.done.wait(5))
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertEqual(job.state, "Killed")
+
+    def test_kill_cla_loop(self):
+        self.write("forever.cla", "new n 1\nwhile n > 0\nadd n 1\nend\n")
+        job = self.start("run forever.cla")
+        time.sleep(0.2)
+        self.console.process_command("kill 1")
+        self.assertTrue(job.done.wait(5))
+        self.assertEqual(job.state, "Killed")
+
+    def test_kill_unknown_job(self):
+        self.console.process_command("kill 7")
+        self.assertEqual(self.console.status, 1)
+
+    def test_fg_shows_output_and_status(self):
+        job = self.start("run missing.cla")
+        self.console.process_command("fg")
+        self.assertTrue(job.done.is_set())
+        self.assertIn("not found", self.output.getvalue())
+        self.assertEqual(self.console.status, 1)
+        self.assertIsNone(self.console.jobs.get(job.id))
+
+    def test_fg_reports_dropped_lines(self):
+        self.write("many.cla", "new n 1500\nwhile n > 0\np line $n\nadd n -1\nend\n")
+        job = self.start("run many.cla")
+        job.done.wait(10)
+        self.console.process_command(f"fg {job.id}")
+        output = self.output.getvalue()
+        self.assertRegex(output, r"\[\d+ earlier line\(s\) of output were not kept\]")
+        self.assertIn("line 1\n", output)
+        self.assertNotIn("line 1500\n", output)
+
+    def test_cd_refused_in_job(self):
+        os.mkdir("sub")
+        job = self.start("cd sub")
+        self.console.process_command("wait")
+        self.assertEqual(job.state, "Failed")
+        self.assertEqual(os.getcwd(), self.console.cwd)
+        self.assertNotEqual(os.path.basename(os.getcwd()), "sub")
+
+
+def load_tests(loader, tests, ignore):
+    tests.addTests(doctest.DocTestSuite(cmdline))
+    return tests
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,199 @@
+import os
+import doctest
+import tempfile
+import unittest
+from unittest import mock
+
+import cla_syntax
+import lang
+from lang import MyLangInterpreter, compile_source
+from sinks import CaptureSink
+
+
+def run(source):
+    """Output of running .cla source on a fresh interpreter."""
+    output = CaptureSink()
+    interpreter = MyLangInterpreter(output=output, trace=False)
+    interpreter.execute(interpreter.link(compile_source(source.splitlines())))
+    return output.getvalue()
+
+
+class TemplateTest(unittest.TestCase):
+    def test_defined_variable(self):
+        self.assertEqual(run("new name Ada\np Hi $name!"), "Hi Ada!\n")
+
+    def test_undefined_variable_printed_verbatim(self):
+        self.assertEqual(run("p Hi $nobody."), "Hi $nobody.\n")
+
+    def test_undefined_variable_is_not_an_error(self):
+        interpreter = MyLangInterpreter(output=CaptureSink(), trace=False)
+        interpreter.execute(interpreter.link(compile_source(["p $nobody"])))
+        self.assertEqual(interpreter.errors, 0)
+
+    def test_longest_name_wins(self):
+        self.assertEqual(run("new a 1\nnew ab 2\np $ab $a $abc"), "2 1 $abc\n")
+
+    def test_shorter_name_not_matched_inside_longer(self):
+        # $ab is the undefined variable ab, not $a followed by "b"
+        self.assertEqual(run("new a 1\np $ab"), "$ab\n")
+
+    def test_bare_dollar_is_literal(self):
+        self.assertEqual(run("new x 5\np $ costs $$x, $-"), "$ costs $5, $-\n")
+        self.assertEqual(run("p $"), "$\n")
+
+    def test_substituted_values_not_rescanned(self):
+        self.assertEqual(run('new a $b\nnew b 2\np $a'), "$b\n")
+
+    def test_value_changes_between_lines(self):
+        self.assertEqual(run("new n 1\np $n\nadd n 1\np $n"), "1\n2\n")
+
+    def test_interactive_lines(self):
+        output = CaptureSink()
+        interpreter = MyLangInterpreter(output=output, trace=False)
+        for line in ("new a 1", "new ab 2", "p $ab$a $ $zz"):
+            interpreter.interpret(line)
+        self.assertEqual(output.getvalue(), "21 $ $zz\n")
+
+    def test_empty_print(self):
+        self.assertEqual(run("p"), "\n")
+
+
+class ValueTest(unittest.TestCase):
+    def test_values_print_as_written(self):
+        self.assertEqual(run("new zip 02134\nnew plus +5\nnew price 1.50\nnew big 1e3\np $zip $plus $price $big"),
+                         "02134 +5 1.50 1e3\n")
+
+    def test_numbers_stay_numeric(self):
+        self.assertEqual(run("new n 5\nadd n 1\nnew f 0.5\nadd f 0.25\np $n $f"), "6 0.75\n")
+
+    def test_add_accepts_any_number_form(self):
+        self.assertEqual(run("new n 1\nadd n +05\nadd n 1.50\np $n"), "7.5\n")
+
+    def test_input_kept_as_typed(self):
+        output = CaptureSink()
+        interpreter = MyLangInterpreter(output=output, trace=False)
+        answers = iter(["007", "7"])
+        interpreter.read_line = lambda: next(answers)
+        interpreter.execute(interpreter.link(compile_source(["i a", "i b", "add b 1", "p $a $b"])))
+        self.assertTrue(output.getvalue().endswith("b: 007 8\n"))
+
+
+class LineNumberTest(unittest.TestCase):
+    def test_while_end_after_if_end(self):
+        # The if's end compiles to nothing; the while's end is line 7
+        numbers = []
+        code = compile_source(["new n 2", "while n > 0", "add n -1", "if n == 0", "p done", "end", "end"],
+                              numbers)
+        self.assertEqual(numbers, [1, 2, 3, 4, 5, 7])
+        self.assertEqual(len(numbers), len(code))
+
+    def test_blank_lines_and_comments_skipped(self):
+        numbers = []
+        compile_source(["", "# note", "p a", "", "if x == 1", "p b", "else", "p c", "end"], numbers)
+        self.assertEqual(numbers, [3, 5, 6, 7, 8])
+
+
+class ModuleTest(unittest.TestCase):
+    """Scripts opening and importing others, in a temporary directory."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output = CaptureSink()
+        self.interpreter = MyLangInterpreter(output=self.output, trace=True)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def script(self, name, source):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as file:
+            file.write(source)
+        return path
+
+    def test_imports_follow_the_echo_of_their_importer(self):
+        self.script("lib.cla", "p lib\n")
+        main = self.script("main.cla", "import lib.cla\np main\n")
+        self.interpreter.run_file(main, echo=False)
+        self.assertNotIn("Executing:", self.output.getvalue())
+        self.interpreter.reset()
+        self.interpreter.run_file(main, echo=True)
+        self.assertIn("Executing: p lib", self.output.getvalue())
+
+    def lines(self):
+        """Output without the echo and Importing/Opening notices."""
+        return [line for line in self.output.getvalue().splitlines()
+                if not line.startswith(("Executing:", "Importing from", "Opening"))]
+
+    def test_import_runs_once(self):
+        self.script("lib.cla", "p lib\n")
+        main = self.script("main.cla", "import lib.cla\nimport lib.cla\np main\n")
+        self.interpreter.run_file(main, echo=False)
+        self.interpreter.run_file(main, echo=False)
+        self.assertEqual(self.lines(), ["lib", "main", "main"])
+
+    def test_diamond_runs_shared_module_once(self):
+        self.script("shared.cla", "p shared\n")
+        self.script("left.cla", "import shared.cla\np left\n")
+        self.script("right.cla", "import shared.cla\np right\n")
+        main = self.script("main.cla", "import left.cla\nimport right.cla\n")
+        self.interpreter.run_file(main, echo=False)
+        self.assertEqual(self.lines(), ["shared", "left", "right"])
+
+    def test_changed_module_is_imported_again(self):
+        lib = self.script("lib.cla", "p old\n")
+        self.interpreter.interpret(f"import {lib}")
+        self.interpreter.interpret(f"import {lib}")
+        self.script("lib.cla", "p new\n")
+        st = os.stat(lib)
+        os.utime(lib, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        self.interpreter.interpret(f"import {lib}")
+        self.assertEqual(self.lines(), ["old", "new"])
+
+    def test_open_runs_every_time(self):
+        lib = self.script("lib.cla", "p lib\n")
+        main = self.script("main.cla", f"open {lib}\nopen {lib}\n")
+        self.interpreter.run_file(main, echo=False)
+        self.assertEqual(self.lines(), ["lib", "lib"])
+
+    def test_search_path(self):
+        libraries = os.path.join(self.directory.name, "libs")
+        os.mkdir(libraries)
+        self.script(os.path.join("libs", "util.cla"), "p util\n")
+        main = self.script("main.cla", "import util.cla\n")
+        with mock.patch.dict(os.environ, {"CLA_PATH": os.pathsep.join(["/nonexistent", libraries])}):
+            self.interpreter.run_file(main, echo=False)
+        self.assertEqual(self.lines(), ["util"])
+        self.assertEqual(self.interpreter.errors, 0)
+
+    def test_missing_module(self):
+        main = self.script("main.cla", "import nowhere.cla\n")
+        with mock.patch.dict(os.environ, {"CLA_PATH": ""}):
+            self.interpreter.run_file(main, echo=False)
+        self.assertEqual(self.lines(), ["Error: File 'nowhere.cla' not found."])
+
+    def test_circular_import_reported(self):
+        self.script("a.cla", "import b.cla\np a\n")
+        self.script("b.cla", "import a.cla\np b\n")
+        self.interpreter.run_file(os.path.join(self.directory.name, "a.cla"), echo=False)
+        self.assertEqual(self.lines(), ["Error: Circular import: a.cla -> b.cla -> a.cla", "b", "a"])
+        self.assertEqual(self.interpreter.errors, 1)
+
+    def test_circular_open_reported(self):
+        a = self.script("a.cla", "open a.cla\n")
+        cwd = os.getcwd()
+        os.chdir(self.directory.name)  # open takes names relative to the current directory
+        try:
+            self.interpreter.run_file(a, echo=False)
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(self.lines(), ["Error: Circular open: a.cla -> a.cla"])
+
+
+def load_tests(loader, tests, ignore):
+    tests.addTests(doctest.DocTestSuite(lang))
+    tests.addTests(doctest.DocTestSuite(cla_syntax))
+    return tests
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,382 @@
+import os
+import stat
+import errno
+import queue
+import shutil
+import threading
+
+# Threads walking, copying or deleting a tree; the work is mostly waiting
+# on the file system, so there are more threads than CPUs
+TREE_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Seconds between progress reports
+PROGRESS_INTERVAL = 0.2
+
+# Errors kept for the summary; the rest are only counted
+MAX_ERRORS = 100
+
+# Files a copy task handles before queueing the rest of its directory
+COPY_BATCH = 64
+
+# Bytes asked of one copy_file_range/sendfile call
+COPY_CHUNK = 1 << 30
+
+# Errors meaning "this kernel or file system cannot do that", not a failed copy
+UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EPERM, errno.EBADF}
+
+
+class Progress:
+    """Counters shared by the workers of one tree operation."""
+
+    def __init__(self):
+        self.files = 0
+        self.dirs = 0
+        self.size = 0
+        self.errors = []  # (path, message), the first MAX_ERRORS
+        self.error_count = 0
+        self.cancelled = False
+        self.lock = threading.Lock()
+
+    def add(self, files=0, dirs=0, size=0):
+        with self.lock:
+            self.files += files
+            self.dirs += dirs
+            self.size += size
+
+    def error(self, path, exception):
+        with self.lock:
+            self.error_count += 1
+            if len(self.errors) < MAX_ERRORS:
+                self.errors.append((path, getattr(exception, "strerror", None) or str(exception)))
+
+    def summary(self):
+        text = f"{self.files:,} file(s), {self.dirs:,} dir(s)"
+        return f"{text}, {format_size(self.size)}" if self.size else text
+
+
+def format_size(size):
+    for unit in ("bytes", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:,} {unit}" if unit == "bytes" else f"{size:,.1f} {unit}"
+        size /= 1024
+
+
+class WorkQueue:
+    """A pool of threads running tasks that may queue more tasks.
+
+    run() returns once every task has finished; Ctrl+C, or a report
+    callback raising KeyboardInterrupt, cancels the tasks not yet started
+    and waits for the running ones. Any other exception, such as a job's
+    JobKilled, does the same and is then raised again.
+    """
+
+    def __init__(self, workers=TREE_WORKERS):
+        self.workers = max(1, workers)
+        self.tasks = queue.Queue()
+        self.pending = 0
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.cancelled = threading.Event()
+
+    def put(self, task, *args):
+        with self.lock:
+            self.pending += 1
+        self.tasks.put((task, args))
+
+    def run(self, progress, report=None):
+        if not self.pending:
+            return
+        threads = [threading.Thread(target=self.work, args=(progress,), name=f"tree-worker-{i + 1}", daemon=True)
+                   for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            while not self.done.wait(PROGRESS_INTERVAL):
+                if report is not None:
+                    report(progress)
+        except KeyboardInterrupt:
+            self.cancel(progress)
+        except BaseException:
+            # A killed job: stop the workers too before it goes away
+            self.cancel(progress)
+            raise
+        finally:
+            for thread in threads:
+                self.tasks.put(None)
+
+    def cancel(self, progress):
+        self.cancelled.set()
+        progress.cancelled = True
+        self.done.wait()
+
+    def work(self, progress):
+        while True:
+            item = self.tasks.get()
+            if item is None:
+                return
+            task, args = item
+            try:
+                if not self.cancelled.is_set():
+                    task(*args)
+            except Exception as e:
+                progress.error(getattr(e, "filename", None) or "", e)
+            finally:
+                with self.lock:
+                    self.pending -= 1
+                    if not self.pending:
+                        self.done.set()
+
+
+class Node:
+    """A directory being removed; pending counts its own scan and its unremoved subdirectories."""
+
+    def __init__(self, path, parent):
+        self.path = path
+        self.parent = parent
+        self.pending = 1
+        self.failed = False
+
+
+class TreeRemover:
+    """Deletes a tree bottom-up: files as directories are scanned, each
+    directory once its last subdirectory is gone."""
+
+    def __init__(self, work, progress, dry_run=False):
+        self.work = work
+        self.progress = progress
+        self.dry_run = dry_run
+        self.lock = threading.Lock()
+
+    def start(self, path):
+        self.work.put(self.scan, Node(path, None))
+
+    def scan(self, node):
+        subdirs = []
+        files = 0
+        failed = False
+        try:
+            with os.scandir(node.path) as it:
+                for entry in it:
+                    if self.work.cancelled.is_set():
+                        failed = True
+                        break
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        subdirs.append(entry.path)
+                        continue
+                    if not self.dry_run:
+                        try:
+                            os.unlink(entry.path)
+                        except OSError as e:
+                            self.progress.error(entry.path, e)
+                            failed = True
+                            continue
+                    files += 1
+        except OSError as e:
+            self.progress.error(node.path, e)
+            failed = True
+        self.progress.add(files=files)
+        with self.lock:
+            node.pending += len(subdirs)
+            node.failed = node.failed or failed
+        for path in subdirs:
+            self.work.put(self.scan, Node(path, node))
+        self.finish(node)
+
+    def finish(self, node):
+        # Remove node once nothing below it is left, then try its parent
+        while node is not None:
+            with self.lock:
+                node.pending -= 1
+                if node.pending:
+                    return
+                failed = node.failed or self.work.cancelled.is_set()
+            if not failed and not self.dry_run:
+                try:
+                    os.rmdir(node.path)
+                except OSError as e:
+                    self.progress.error(node.path, e)
+                    failed = True
+            if failed:
+                # Only the cause is reported, not every directory above it
+                if node.parent is not None:
+                    with self.lock:
+                        node.parent.failed = True
+            else:
+                self.progress.add(dirs=1)
+            node = node.parent
+
+
+class TreeCopier:
+    """Copies a tree: directories are created as they are scanned and
+    their files copied in batches by the workers."""
+
+    def __init__(self, work, progress):
+        self.work = work
+        self.progress = progress
+        self.dirs = []  # (source, destination), for their modes and times at the end
+        self.lock = threading.Lock()
+
+    def start(self, source, destination):
+        self.work.put(self.copy_dir, source, destination)
+
+    def copy_dir(self, source, destination):
+        os.makedirs(destination, exist_ok=True)
+        with self.lock:
+            self.dirs.append((source, destination))
+        self.progress.add(dirs=1)
+        batch = []
+        with os.scandir(source) as it:
+            for entry in it:
+                target = os.path.join(destination, entry.name)
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    self.work.put(self.copy_dir, entry.path, target)
+                    continue
+                batch.append((entry.path, target))
+                if len(batch) == COPY_BATCH:
+                    self.work.put(self.copy_files, batch)
+                    batch = []
+        if batch:
+            self.copy_files(batch)
+
+    def copy_files(self, batch):
+        for source, target in batch:
+            if self.work.cancelled.is_set():
+                return
+            try:
+                size = copy_file(source, target)
+            except OSError as e:
+                self.progress.error(source, e)
+                continue
+            self.progress.add(files=1, size=size)
+
+    def finish(self):
+        # Adding entries changed the new directories' times; set them last,
+        # deepest first
+        for source, destination in sorted(self.dirs, key=lambda pair: -len(pair[1])):
+            try:
+                shutil.copystat(source, destination)
+            except OSError as e:
+                self.progress.error(destination, e)
+
+
+def copy_file(source, target):
+    """Copy one file with its mode and times; returns its size.
+
+    Data moves in the kernel: copy_file_range (which can share blocks on
+    file systems with reflinks), else sendfile, else read/write. Symbolic
+    links are copied as links. Copying a file onto itself, or anything but
+    a regular file (a FIFO would block the copy forever), raises an
+    OSError from shutil without touching the target.
+    """
+    if same_file(source, target):
+        raise shutil.SameFileError("The file cannot be copied onto itself.")
+    if os.path.islink(source):
+        if os.path.lexists(target):
+            os.unlink(target)
+        os.symlink(os.readlink(source), target)
+        return 0
+    # O_NONBLOCK so that opening a FIFO returns at once instead of waiting for a writer
+    source_fd = os.open(source, os.O_RDONLY | getattr(os, "O_NONBLOCK", 0) | getattr(os, "O_BINARY", 0))
+    try:
+        info = os.fstat(source_fd)
+        if not stat.S_ISREG(info.st_mode):
+            raise shutil.SpecialFileError(errno.EINVAL, "Not a regular file", source)
+        with open(target, 'wb') as target_file:
+            copy_data(source_fd, target_file.fileno())
+    finally:
+        os.close(source_fd)
+    os.chmod(target, stat.S_IMODE(info.st_mode))
+    os.utime(target, ns=(info.st_atime_ns, info.st_mtime_ns))
+    return info.st_size
+
+
+def same_file(source, target):
+    """True if target already exists and is source, under any name."""
+    if not os.path.lexists(target):
+        return False
+    try:
+        return os.path.samefile(source, target)
+    except OSError:
+        return False  # A dangling link on either side
+
+
+def copy_data(source_fd, target_fd):
+    if hasattr(os, "copy_file_range"):
+        try:
+            while os.copy_file_range(source_fd, target_fd, COPY_CHUNK):
+                pass
+            return
+        except OSError as e:
+            if e.errno not in UNSUPPORTED:
+                raise
+    if hasattr(os, "sendfile"):
+        try:
+            while os.sendfile(target_fd, source_fd, None, COPY_CHUNK):
+                pass
+            return
+        except OSError as e:
+            if e.errno not in UNSUPPORTED:
+                raise
+    while True:
+        data = os.read(source_fd, 1 << 20)
+        if not data:
+            return
+        os.write(target_fd, data)
+
+
+def remove_tree(path, workers=TREE_WORKERS, dry_run=False, report=None):
+    """Delete path and everything below it; returns the Progress.
+
+    With dry_run nothing is deleted, only counted.
+    """
+    progress = Progress()
+    work = WorkQueue(workers)
+    TreeRemover(work, progress, dry_run).start(path)
+    work.run(progress, report)
+    return progress
+
+
+def copy_tree(source, destination, workers=TREE_WORKERS, report=None):
+    """Copy the directory source to destination, creating it; returns the Progress."""
+    progress = Progress()
+    work = WorkQueue(workers)
+    copier = TreeCopier(work, progress)
+    copier.start(source, destination)
+    work.run(progress, report)
+    if not progress.cancelled:
+        copier.finish()
+    return progress
+
+
+def move(source, destination, workers=TREE_WORKERS, report=None):
+    """Rename source to destination, or copy and delete it across file systems.
+
+    Returns the Progress, or None if a rename was enough.
+    """
+    try:
+        os.rename(source, destination)
+        return None
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    if not os.path.isdir(source) or os.path.islink(source):
+        progress = Progress()
+        progress.add(files=1, size=copy_file(source, destination))
+        os.unlink(source)
+        return progress
+    progress = copy_tree(source, destination, workers, report)
+    if progress.cancelled or progress.error_count:
+        return progress  # Keep the source: the copy is incomplete
+    removed = remove_tree(source, workers, report=None)
+    progress.errors.extend(removed.errors)
+    progress.error_count += removed.error_count
+    progress.cancelled = removed.cancelled
+    return progress